@@ -0,0 +1,108 @@
+"""
+Tests enumerating effect sets from a ConceptGraph
+"""
+from tisane.concept import Concept
+from tisane.concept_graph import ConceptGraph, CONCEPTUAL_RELATIONSHIP, iter_subsets
+from more_itertools import powerset
+import os
+import subprocess
+import sys
+import unittest
+
+
+# Prints the first effect sets of get_concept_graph(6), for comparing the order across hash seeds
+print_effects_sets_script = """
+from tests.test_concept_graph import get_concept_graph
+gr, dv = get_concept_graph(6)
+print([(e.main.effect, e.interaction.effect) for e in gr.iter_effects_sets(dv, limit=8)])
+"""
+
+
+# @returns (ConceptGraph, dv) where @param num_causes concepts cause the dv, and the first causes the second
+def get_concept_graph(num_causes: int):
+    gr = ConceptGraph()
+    dv = Concept("dv")
+    causes = [Concept("c{}".format(i)) for i in range(num_causes)]
+    for c in causes:
+        gr.addEdge(c, dv, CONCEPTUAL_RELATIONSHIP.CAUSE)
+        pass
+    gr.addEdge(causes[0], causes[1], CONCEPTUAL_RELATIONSHIP.CAUSE)
+    return gr, dv
+
+
+class ConceptGraphEffectsSetsTest(unittest.TestCase):
+    def test_same_effects_sets_as_powersets(self):
+        gr, dv = get_concept_graph(4)
+        main_effects, interaction_effects = gr.get_candidate_effects(dv)
+        expected = [
+            (m, i)
+            for m in gr.cast("main", powerset(main_effects))
+            for i in gr.cast("interaction", powerset(interaction_effects))
+            if m.effect or i.effect
+        ]
+        effects_sets = [(e.main, e.interaction) for e in gr.iter_effects_sets(dv)]
+        self.assertEqual(effects_sets, expected)
+        self.assertEqual(len(gr.generate_effects_sets(dv)), len(expected))
+
+    def test_subsets(self):
+        self.assertEqual(list(iter_subsets([1, 2, 3])), list(powerset([1, 2, 3])))
+        self.assertEqual(
+            list(iter_subsets([1, 2, 3, 4], required=[3], max_size=2)),
+            [(3,), (1, 3), (2, 3), (3, 4)],
+        )
+        self.assertEqual(list(iter_subsets([1, 2], required=[1, 2], max_size=1)), [])
+
+    def test_constraints(self):
+        gr, dv = get_concept_graph(4)
+
+        for e in gr.iter_effects_sets(
+            dv, max_terms=3, max_interaction_effects=1, required_main_effects=["c2"]
+        ):
+            main = e.main.effect or ()
+            interaction = e.interaction.effect or ()
+            self.assertIn("c2", main)
+            self.assertLessEqual(len(main) + len(interaction), 3)
+            self.assertLessEqual(len(interaction), 1)
+
+        hierarchical = list(gr.iter_effects_sets(dv, hierarchical=True))
+        with_interaction = [e for e in hierarchical if e.interaction.effect]
+        self.assertTrue(with_interaction)
+        for e in with_interaction:
+            self.assertIn("c0", e.main.effect)
+            self.assertIn("c1", e.main.effect)
+
+        # A required main effect that is not a candidate
+        self.assertEqual(
+            list(gr.iter_effects_sets(dv, required_main_effects=["dv"])), []
+        )
+
+    def test_early_termination(self):
+        # 2^40 effect sets: only feasible if they are never all built
+        gr, dv = get_concept_graph(40)
+        effects_sets = gr.iter_effects_sets(dv, limit=100)
+        self.assertEqual(len(list(effects_sets)), 100)
+
+        first = next(gr.iter_effects_sets(dv))
+        self.assertIsNone(first.main.effect)
+        self.assertEqual(first.interaction.effect, (("c0", "c1"),))
+
+    def test_order_does_not_depend_on_hash_seed(self):
+        gr, dv = get_concept_graph(6)
+        main_effects, interaction_effects = gr.get_candidate_effects(dv)
+        self.assertEqual(main_effects, ["c{}".format(i) for i in range(6)])
+        self.assertEqual(interaction_effects, [("c0", "c1")])
+
+        root = os.path.join(os.path.dirname(__file__), "..")
+        outputs = []
+        for seed in ["1", "2"]:
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            result = subprocess.run(
+                [sys.executable, "-c", print_effects_sets_script],
+                cwd=root,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            outputs.append(result.stdout)
+        self.assertEqual(outputs[0], outputs[1])
@@ -18,6 +18,7 @@ from tisane.main import check_design_ivs, check_design_dv, construct_statistical
 
 import tisane as ts
 import pandas as pd
+import json
 from typing import Dict, Set
 import os
 import unittest
@@ -77,6 +78,30 @@ class ConstructStatisticalModelTest(unittest.TestCase):
         link = sm.link_function
         self.assertIn(link, family_link_paired[family])
 
+    def test_construct_from_model_dict(self):
+        u0 = ts.Unit("Unit")
+        m0 = u0.numeric("Measure_0")
+        m1 = u0.numeric("Measure_1")
+        dv = u0.numeric("Dependent_variable")
+
+        design = ts.Design(dv=dv, ivs=[m0, m1])
+        family_link_paired = get_family_link_paired_candidates(design=design)
+
+        with open(os.path.join(dir, "main_only.json"), "r") as f:
+            model_dict = json.loads(f.read())
+        sm = construct_statistical_model(
+            None,
+            query=design,
+            main_effects_candidates=set(design.ivs),
+            interaction_effects_candidates=set(),
+            random_effects_candidates=set(),
+            family_link_paired_candidates=family_link_paired,
+            model_dict=model_dict,
+        )
+        self.assertEqual(set(design.ivs), sm.main_effects)
+        self.assertEqual(type(sm.family_function).__name__, model_dict["family"])
+        self.assertEqual(type(sm.link_function).__name__, model_dict["link"])
+
     def test_construct_main_interaction(self):
         u0 = ts.Unit("Unit")
         m0 = u0.numeric("Measure_0")
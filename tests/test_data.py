@@ -0,0 +1,29 @@
+"""
+Tests checks and statistics computed over data columns
+"""
+from tisane.data import is_all_non_negative_integers
+import numpy as np
+import pandas as pd
+import unittest
+
+
+class DataChecksTest(unittest.TestCase):
+    def test_is_all_non_negative_integers(self):
+        self.assertTrue(is_all_non_negative_integers(np.arange(10)))
+        self.assertTrue(is_all_non_negative_integers(np.arange(10, dtype=np.uint8)))
+        self.assertTrue(is_all_non_negative_integers(np.arange(10, dtype=float)))
+        self.assertTrue(is_all_non_negative_integers(pd.Series([0, 2, 4])))
+        self.assertFalse(is_all_non_negative_integers(np.array([0, 1, -1])))
+        self.assertFalse(is_all_non_negative_integers(np.array([0.0, 1.5])))
+        self.assertFalse(is_all_non_negative_integers(np.array([0.0, np.nan])))
+        self.assertFalse(is_all_non_negative_integers(np.array([0.0, np.inf])))
+        self.assertFalse(is_all_non_negative_integers(np.array(["a", "b"])))
+
+    def test_is_all_non_negative_integers_chunked(self):
+        values = np.arange(1000, dtype=float)
+        self.assertTrue(is_all_non_negative_integers(values, chunk_size=7))
+        values[-1] = -1
+        self.assertFalse(is_all_non_negative_integers(values, chunk_size=7))
+        integers = np.arange(1000)
+        integers[500] = -3
+        self.assertFalse(is_all_non_negative_integers(integers, chunk_size=7))
@@ -0,0 +1,131 @@
+"""
+Tests for representing candidate models as bitmasks of effect ids
+"""
+from tisane.concept import Concept
+from tisane.concept_graph import ConceptGraph, CONCEPTUAL_RELATIONSHIP
+from tisane.effect_set import (
+    EffectIndex,
+    EffectSet,
+    MainEffect,
+    InteractionEffect,
+    MixedEffect,
+    count_effects,
+    is_subset,
+    is_superset,
+)
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+
+# Prints the ids a new EffectIndex gives the candidate effects of a ConceptGraph, and the first masks
+print_effect_ids_script = """
+from tests.test_concept_graph import get_concept_graph
+from tisane.effect_set import EffectIndex
+gr, dv = get_concept_graph(6)
+index = EffectIndex()
+masks = list(gr.iter_effects_masks(dv, index, limit=8))
+print(index.to_dict(), masks)
+"""
+
+
+class EffectIndexTest(unittest.TestCase):
+    def test_masks(self):
+        index = EffectIndex(
+            main_effects=["a", "b", "c"], interaction_effects=[("a", "b")]
+        )
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.get_id("interaction", ("a", "b")), 3)
+
+        ab = index.to_mask(main_effects=["a", "b"])
+        abc = index.to_mask(main_effects=["a", "b", "c"])
+        self.assertEqual(count_effects(abc), 3)
+        self.assertTrue(is_subset(ab, abc))
+        self.assertTrue(is_superset(abc, ab))
+        self.assertFalse(is_subset(abc, ab))
+        self.assertEqual(index.get_effects(abc & ~ab), ("c",))
+
+        # Deduplicating candidates is a set of ints
+        masks = {ab, index.to_mask(main_effects=["b", "a"]), abc}
+        self.assertEqual(len(masks), 2)
+
+        # New effects are added to the index
+        d = index.to_mask(random_effects=["d"])
+        self.assertEqual(index.get_effect(4), ("random", "d"))
+        self.assertEqual(index.get_effects(abc | d, "random"), ("d",))
+
+        with self.assertRaises(ValueError):
+            index.add_effect("nested", "e")
+
+    def test_encode_decode(self):
+        dv = Concept("dv")
+        effect_set = EffectSet(
+            dv=dv,
+            main=MainEffect(("a", "b")),
+            interaction=InteractionEffect((("a", "b"),)),
+            mixed=MixedEffect(("u",)),
+        )
+        index = EffectIndex()
+        mask = index.encode(effect_set)
+        decoded = index.decode(mask, dv)
+        self.assertEqual(decoded.main, effect_set.main)
+        self.assertEqual(decoded.interaction, effect_set.interaction)
+        self.assertEqual(decoded.mixed, effect_set.mixed)
+
+        only_main = index.decode(index.kind_masks["main"], dv)
+        self.assertIsNone(only_main.interaction.effect)
+        self.assertIsNone(only_main.mixed)
+
+    def test_serialization(self):
+        index = EffectIndex(
+            main_effects=["m{}".format(i) for i in range(10)],
+            interaction_effects=[("m0", "m1")],
+        )
+        masks = [0, 1, 0b10000000001, (1 << len(index)) - 1]
+
+        array = index.to_array(masks)
+        self.assertEqual(array.shape, (4, 11))
+        self.assertEqual(array[2].nonzero()[0].tolist(), [0, 10])
+        self.assertEqual(index.from_array(array), masks)
+
+        restored = EffectIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+        self.assertEqual(restored.effects, index.effects)
+        self.assertEqual(restored.get_effects(masks[2]), ("m0", ("m0", "m1")))
+
+    def test_concept_graph_masks(self):
+        gr = ConceptGraph()
+        dv = Concept("dv")
+        causes = [Concept("c{}".format(i)) for i in range(4)]
+        for c in causes:
+            gr.addEdge(c, dv, CONCEPTUAL_RELATIONSHIP.CAUSE)
+            pass
+        gr.addEdge(causes[0], causes[1], CONCEPTUAL_RELATIONSHIP.CAUSE)
+
+        index = EffectIndex()
+        masks = list(gr.iter_effects_masks(dv, index, max_terms=3))
+        effects_sets = list(gr.iter_effects_sets(dv, max_terms=3))
+        self.assertEqual(len(masks), len(set(masks)))
+        self.assertEqual(
+            [(e.main, e.interaction) for e in effects_sets],
+            [(d.main, d.interaction) for d in (index.decode(m, dv) for m in masks)],
+        )
+        self.assertEqual(len(list(gr.iter_effects_masks(dv, index, limit=5))), 5)
+
+    def test_concept_graph_ids_do_not_depend_on_hash_seed(self):
+        root = os.path.join(os.path.dirname(__file__), "..")
+        outputs = []
+        for seed in ["1", "2"]:
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            result = subprocess.run(
+                [sys.executable, "-c", print_effect_ids_script],
+                cwd=root,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            outputs.append(result.stdout)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn("[['main', 'c0'], ['main', 'c1']", outputs[0])
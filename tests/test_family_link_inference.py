@@ -46,8 +46,14 @@ from tisane.variable import (
 from tisane.family_link_inference import (
     infer_family_functions,
     infer_link_functions,
-    generate_family_selection_questions_options
+    generate_family_selection_questions_options,
+    answer_family_selection_questions,
+    rank_family_functions,
 )
+from tisane.data import compute_moment_statistics
+import numpy as np
+import pandas as pd
+from scipy import stats
 import unittest
 
 
@@ -512,6 +518,76 @@ class FamilyLinkInferenceTest(unittest.TestCase):
         self.assertIsInstance(choices, dict)
         self.assertEqual(len(choices.keys()), 0)    
 
+class FamilySelectionFromDataTest(unittest.TestCase):
+    def get_design(self, dv_values):
+        u0 = ts.Unit("Unit")
+        m0 = u0.numeric("Measure_0")
+        dv = u0.numeric("Dependent_variable")
+        df = pd.DataFrame(
+            {
+                "Unit": range(len(dv_values)),
+                "Measure_0": np.arange(len(dv_values), dtype=float),
+                "Dependent_variable": dv_values,
+            }
+        )
+        return ts.Design(dv=dv, ivs=[m0]).assign_data(df)
+
+    def test_moment_statistics_match_single_pass(self):
+        values = np.random.default_rng(0).gamma(2.0, 3.0, size=10001)
+        values[::7] = 0
+        values[3] = np.nan
+        statistics = compute_moment_statistics(values, chunk_size=333)
+        finite = values[np.isfinite(values)]
+
+        self.assertEqual(statistics.count, finite.size)
+        self.assertEqual(statistics.missing, 1)
+        self.assertAlmostEqual(statistics.mean, finite.mean())
+        self.assertAlmostEqual(statistics.get_variance(), finite.var())
+        self.assertAlmostEqual(statistics.get_skewness(), stats.skew(finite))
+        self.assertAlmostEqual(
+            statistics.get_zero_fraction(), np.mean(finite == 0)
+        )
+        self.assertFalse(statistics.is_integral)
+        self.assertTrue(statistics.is_non_negative())
+        self.assertEqual(statistics.maximum, finite.max())
+
+    def test_answers_counts(self):
+        design = self.get_design(
+            np.random.default_rng(0).poisson(5.0, size=500).astype(float)
+        )
+        statistics = compute_moment_statistics(
+            design.dataset.get_column("Dependent_variable")
+        )
+        answers, families = answer_family_selection_questions(design.dv, statistics)
+        self.assertEqual(answers, ["treat as counts", "false"])
+        self.assertEqual(families, [PoissonFamily.__name__])
+
+        ranked = rank_family_functions(design)
+        self.assertIsInstance(ranked[0], PoissonFamily)
+        self.assertEqual(len(ranked), len(DataForTests.numeric_families_types))
+
+    def test_answers_skewed_continuous(self):
+        design = self.get_design(
+            np.random.default_rng(0).gamma(1.0, 2.0, size=500) + 0.1
+        )
+        ranked = rank_family_functions(design)
+        self.assertIsInstance(ranked[0], InverseGaussianFamily)
+        self.assertIsInstance(ranked[1], GammaFamily)
+        self.assertIsInstance(ranked[2], TweedieFamily)
+        # Poisson does not support non-integer data
+        self.assertIsInstance(ranked[-1], PoissonFamily)
+
+    def test_answers_symmetric_continuous(self):
+        design = self.get_design(np.random.default_rng(0).normal(size=500))
+        answers, families = answer_family_selection_questions(
+            design.dv,
+            compute_moment_statistics(design.dataset.get_column("Dependent_variable")),
+        )
+        self.assertEqual(answers, ["treat as continuous", "false"])
+        ranked = rank_family_functions(design)
+        self.assertIsInstance(ranked[0], GaussianFamily)
+
+
 class DataForTests:
     numeric_families_types = [
         GaussianFamily,
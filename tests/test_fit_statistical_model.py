@@ -0,0 +1,284 @@
+"""
+Tests fitting statistical models in process
+"""
+from tisane.code_generator import (
+    fit_statistical_model,
+    generate_code,
+    generate_numpy_inverse_link_source,
+    get_design_matrices,
+)
+from tisane.family import (
+    GaussianFamily,
+    IdentityLink,
+    PoissonFamily,
+    LogLink,
+    LogLogLink,
+    link_transforms,
+)
+from tisane.data import Dataset, max_cached_design_matrices
+from tisane.family_link_ranking import rank_family_link_candidates
+from tisane.random_effects import RandomIntercept
+from tisane.statistical_model import StatisticalModel
+import tisane as ts
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+import statsmodels.api as sm
+import importlib.util
+import math
+import os
+import unittest
+import unittest.mock
+
+data_path = os.path.join("examples/Exercise/", "exercise_simple.csv")
+
+
+def get_exercise_model(family_class=GaussianFamily, link_class=IdentityLink):
+    adult = ts.Unit("case")
+    age = adult.numeric("age")
+    exercise = adult.numeric("exercise")
+    endurance = adult.numeric("endurance")
+    sm_model = StatisticalModel(
+        dependent_variable=endurance,
+        main_effects={age, exercise},
+        interaction_effects=set(),
+        random_effects=set(),
+        family_function=family_class(endurance),
+        link_function=link_class(endurance),
+    )
+    return sm_model.assign_data(data_path)
+
+
+# @returns model of pounds lost with a random intercept for each group, with or without @param random_effects
+def get_group_exercise_model(random_effects: bool = True):
+    member = ts.Unit("member")
+    group = ts.Unit("group")
+    motivation = member.numeric("motivation")
+    pounds_lost = member.numeric("pounds_lost")
+    member.nests_within(group)
+    sm_model = StatisticalModel(
+        dependent_variable=pounds_lost,
+        main_effects={motivation},
+        interaction_effects=set(),
+        random_effects={RandomIntercept(groups=group)} if random_effects else set(),
+        family_function=GaussianFamily(pounds_lost),
+        link_function=IdentityLink(pounds_lost),
+    )
+    return sm_model.assign_data(
+        os.path.join("examples/Group_Exercise/", "exercise_group.csv")
+    )
+
+
+class FitStatisticalModelTest(unittest.TestCase):
+    def test_fit_matches_generated_code(self):
+        sm_model = get_exercise_model()
+        res = fit_statistical_model(sm_model)
+
+        df = pd.read_csv(data_path)
+        reference = smf.glm(
+            formula="endurance ~ age + exercise",
+            data=df,
+            family=sm.families.Gaussian(sm.families.links.identity()),
+        ).fit()
+        pd.testing.assert_series_equal(res.params, reference.params)
+
+    def test_design_matrices_are_reused(self):
+        sm_model = get_exercise_model()
+        design_matrices = get_design_matrices(sm_model)
+        self.assertIs(design_matrices, get_design_matrices(sm_model))
+
+        # Same data and formula, different family and link functions
+        poisson_model = get_exercise_model(PoissonFamily, LogLink)
+        poisson_model.assign_data(sm_model.get_data())
+        self.assertIs(design_matrices, get_design_matrices(poisson_model))
+        res = fit_statistical_model(poisson_model, design_matrices=design_matrices)
+        self.assertIsInstance(res.family, sm.families.Poisson)
+
+        # The data is only hashed once per Dataset
+        data = sm_model.get_data()
+        fingerprint = data.get_fingerprint()
+        with unittest.mock.patch("tisane.data.hash_dataframe") as hash_dataframe:
+            self.assertIs(design_matrices, get_design_matrices(sm_model))
+            self.assertEqual(data.get_fingerprint(), fingerprint)
+            hash_dataframe.assert_not_called()
+
+        # Editing the data builds new design matrices
+        data.get_data().loc[0, "age"] += 1
+        data.data_changed()
+        edited = get_design_matrices(sm_model)
+        self.assertIsNot(design_matrices, edited)
+        self.assertEqual(edited[1].loc[0, "age"], design_matrices[1].loc[0, "age"] + 1)
+
+        # So does replacing the data
+        data.set_data(data.get_data().assign(age=0))
+        self.assertTrue((get_design_matrices(sm_model)[1]["age"] == 0).all())
+
+    def test_design_matrices_cache_is_bounded(self):
+        data = Dataset(pd.DataFrame({"x": [1.0, 2.0]}))
+        for i in range(max_cached_design_matrices + 1):
+            data.add_design_matrices(("x ~ 1", i), i)
+            # Keep the first matrices in use, so they are not the least recently used
+            self.assertEqual(data.get_design_matrices(("x ~ 1", 0)), 0)
+        self.assertEqual(len(data.design_matrices), max_cached_design_matrices)
+        self.assertIsNone(data.get_design_matrices(("x ~ 1", 1)))
+
+    @unittest.skipIf(
+        importlib.util.find_spec("pymer4") is None, "pymer4 is not installed"
+    )
+    def test_fit_mixed_effects_model(self):
+        sm_model = get_group_exercise_model()
+        model = fit_statistical_model(sm_model)
+        self.assertEqual(list(model.coefs.index), ["(Intercept)", "motivation"])
+        self.assertIn("group", model.ranef_var.index)
+
+    def test_fit_without_data(self):
+        sm_model = get_exercise_model()
+        sm_model.dataset = None
+        with self.assertRaises(ValueError):
+            fit_statistical_model(sm_model)
+
+
+class RankFamilyLinkCandidatesTest(unittest.TestCase):
+    def get_candidates(self, sm_model):
+        dv = sm_model.dependent_variable
+        return {
+            GaussianFamily(dv): {IdentityLink(dv), LogLink(dv)},
+            # LogLogLink is not implemented in statsmodels, so it is skipped
+            PoissonFamily(dv): {LogLink(dv), LogLogLink(dv)},
+        }
+
+    def test_rank_in_process(self):
+        sm_model = get_exercise_model()
+        ranking = rank_family_link_candidates(
+            sm_model, self.get_candidates(sm_model), max_workers=1
+        )
+        self.assertEqual(len(ranking), 3)
+        self.assertTrue(ranking["error"].isna().all())
+        self.assertTrue(ranking["aic"].is_monotonic_increasing)
+        self.assertTrue((ranking["fit_time"] >= 0).all())
+
+        gaussian_identity = ranking[
+            (ranking["family"] == "GaussianFamily") & (ranking["link"] == "IdentityLink")
+        ]
+        self.assertAlmostEqual(
+            gaussian_identity["aic"].iloc[0], fit_statistical_model(sm_model).aic
+        )
+
+    def test_rank_on_process_pool(self):
+        sm_model = get_exercise_model()
+        candidates = self.get_candidates(sm_model)
+        serial = rank_family_link_candidates(
+            sm_model, candidates, sort_by="bic", max_workers=1
+        )
+        parallel = rank_family_link_candidates(
+            sm_model, candidates, sort_by="bic", max_workers=2
+        )
+        pd.testing.assert_frame_equal(
+            serial.drop(columns=["fit_time"]), parallel.drop(columns=["fit_time"])
+        )
+
+    def test_rank_with_random_effects(self):
+        sm_model = get_group_exercise_model()
+        candidates = self.get_candidates(sm_model)
+        with self.assertRaises(ValueError):
+            rank_family_link_candidates(sm_model, candidates, max_workers=1)
+
+        # Ranked using only the fixed effects
+        ranking = rank_family_link_candidates(
+            sm_model, candidates, max_workers=1, ignore_random_effects=True
+        )
+        fixed_model = get_group_exercise_model(random_effects=False)
+        expected = rank_family_link_candidates(
+            fixed_model, self.get_candidates(fixed_model), max_workers=1
+        )
+        pd.testing.assert_frame_equal(
+            ranking.drop(columns=["fit_time"]), expected.drop(columns=["fit_time"])
+        )
+
+    def test_rank_by_unknown_criterion(self):
+        sm_model = get_exercise_model()
+        with self.assertRaises(ValueError):
+            rank_family_link_candidates(
+                sm_model, self.get_candidates(sm_model), sort_by="r2"
+            )
+
+
+class GenerateNumpyPredictorTest(unittest.TestCase):
+    def load_predictor(self, code: str):
+        namespace = dict()
+        exec(compile(code, "predictor", "exec"), namespace)
+        return namespace
+
+    def test_predictor_matches_fitted_model(self):
+        sm_model = get_exercise_model(PoissonFamily, LogLink)
+        res = fit_statistical_model(sm_model)
+        code = generate_code(sm_model, target="NUMPY", results=res)
+        self.assertNotIn("statsmodels", code.replace("statistical model", ""))
+
+        predictor = self.load_predictor(code)
+        df = pd.read_csv(data_path)
+        np.testing.assert_allclose(predictor["predict"](df), res.fittedvalues)
+        np.testing.assert_allclose(
+            predictor["predict"](df, linear=True), res.predict(linear=True)
+        )
+
+    def test_predictor_encodes_categorical_levels(self):
+        group = ts.Unit("group")
+        treatment = group.nominal("treatment")
+        age = group.numeric("age")
+        outcome = group.numeric("outcome")
+        sm_model = StatisticalModel(
+            dependent_variable=outcome,
+            main_effects={treatment, age},
+            interaction_effects=set(),
+            random_effects=set(),
+            family_function=GaussianFamily(outcome),
+            link_function=IdentityLink(outcome),
+        )
+        df = pd.DataFrame(
+            {
+                "treatment": ["A", "B", "C", "A", "B", "C", "A", "B"],
+                "age": [20.0, 31.0, 42.0, 25.0, 38.0, 41.0, 29.0, 33.0],
+                "outcome": [1.0, 2.5, 3.0, 1.5, 2.0, 3.5, 1.2, 2.2],
+            }
+        )
+        sm_model.assign_data(df)
+        res = fit_statistical_model(sm_model)
+        predictor = self.load_predictor(generate_code(sm_model, target="NUMPY"))
+
+        _, exog = get_design_matrices(sm_model)
+        np.testing.assert_allclose(predictor["design_matrix"](df), exog.values)
+        np.testing.assert_allclose(predictor["predict"](df), res.fittedvalues)
+        with self.assertRaises(ValueError):
+            predictor["predict"]({"treatment": ["D"], "age": [30.0]})
+
+    def test_inverse_links_match_link_transforms(self):
+        probabilities = np.array([0.05, 0.2, 0.5, 0.7, 0.95])
+        for link_name, (link, inverse) in link_transforms.items():
+            source = generate_numpy_inverse_link_source(link_name)
+            self.assertNotIn("scipy", source, msg=link_name)
+            namespace = {"np": np, "math": math}
+            exec(source, namespace)
+            eta = link(probabilities)
+            np.testing.assert_allclose(
+                namespace["inverse_link"](eta), inverse(eta), err_msg=link_name
+            )
+
+    def test_unsupported_predictor(self):
+        with self.assertRaises(ValueError):
+            generate_numpy_inverse_link_source("UnknownLink")
+
+        # Variables that patsy evaluates as expressions rather than data columns
+        adult = ts.Unit("case")
+        age = adult.numeric("center(age)")
+        endurance = adult.numeric("endurance")
+        sm_model = StatisticalModel(
+            dependent_variable=endurance,
+            main_effects={age},
+            interaction_effects=set(),
+            random_effects=set(),
+            family_function=GaussianFamily(endurance),
+            link_function=IdentityLink(endurance),
+        ).assign_data(data_path)
+        with self.assertRaises(ValueError):
+            generate_code(sm_model, target="NUMPY")
@@ -21,6 +21,7 @@ import tisane as ts
 import pandas as pd
 from typing import Dict, Set
 import os
+import tempfile
 import unittest
 
 
@@ -92,6 +93,14 @@ def emulate_inference_and_construction_with_gui(design, gr, output_filename):
 
 
 class GenerateCodeTest(unittest.TestCase):
+    # Write generated scripts and data snapshots to a temporary directory, not the repository
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
     def test_construct_main_only(self):
         u0 = ts.Unit("Unit")
         m0 = u0.numeric("Measure_0")
@@ -129,7 +138,7 @@ class GenerateCodeTest(unittest.TestCase):
         reference_script_path = os.path.join(script_dir, output_filename)
         # generated_path = os.path.join(generated_script_dir, output_filename)
 
-        path = write_to_script(code, generated_script_dir, output_filename)
+        path = write_to_script(code, self.output_dir, output_filename)
         # Check that the generated script is the same as the target script
 
     def test_generate_code_from_GUI_output_pigs_with_no_data(self):
@@ -169,9 +178,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(code, "examples/Animal_Science/", "model_no_data.py")
+        path = write_to_script(code, self.output_dir, "model_no_data.py")
 
     def test_generate_code_from_GUI_output_pigs_with_data_frame(self):
         dir = os.path.dirname(__file__)
@@ -214,9 +223,13 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(code, "examples/Animal_Science/", "model_df.py")
+        path = write_to_script(code, self.output_dir, "model_df.py")
+        # The data snapshot is written next to the script
+        snapshots = os.listdir(os.path.join(self.output_dir, "tisane_data"))
+        self.assertEqual(len(snapshots), 1)
+        self.assertIn(snapshots[0], code)
 
     def test_generate_code_from_GUI_output_pigs_with_data_path(self):
         path = os.path.join("examples/Animal_Science/", "pigs.csv")
@@ -258,9 +271,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(code, "examples/Animal_Science/", "model_data_path.py")
+        path = write_to_script(code, self.output_dir, "model_data_path.py")
 
     def test_generate_code_from_GUI_output_exercise_simple_with_no_data(self):
         # # Load data
@@ -289,11 +302,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(
-            code, "examples/Exercise/tisane_generated_files/", "model_no_data.py"
-        )
+        path = write_to_script(code, self.output_dir, "model_no_data.py")
 
     def test_generate_code_from_GUI_output_exercise_simple_with_data_frame(self):
         # Load data
@@ -320,11 +331,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(
-            code, "examples/Exercise/tisane_generated_files/", "model_df.py"
-        )
+        path = write_to_script(code, self.output_dir, "model_df.py")
 
     def test_generate_code_from_GUI_output_exercise_simple_with_data_path(self):
         # Load data
@@ -351,11 +360,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(
-            code, "examples/Exercise/tisane_generated_files/", "model_data_path.py"
-        )
+        path = write_to_script(code, self.output_dir, "model_data_path.py")
 
     def test_generate_code_from_GUI_output_group_exercise_with_no_data(self):
         # Observed variables
@@ -389,11 +396,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(
-            code, "examples/Group_Exercise/tisane_generated_files/", "model_no_data.py"
-        )
+        path = write_to_script(code, self.output_dir, "model_no_data.py")
 
     def test_generate_code_from_GUI_output_group_exercise_with_data_frame(self):
         # Load data
@@ -433,11 +438,9 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(
-            code, "examples/Group_Exercise/tisane_generated_files/", "model_df.py"
-        )
+        path = write_to_script(code, self.output_dir, "model_df.py")
 
     def test_generate_code_from_GUI_output_group_exercise_with_data_path(self):
         path = os.path.join("examples/Group_Exercise/", "exercise_group.csv")
@@ -475,10 +478,6 @@ class GenerateCodeTest(unittest.TestCase):
         sm = emulate_inference_and_construction_with_gui(design, gr, output_filename)
 
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=self.output_dir)
         # Write generated code out
-        path = write_to_script(
-            code,
-            "examples/Group_Exercise/tisane_generated_files/",
-            "model_data_path.py",
-        )
+        path = write_to_script(code, self.output_dir, "model_data_path.py")
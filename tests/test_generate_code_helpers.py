@@ -13,17 +13,29 @@ from tisane.main import (
     infer_random_effects_with_explanations,
 )
 from tisane.code_generator import (
+    fit_statistical_model,
     generate_statsmodels_formula,
     generate_statsmodels_family,
     generate_statsmodels_link,
     generate_statsmodels_model,
     generate_pymer4_formula,
+    write_out_dataframe,
+    generate_data_column_types,
+    generate_code,
 )
+from tisane.data import Dataset
+from tisane.family import BinomialFamily, GaussianFamily, IdentityLink, LogitLink
+from tisane.random_effects import RandomIntercept
+from tisane.statistical_model import StatisticalModel
 import tisane as ts
+import numpy as np
 import pandas as pd
+from statsmodels.genmod.families import Binomial
+import statsmodels.formula.api as smf
 from typing import Dict, Set
 from pathlib import Path
 import os
+import tempfile
 import unittest
 
 test_data_repo_name = "output_json_files/"
@@ -37,7 +49,9 @@ model_template = """
     model = smf.glm(formula={formula}, data=df, family=sm.families.{family_name}(sm.families.links.{link_obj}))
     res = model.fit()
     print(res.summary())
-    return model
+    if cache_path is not None:
+        res.save(cache_path)
+    return res
 """
 
 
@@ -629,3 +643,145 @@ class GenerateCodeHelpersTest(unittest.TestCase):
 
     # def test_generate_pymer4_code(self):
     #     pass
+
+
+class WriteOutDataframeTest(unittest.TestCase):
+    def test_snapshot_is_content_addressed(self):
+        df = pd.DataFrame({"x": [1, 2, 3], "y": [0.5, 1.5, 2.5]})
+        with tempfile.TemporaryDirectory() as tmp:
+            data = Dataset(df)
+            path = write_out_dataframe(data, destinationDir=tmp)
+            self.assertTrue(os.path.exists(path))
+            self.assertTrue(path.endswith(".csv"))
+            # Named by the Dataset's fingerprint
+            self.assertIn(data.get_fingerprint()[:16], os.path.basename(path))
+            # Same data: same snapshot, not rewritten
+            mtime = os.path.getmtime(path)
+            same_path = write_out_dataframe(Dataset(df.copy()), destinationDir=tmp)
+            self.assertEqual(path, same_path)
+            self.assertEqual(mtime, os.path.getmtime(same_path))
+            # Different data: different snapshot
+            other_path = write_out_dataframe(
+                Dataset(df.assign(y=[0.5, 1.5, 3.5])), destinationDir=tmp
+            )
+            self.assertNotEqual(path, other_path)
+            # Index is not written out, so it does not change the snapshot
+            pd.testing.assert_frame_equal(pd.read_csv(path), df)
+            reindexed_path = write_out_dataframe(
+                Dataset(df.set_axis([10, 20, 30])), destinationDir=tmp
+            )
+            self.assertEqual(path, reindexed_path)
+
+    def test_unsupported_format(self):
+        df = pd.DataFrame({"x": [1, 2, 3]})
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(ValueError):
+                write_out_dataframe(Dataset(df), format="xlsx", destinationDir=tmp)
+
+
+class GenerateLoadDataCodeTest(unittest.TestCase):
+    def get_pigs_model(self):
+        week = ts.SetUp("Time", cardinality=12)
+        pig = ts.Unit("Pig", cardinality=72)
+        litter = ts.Unit("Litter", cardinality=21)
+        weight = pig.numeric("Weight", number_of_instances=week)
+        return StatisticalModel(
+            dependent_variable=weight,
+            main_effects={week},
+            interaction_effects=set(),
+            random_effects={RandomIntercept(groups=pig), RandomIntercept(groups=week)},
+            family_function=GaussianFamily(weight),
+            link_function=IdentityLink(weight),
+        )
+
+    def test_generate_data_column_types(self):
+        sm = self.get_pigs_model()
+        column_types = generate_data_column_types(statistical_model=sm)
+        # Only grouping factors are categorical, and only if they are not also fixed effects
+        self.assertEqual(
+            column_types, {"Pig": "category", "Time": None, "Weight": "float64"}
+        )
+
+    def test_generate_code_projects_columns(self):
+        sm = self.get_pigs_model()
+        path = os.path.join(dir, "..", "examples", "Animal_Science", "pigs.csv")
+        sm.assign_data(path)
+        code = generate_code(sm)
+        self.assertIn(
+            f"df = pd.read_csv('{path}', usecols=['Pig', 'Time', 'Weight'], dtype={{'Pig': 'category', 'Weight': 'float64'}})",
+            code,
+        )
+        df = pd.read_csv(
+            path,
+            usecols=["Pig", "Time", "Weight"],
+            dtype={"Pig": "category", "Weight": "float64"},
+        )
+        self.assertEqual(set(df.columns), {"Pig", "Time", "Weight"})
+        self.assertEqual(df["Pig"].dtype, "category")
+
+    def test_binary_dv_is_not_categorical(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=200)
+        y = rng.binomial(n=1, p=1 / (1 + np.exp(-(0.25 + x))))
+        df = pd.DataFrame({"X": x, "Y": y})
+
+        unit = ts.Unit("Unit")
+        iv = unit.numeric("X")
+        dv = unit.nominal("Y", cardinality=2)
+        binomial_model = StatisticalModel(
+            dependent_variable=dv,
+            main_effects={iv},
+            interaction_effects=set(),
+            random_effects=set(),
+            family_function=BinomialFamily(dv),
+            link_function=LogitLink(dv),
+        )
+        column_types = generate_data_column_types(statistical_model=binomial_model)
+        self.assertEqual(column_types, {"X": "float64", "Y": None})
+
+        # Loading the data as the generated code does fits the same model as the raw data
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "binary.csv")
+            df.to_csv(path, index=False)
+            dtypes = {name: t for name, t in column_types.items() if t is not None}
+            loaded = pd.read_csv(path, usecols=list(column_types.keys()), dtype=dtypes)
+        family = Binomial()
+        expected = smf.glm("Y ~ X", data=df, family=family).fit().params
+        params = smf.glm("Y ~ X", data=loaded, family=family).fit().params
+        self.assertEqual(list(params.index), ["Intercept", "X"])
+        self.assertTrue((np.sign(params) == np.sign(expected)).all())
+        self.assertTrue(np.allclose(params, expected))
+
+    def test_generated_code_fits_same_coefficients(self):
+        rng = np.random.default_rng(0)
+        group = rng.integers(1, 4, size=100)
+        df = pd.DataFrame({"Group": group, "Y": 2.0 * group + rng.normal(size=100)})
+
+        unit = ts.Unit("Unit")
+        iv = unit.nominal("Group", cardinality=3)
+        dv = unit.numeric("Y")
+        model = StatisticalModel(
+            dependent_variable=dv,
+            main_effects={iv},
+            interaction_effects=set(),
+            random_effects=set(),
+            family_function=GaussianFamily(dv),
+            link_function=IdentityLink(dv),
+        )
+        model.assign_data(df)
+        # A numerically coded nominal variable is not loaded as categorical
+        self.assertEqual(
+            generate_data_column_types(statistical_model=model),
+            {"Group": None, "Y": "float64"},
+        )
+
+        expected = fit_statistical_model(statistical_model=model).params
+        with tempfile.TemporaryDirectory() as tmp:
+            code = generate_code(model, output_dir=tmp)
+            # Only the diagnostics plot uses matplotlib, and they are not run here
+            code = code.replace("import matplotlib.pyplot as plt", "")
+            namespace = dict()
+            exec(code, namespace)
+            params = namespace["fit_model"]().params
+        self.assertEqual(list(params.index), list(expected.index))
+        self.assertTrue(np.allclose(params, expected))
@@ -108,3 +108,57 @@ class GraphVisTest(unittest.TestCase):
         # dot = gr._get_dot_graph()
         # for f in dot_formats:
         #     dot.write("dot_example_{}".format(f), format=f)
+
+    def test_collapsed_measures_are_drawn_with_their_unit(self):
+        student = ts.Unit("student id")
+        school = ts.Unit("school id")
+        test_score = student.numeric("test score")
+        tutoring = student.nominal("tutoring")
+        funding = school.numeric("funding")
+
+        tutoring.causes(test_score)
+        funding.causes(test_score)
+        student.nests_within(school)
+
+        design = ts.Design(dv=test_score, ivs=[tutoring, funding])
+        gr = design.graph
+
+        full = gr._get_dot_graph(dv=test_score)
+        self.assertEqual(
+            {n.get_name().strip('"') for n in full.get_nodes()},
+            {"student id", "school id", "test score", "tutoring", "funding"},
+        )
+
+        collapsed = gr._get_dot_graph(dv=test_score, collapsed=True)
+        nodes = {n.get_name().strip('"'): n for n in collapsed.get_nodes()}
+        self.assertEqual(set(nodes), {"student id", "school id", "test score"})
+        self.assertEqual(nodes["student id"].get_label(), "student id (1 measure)")
+        self.assertEqual(nodes["test score"].get_fillcolor(), "#AAAAAA")
+        edges = {
+            (e.get_source().strip('"'), e.get_destination().strip('"'), e.get_label())
+            for e in collapsed.get_edges()
+        }
+        self.assertIn(("student id", "test score", "cause"), edges)
+        self.assertIn(("school id", "test score", "cause"), edges)
+        # Edges between a unit and its own measures are not drawn
+        self.assertNotIn("student id", {e[1] for e in edges})
+
+    def test_collapsed_causal_chain(self):
+        person = ts.Unit("person")
+        measures = [person.numeric("m_{}".format(i)) for i in range(6)]
+        gr = graph.Graph()
+        for (cause, effect) in zip(measures, measures[1:]):
+            gr.causes(cause, effect, None)
+            pass
+
+        collapsed = gr._get_dot_graph(dv=measures[-1], collapsed=True)
+        nodes = {n.get_name().strip('"'): n for n in collapsed.get_nodes()}
+        self.assertEqual(set(nodes), {"m_0", "m_1 to m_4", "m_5"})
+        self.assertEqual(nodes["m_1 to m_4"].get_label(), "m_1 ... m_4 (4 variables)")
+        self.assertEqual(len(collapsed.get_edges()), 2)
+
+        # Names are sanitized for LaTeX, and styled by the variable they belong to
+        tikz = gr._get_tikz_graph(dv=measures[-1])
+        self.assertIn("m 4 -> [causes] m 5[measure,depvar];", tikz)
+        tikz = gr._get_tikz_graph(dv=measures[-1], collapsed=True)
+        self.assertIn("m 1 to m 4[measure,as={m 1 ... m 4 (4 variables)}]", tikz)
@@ -0,0 +1,105 @@
+"""
+Tests for caching rendered graph visualizations
+"""
+from tisane.graph import Graph
+from tisane.graph_vis_cache import RenderCache, render_cache_key
+import tisane as ts
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def get_design():
+    student = ts.Unit("student")
+    test_score = student.numeric("test score")
+    tutoring = student.nominal("tutoring")
+    tutoring.causes(test_score)
+    return ts.Design(dv=test_score, ivs=[tutoring]), test_score
+
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = RenderCache(os.path.join(self.directory, "cache"), max_size=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name: str, size: int) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write("x" * size)
+            pass
+        return path
+
+    def test_fingerprint_ignores_insertion_order(self):
+        a = ts.Unit("a").numeric("x")
+        b = ts.Unit("b").numeric("y")
+        c = ts.Unit("c").numeric("z")
+        gr0 = Graph()
+        gr0.causes(a, b, None)
+        gr0.causes(b, c, None)
+        gr1 = Graph()
+        gr1.causes(b, c, None)
+        gr1.causes(a, b, None)
+        self.assertEqual(gr0.get_render_fingerprint(), gr1.get_render_fingerprint())
+
+        # What is drawn changes the fingerprint
+        self.assertNotEqual(
+            gr0.get_render_fingerprint(), gr0.get_render_fingerprint(dv=c)
+        )
+        self.assertNotEqual(
+            gr0.get_render_fingerprint(),
+            gr0.get_render_fingerprint(edge_filter=lambda e: False),
+        )
+        gr1.associates(a, c, None)
+        self.assertNotEqual(gr0.get_render_fingerprint(), gr1.get_render_fingerprint())
+
+    def test_key_depends_on_options(self):
+        key = render_cache_key("f", "png", {"default": "solid"})
+        self.assertEqual(key, render_cache_key("f", "png", {"default": "solid"}))
+        self.assertNotEqual(key, render_cache_key("f", "svg", {"default": "solid"}))
+        self.assertNotEqual(key, render_cache_key("f", "png", {"default": "dashed"}))
+
+    def test_cached_tikz_graph_is_copied(self):
+        self.cache = RenderCache(os.path.join(self.directory, "cache"))
+        design, dv = get_design()
+        path = os.path.join(self.directory, "graph.tex")
+        design.graph.get_tikz_graph(path, dv=dv, cache=self.cache)
+        with open(path, "r") as f:
+            rendered = f.read()
+        self.assertEqual(len(self.cache.get_entries()), 1)
+
+        # A cached render is copied rather than rendered again
+        (_, _, cached) = self.cache.get_entries()[0]
+        with open(cached, "w") as f:
+            f.write("cached")
+            pass
+        design.graph.get_tikz_graph(path, dv=dv, cache=self.cache)
+        with open(path, "r") as f:
+            self.assertEqual(f.read(), "cached")
+
+        # A different drawing of the graph is not
+        design.graph.get_tikz_graph(path, cache=self.cache)
+        with open(path, "r") as f:
+            self.assertNotEqual(f.read(), "cached")
+        self.assertEqual(len(self.cache.get_entries()), 2)
+        self.assertNotEqual(rendered, "")
+
+    def test_least_recently_used_renders_are_evicted(self):
+        self.cache.store("a", self.write("a", 40))
+        self.cache.store("b", self.write("b", 40))
+        # Make "a" the most recently used
+        os.utime(self.cache.get_path("b"), (0, 0))
+        self.assertTrue(self.cache.copy_to("a", os.path.join(self.directory, "out")))
+        self.cache.store("c", self.write("c", 40))
+
+        self.assertFalse(os.path.exists(self.cache.get_path("b")))
+        self.assertTrue(os.path.exists(self.cache.get_path("a")))
+        self.assertTrue(os.path.exists(self.cache.get_path("c")))
+        self.assertLessEqual(self.cache.get_size(), 100)
+        self.assertFalse(self.cache.copy_to("b", os.path.join(self.directory, "out")))
+
+        self.cache.clear()
+        self.assertEqual(self.cache.get_entries(), [])
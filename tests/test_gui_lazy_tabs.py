@@ -0,0 +1,94 @@
+"""
+Tests that the GUI builds the bodies of its tabs when they are first opened
+"""
+from tisane.gui.gui import TisaneGUI
+from tisane.gui.benchmark import createSyntheticInput
+from concurrent.futures import Future
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class GUILazyTabsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        inputPath = os.path.join(self.directory, "input.json")
+        with open(inputPath, "w") as f:
+            f.write(json.dumps(createSyntheticInput(5)))
+
+        self.gui = TisaneGUI()
+        self.app = self.gui.create_app(inputPath)
+        self.client = self.app.server.test_client()
+        self.renderCallback = next(
+            key
+            for key in self.app.callback_map
+            if "unrendered-tabs-store.data" in key and "-body.children" in key
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def renderTab(self, tabId: str, unrenderedTabs: list):
+        response = self.client.post(
+            "/_dash-update-component",
+            data=json.dumps(
+                {
+                    "output": self.renderCallback,
+                    "outputs": [
+                        {"id": "{}-body".format(tab), "property": "children"}
+                        for tab in self.gui.components.getLazyTabs()
+                    ]
+                    + [{"id": "unrendered-tabs-store", "property": "data"}],
+                    "inputs": [
+                        {
+                            "id": "tab-to-render-store",
+                            "property": "data",
+                            "value": tabId,
+                        }
+                    ],
+                    "changedPropIds": ["tab-to-render-store.data"],
+                    "state": [
+                        {
+                            "id": "unrendered-tabs-store",
+                            "property": "data",
+                            "value": unrenderedTabs,
+                        }
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+        return response
+
+    def test_tab_body_is_built_when_opened(self):
+        lazyTabs = self.gui.components.getLazyTabs()
+        self.assertEqual(lazyTabs, ["tab-2", "tab-4"])
+        layout = self.client.get("/_dash-layout").data.decode()
+        self.assertNotIn("interaction-effect-checkbox", layout)
+        self.assertIn("main-effect-checkbox", layout)
+
+        response = self.renderTab("tab-2", lazyTabs)
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()["response"]
+        self.assertEqual(set(result.keys()), {"tab-2-body", "unrendered-tabs-store"})
+        self.assertIn("interaction-effect-checkbox", json.dumps(result["tab-2-body"]))
+        self.assertEqual(result["unrendered-tabs-store"]["data"], ["tab-4"])
+
+    def test_rendered_tab_is_not_sent_again(self):
+        response = self.renderTab("tab-2", ["tab-4"])
+        self.assertEqual(response.status_code, 204)
+
+    def test_tab_bodies_are_built_once(self):
+        comp = self.gui.components
+        self.assertIs(comp.buildLazyTabBody("tab-2"), comp.buildLazyTabBody("tab-2"))
+
+    def test_figures_are_computed_at_startup(self):
+        comp = self.gui.components
+        for family in comp.getGeneratedFamilyLinkFunctions():
+            self.assertIsInstance(comp.figures[family], Future)
+            pass
+        self.assertIs(
+            comp.createFigure("PoissonFamily"), comp.createFigure("PoissonFamily")
+        )
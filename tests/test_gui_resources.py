@@ -0,0 +1,51 @@
+"""
+Tests that the GUI's static resources are loaded once per process and shared read-only
+"""
+from tisane.gui.gui_components import GUIComponents
+from tisane.gui.gui_resources import freeze, getMarkdown
+from tisane.gui.benchmark import createSyntheticInput
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class GUIResourcesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.inputPath = os.path.join(self.directory, "input.json")
+        with open(self.inputPath, "w") as f:
+            f.write(json.dumps(createSyntheticInput(3)))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_resources_are_shared(self):
+        first = GUIComponents(self.inputPath, None)
+        second = GUIComponents(self.inputPath, None)
+        self.assertIs(first.strings, second.strings)
+        self.assertIs(first.defaultExplanations, second.defaultExplanations)
+        self.assertIs(first.familyLinkFunctions, second.familyLinkFunctions)
+        self.assertIn("overall-main-effects", first.defaultExplanations)
+
+    def test_resources_are_read_only(self):
+        comp = GUIComponents(self.inputPath, None)
+        with self.assertRaises(TypeError):
+            comp.defaultExplanations["overall-main-effects"] = ""
+        links = comp.getFamilyLinkFunctions()
+        family = next(iter(links))
+        with self.assertRaises(TypeError):
+            links[family]["links"][0] = "IdentityLink"
+        # Copies can still be changed
+        copied = links.copy()
+        copied.pop(family)
+        self.assertIn(family, links)
+
+    def test_freeze(self):
+        frozen = freeze({"a": [1, {"b": 2}]})
+        self.assertEqual(frozen["a"][1]["b"], 2)
+        self.assertIsInstance(frozen["a"], tuple)
+
+    def test_markdown_is_built_once(self):
+        self.assertIs(getMarkdown("**Note**"), getMarkdown("**Note**"))
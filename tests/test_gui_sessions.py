@@ -0,0 +1,191 @@
+"""
+Tests the GUI's server mode, where selections are kept per browser session
+"""
+from tisane.gui.gui import TisaneGUI
+from tisane.gui.benchmark import createSyntheticInput, createClickRequest
+from tisane.gui.sessions import (
+    SessionComponents,
+    SessionStore,
+    sessionCookieName,
+    _threadLocks,
+)
+import copy
+import json
+import os
+import pandas as pd
+import shutil
+import tempfile
+import unittest
+
+
+class GUISessionsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sessionsDirectory = os.path.join(self.directory, "sessions")
+        inputPath = os.path.join(self.directory, "input.json")
+        with open(inputPath, "w") as f:
+            f.write(json.dumps(createSyntheticInput(5)))
+
+        self.generatedIn = []
+        self.generatedSpecs = []
+
+        def generateCode(
+            destinationDir=None, modelSpecJson="model_spec.json", modelSpec=None
+        ):
+            self.generatedIn.append(destinationDir)
+            self.generatedSpecs.append(modelSpec)
+            return os.path.join(destinationDir, "model.py")
+
+        self.gui = TisaneGUI()
+        self.app = self.gui.create_app(
+            inputPath,
+            generateCode=generateCode,
+            sessionsDirectory=self.sessionsDirectory,
+        )
+        self.mainEffectsCallback = next(
+            key for key in self.app.callback_map if "added-main-effects.children" in key
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def openSession(self):
+        client = self.app.server.test_client()
+        response = client.get("/")
+        self.assertEqual(response.status_code, 200)
+        return client
+
+    def click(self, client, index: int, checked: bool = True):
+        comp = self.gui.components
+        body = createClickRequest(
+            comp,
+            self.mainEffectsCallback,
+            comp.getMainEffectCheckboxIds()[index],
+            checked,
+        )
+        response = client.post(
+            "/_dash-update-component",
+            data=json.dumps(body),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        store = response.get_json()["response"]["added-main-effects-store"]["data"]
+        return json.loads(store)
+
+    def test_sessions_do_not_share_selections(self):
+        first = self.openSession()
+        second = self.openSession()
+
+        self.assertEqual(self.click(first, 3)["main effects"], ["Measure_3"])
+        self.assertEqual(self.click(second, 1)["main effects"], ["Measure_1"])
+        self.assertEqual(
+            self.click(first, 4)["main effects"], ["Measure_3", "Measure_4"]
+        )
+        self.assertEqual(len(os.listdir(self.sessionsDirectory)), 2)
+        # The shared components are never changed by a session
+        self.assertEqual(self.gui.components.output["main effects"], [])
+
+    def test_reloading_resets_session(self):
+        client = self.openSession()
+        self.click(client, 2)
+        client.get("/")
+        self.assertEqual(self.click(client, 0)["main effects"], ["Measure_0"])
+
+    def test_code_is_generated_per_session(self):
+        client = self.openSession()
+        self.click(client, 2)
+        response = client.post(
+            "/_dash-update-component",
+            data=json.dumps(
+                {
+                    "output": "modal-data-store.data",
+                    "outputs": {"id": "modal-data-store", "property": "data"},
+                    "inputs": [
+                        {"id": "generate-code", "property": "n_clicks", "value": 1}
+                    ],
+                    "changedPropIds": ["generate-code.n_clicks"],
+                    "state": [],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        (sessionId,) = os.listdir(self.sessionsDirectory)
+        sessionDirectory = os.path.join(self.sessionsDirectory, sessionId)
+        self.assertEqual(self.generatedIn, [sessionDirectory])
+        with open(os.path.join(sessionDirectory, "model_spec.json"), "r") as f:
+            self.assertEqual(json.loads(f.read())["main effects"], ["Measure_2"])
+        # The code generator is also given the choices in memory
+        self.assertEqual(self.generatedSpecs[0]["main effects"], ["Measure_2"])
+
+    def test_input_can_be_given_in_memory(self):
+        app = TisaneGUI().create_app(
+            createSyntheticInput(5), sessionsDirectory=self.sessionsDirectory
+        )
+        response = app.server.test_client().get("/_dash-layout")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Measure_4", response.data.decode())
+
+    def test_input_given_in_memory_is_not_changed(self):
+        inputDict = createSyntheticInput(5)
+        inputDict["input"]["generated random effects"] = {
+            "Unit": {
+                "random intercept": {"groups": "Unit"},
+                "random slope": [{"iv": "Measure_0", "groups": "Unit"}],
+                "correlated": True,
+            }
+        }
+        inputDict["input"]["data"] = pd.DataFrame(
+            {"Dependent_variable": [1.0, 2.0, 4.0], "Measure_0": [0, 1, 2]}
+        )
+        expected = copy.deepcopy(inputDict)
+        app = TisaneGUI().create_app(inputDict, sessionsDirectory=self.sessionsDirectory)
+        response = app.server.test_client().get("/_dash-layout")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {k: v for k, v in inputDict["input"].items() if k != "data"},
+            {k: v for k, v in expected["input"].items() if k != "data"},
+        )
+        self.assertTrue(inputDict["input"]["data"].equals(expected["input"]["data"]))
+
+    def test_invalid_session_ids_are_replaced(self):
+        client = self.app.server.test_client()
+        client.set_cookie("localhost", sessionCookieName, "../../etc")
+        response = client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("..", os.listdir(self.sessionsDirectory))
+        self.assertEqual(len(os.listdir(self.sessionsDirectory)), 1)
+
+    def test_expired_sessions_are_removed(self):
+        store = SessionStore(self.sessionsDirectory, {"output": {}})
+        sessionId = store.newSessionId()
+        store.save(sessionId, {"output": {"family": "GaussianFamily"}})
+        self.assertEqual(store.load(sessionId)["output"]["family"], "GaussianFamily")
+        store.removeExpiredSessions(maxAge=-1)
+        self.assertFalse(os.path.exists(store.getSessionDirectory(sessionId)))
+        self.assertEqual(store.load(sessionId), {"output": {}})
+
+    def test_session_locks_are_dropped(self):
+        store = SessionStore(self.sessionsDirectory, {"output": {}})
+        sessionId = store.newSessionId()
+        handle = store.acquire(sessionId)
+        self.assertIn(sessionId, _threadLocks)
+        store.release(handle)
+        self.assertNotIn(sessionId, _threadLocks)
+
+        # Requests to other sessions do not leave locks behind either
+        client = self.openSession()
+        self.click(client, 0)
+        self.assertEqual(_threadLocks, {})
+
+    def test_unknown_attributes_cannot_be_set(self):
+        store = SessionStore(self.sessionsDirectory, {"output": {}})
+        comp = SessionComponents(self.gui.components, store)
+        with self.assertRaises(AttributeError):
+            comp.selectedFamily = "GaussianFamily"
+        self.assertFalse(hasattr(self.gui.components, "selectedFamily"))
+        comp.numGeneratedComponentIds += 1
+        self.assertEqual(
+            comp.numGeneratedComponentIds, self.gui.components.numGeneratedComponentIds
+        )
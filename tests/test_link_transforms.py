@@ -0,0 +1,129 @@
+"""
+Tests vectorized link functions and their inverses, and simulating data from family functions
+"""
+from tisane.family import (
+    AbstractLink,
+    CLogLogLink,
+    LogitLink,
+    OPowerLink,
+    PoissonFamily,
+    link_transforms,
+    get_link_transforms,
+    max_simulated_samples,
+    set_simulation_seed,
+    simulate_family_data,
+)
+from tisane.code_generator import statsmodels_link_name_to_objects
+from tisane.gui.family_link_function_callbacks import transform_data_from_fact
+import tisane as ts
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+probabilities = np.array([0.05, 0.2, 0.5, 0.7, 0.95])
+
+
+class LinkTransformsTest(unittest.TestCase):
+    def test_inverse_undoes_link(self):
+        for link_name, (link, inverse) in link_transforms.items():
+            np.testing.assert_allclose(
+                inverse(link(probabilities)), probabilities, err_msg=link_name
+            )
+
+    def test_matches_statsmodels(self):
+        for link_name, (link, inverse) in link_transforms.items():
+            if link_name not in statsmodels_link_name_to_objects:
+                continue
+            sm_link = statsmodels_link_name_to_objects[link_name]()
+            eta = sm_link(probabilities)
+            np.testing.assert_allclose(link(probabilities), eta, err_msg=link_name)
+            np.testing.assert_allclose(
+                inverse(eta), sm_link.inverse(eta), err_msg=link_name
+            )
+
+    def test_transform_in_place(self):
+        dv = ts.Unit("unit").numeric("dv")
+        data = probabilities.copy()
+        out = LogitLink(dv).transform_data(data, out=data)
+        self.assertIs(out, data)
+        LogitLink(dv).inverse_transform_data(data, out=data)
+        np.testing.assert_allclose(data, probabilities)
+
+    def test_every_link_has_transforms(self):
+        dv = ts.Unit("unit").numeric("dv")
+        subclasses = list(AbstractLink.__subclasses__())
+        while subclasses:
+            link_class = subclasses.pop()
+            subclasses.extend(link_class.__subclasses__())
+            self.assertIn(link_class.__name__, link_transforms)
+            link = link_class(dv)
+            np.testing.assert_allclose(
+                link.inverse_transform_data(link.transform_data(probabilities)),
+                probabilities,
+                err_msg=link_class.__name__,
+            )
+
+        # p / (1 - p) - 1
+        np.testing.assert_allclose(
+            OPowerLink(dv).transform_data(probabilities),
+            probabilities / (1 - probabilities) - 1,
+        )
+        with self.assertRaises(ValueError):
+            get_link_transforms("UnknownLink")
+
+    def test_transform_data_from_fact(self):
+        dv = ts.Unit("unit").numeric("dv")
+        np.testing.assert_allclose(
+            transform_data_from_fact(probabilities, "CLogLogLink"),
+            CLogLogLink(dv).transform_data(probabilities),
+        )
+
+
+class SimulateFamilyDataTest(unittest.TestCase):
+    def setUp(self):
+        set_simulation_seed(0)
+
+    def test_moment_matched(self):
+        for family_name in ["GaussianFamily", "GammaFamily", "InverseGaussianFamily"]:
+            data = simulate_family_data(family_name, mean=4.0, std=2.0, size=10000)
+            self.assertAlmostEqual(data.mean(), 4.0, delta=0.1, msg=family_name)
+            self.assertAlmostEqual(data.std(), 2.0, delta=0.2, msg=family_name)
+
+    def test_size_is_capped_and_cached(self):
+        dv = ts.Unit("unit").numeric("dv")
+        data = PoissonFamily(dv).simulate_data(mean=3.0, std=2.0, size=10 ** 8)
+        self.assertEqual(len(data), max_simulated_samples)
+        self.assertIs(data, simulate_family_data("PoissonFamily", 3.0, 2.0, 10 ** 8))
+
+    def test_seeded(self):
+        first = simulate_family_data("TweedieFamily", mean=2.0, std=3.0, size=100)
+        set_simulation_seed(0)
+        second = simulate_family_data("TweedieFamily", mean=2.0, std=3.0, size=100)
+        self.assertIsNot(first, second)
+        np.testing.assert_array_equal(first, second)
+
+    def test_independent_of_call_order(self):
+        first = simulate_family_data("GammaFamily", mean=2.0, std=1.0, size=100)
+        set_simulation_seed(0)
+        simulate_family_data("PoissonFamily", mean=3.0, std=1.0, size=50)
+        second = simulate_family_data("GammaFamily", mean=2.0, std=1.0, size=100)
+        np.testing.assert_array_equal(first, second)
+
+        # Simulations on a thread pool match simulating one at a time
+        means = [1.0, 2.0, 3.0, 4.0] * 4
+        set_simulation_seed(0)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            simulated = list(
+                pool.map(
+                    lambda mean: simulate_family_data("GaussianFamily", mean, 1.0),
+                    means,
+                )
+            )
+        set_simulation_seed(0)
+        for (mean, data) in zip(means, simulated):
+            expected = simulate_family_data("GaussianFamily", mean, 1.0)
+            np.testing.assert_array_equal(data, expected)
+
+    def test_unknown_family(self):
+        with self.assertRaises(ValueError):
+            simulate_family_data("UnknownFamily")
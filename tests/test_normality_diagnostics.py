@@ -0,0 +1,92 @@
+"""
+Tests normality diagnostics shown in the GUI
+"""
+from tisane.data import compute_moment_statistics
+from tisane.gui.benchmark import createSyntheticInput
+from tisane.gui.gui_components import GUIComponents
+from tisane.gui.normality_diagnostics import (
+    computeNormalityDiagnostics,
+    getNormalityDiagnostics,
+    isNormalityDiagnosticsPending,
+    maxCachedDiagnostics,
+    momentNormalityTest,
+    requestNormalityDiagnostics,
+    stratifiedSubsample,
+)
+import numpy as np
+import pandas as pd
+from scipy import stats
+import unittest
+
+
+class NormalityDiagnosticsTest(unittest.TestCase):
+    def test_moment_test_matches_scipy(self):
+        for values in [
+            np.random.default_rng(0).normal(size=50),
+            np.random.default_rng(1).gamma(2.0, 3.0, size=3001),
+        ]:
+            statistics = compute_moment_statistics(values, chunk_size=100)
+            self.assertAlmostEqual(
+                statistics.get_kurtosis(), stats.kurtosis(values, fisher=False)
+            )
+            statistic, pvalue = momentNormalityTest(statistics)
+            expected = stats.normaltest(values)
+            self.assertAlmostEqual(statistic, expected.statistic, places=6)
+            self.assertAlmostEqual(pvalue, expected.pvalue, places=6)
+
+    def test_stratified_subsample(self):
+        values = np.random.default_rng(0).gamma(2.0, 3.0, size=100000)
+        subsample = stratifiedSubsample(values, size=5000)
+        self.assertEqual(subsample.size, 5000)
+        np.testing.assert_array_equal(subsample, stratifiedSubsample(values, size=5000))
+        self.assertAlmostEqual(np.median(subsample), np.median(values), delta=0.1)
+
+    def test_diagnostics_cached_on_fingerprint(self):
+        values = np.random.default_rng(0).normal(size=20000)
+        fingerprint = requestNormalityDiagnostics(values)
+        results = getNormalityDiagnostics(fingerprint, wait=True)
+        self.assertEqual(results["n"], 20000)
+        self.assertEqual(results["subsample size"], 5000)
+        self.assertEqual(fingerprint, requestNormalityDiagnostics(values.copy()))
+        self.assertIs(results, getNormalityDiagnostics(fingerprint))
+
+    def test_small_data_is_not_subsampled(self):
+        values = np.random.default_rng(0).normal(size=100)
+        results = computeNormalityDiagnostics(values)
+        self.assertEqual(results["subsample size"], 100)
+        self.assertAlmostEqual(results["shapiro"][0], stats.shapiro(values)[0])
+
+    def test_cache_is_bounded(self):
+        fingerprints = list()
+        for i in range(maxCachedDiagnostics + 1):
+            values = np.arange(i, i + 10, dtype=float)
+            fingerprint = requestNormalityDiagnostics(values)
+            self.assertIsNotNone(getNormalityDiagnostics(fingerprint, wait=True))
+            fingerprints.append(fingerprint)
+        # The first diagnostics were the least recently used
+        self.assertIsNone(getNormalityDiagnostics(fingerprints[0]))
+        self.assertFalse(isNormalityDiagnosticsPending(fingerprints[0]))
+        self.assertIsNotNone(getNormalityDiagnostics(fingerprints[-1]))
+
+    def test_evicted_results_are_computed_again(self):
+        inputDict = createSyntheticInput(2)
+        inputDict["input"]["data"] = pd.DataFrame(
+            {"Dependent_variable": np.random.default_rng(0).normal(size=100)}
+        )
+        comp = GUIComponents(inputDict, generateCode=None)
+        comp.requestNormalityTests()
+        fingerprint = comp.normalityTestsFingerprint
+        expected = getNormalityDiagnostics(fingerprint, wait=True)
+        self.assertEqual(comp.getNormalityTestResults(), expected)
+
+        # Evict the results
+        for i in range(maxCachedDiagnostics):
+            values = np.arange(i, i + 10, dtype=float) + 0.5
+            getNormalityDiagnostics(requestNormalityDiagnostics(values), wait=True)
+        self.assertIsNone(getNormalityDiagnostics(fingerprint))
+
+        # Reading them back computes them again
+        self.assertIsNone(comp.getNormalityTestResults())
+        self.assertEqual(comp.normalityTestsFingerprint, fingerprint)
+        getNormalityDiagnostics(fingerprint, wait=True)
+        self.assertEqual(comp.getNormalityTestResults(), expected)
@@ -0,0 +1,106 @@
+"""
+Tests for the bitset reachability index over a Graph's causal and conceptual views
+"""
+from tisane.graph import Graph
+from tisane.graph_inference import find_common_ancestors
+from tisane.reachability import ReachabilityIndex
+import tisane as ts
+from tisane.variable import Associates, Causes
+
+import networkx as nx
+import random
+import unittest
+
+
+# @returns dict of each node in @param gr to the set of nodes it reaches by a path of at least one edge, so nodes on
+# cycles reach themselves
+def get_expected_descendants(gr: nx.DiGraph) -> dict:
+    tc = nx.transitive_closure(gr, reflexive=False)
+    return {n: set(tc.successors(n)) for n in gr.nodes()}
+
+
+class ReachabilityIndexTest(unittest.TestCase):
+    def test_dag_and_incremental_agree_with_transitive_closure(self):
+        rng = random.Random(0)
+        for cyclic in [False, True]:
+            nodes = ["n{}".format(i) for i in range(30)]
+            edges = set()
+            while len(edges) < 60:
+                (i, j) = rng.sample(range(len(nodes)), 2)
+                if not cyclic and i > j:
+                    (i, j) = (j, i)
+                edges.add((nodes[i], nodes[j]))
+            edges = list(edges)
+            expected = get_expected_descendants(nx.DiGraph(edges))
+
+            built = ReachabilityIndex(edges=edges)
+            incremental = ReachabilityIndex()
+            for (start, end) in edges:
+                incremental.add_edge(start, end)
+                pass
+            for index in [built, incremental]:
+                for (n, descendants) in expected.items():
+                    self.assertEqual(index.get_descendants(n), descendants)
+                    for d in descendants:
+                        self.assertIn(n, index.get_ancestors(d))
+                        self.assertTrue(index.reaches(n, d))
+
+    def test_queries(self):
+        index = ReachabilityIndex(
+            edges=[("a", "x"), ("a", "y"), ("b", "y"), ("x", "dv")], nodes=["z"]
+        )
+        self.assertEqual(index.get_common_ancestors(["x", "y"]), {"a"})
+        self.assertEqual(index.get_reached("a", ["y", "dv", "b"]), {"y", "dv"})
+        self.assertFalse(index.reaches("dv", "a"))
+        self.assertFalse(index.reaches("a", "missing"))
+        self.assertEqual(index.get_ancestors("z"), set())
+
+    def test_graph_index_maintained(self):
+        u = ts.Unit("Unit")
+        m0 = u.numeric("Measure_0")
+        m1 = u.numeric("Measure_1")
+        m2 = u.numeric("Measure_2")
+        dv = u.numeric("DV")
+
+        gr = Graph()
+        gr.add_relationship(Causes(m0, m1))
+        self.assertFalse(gr.reaches(m0, dv))
+
+        # Built indexes are updated as edges are added
+        index = gr.get_reachability_index("causal")
+        gr.add_relationship(Causes(m1, dv))
+        self.assertIs(gr.get_reachability_index("causal"), index)
+        self.assertTrue(gr.reaches(m0, dv))
+
+        gr.add_relationship(Associates(m2, m0))
+        self.assertFalse(gr.reaches(m2, dv))
+        self.assertTrue(gr.reaches(m2, dv, view="conceptual"))
+        self.assertFalse(gr.reaches(dv, m2, view="conceptual"))
+
+        # Subgraphs have their own indexes
+        causal_sub = gr.get_causal_subgraph()
+        self.assertFalse(causal_sub.reaches(m2, m0, view="conceptual"))
+        self.assertTrue(gr.reaches(m2, m0, view="conceptual"))
+
+        with self.assertRaises(ValueError):
+            gr.get_reachability_index("nests")
+
+    def test_common_ancestors_ignore_edges_between_ivs(self):
+        u = ts.Unit("Unit")
+        a = u.numeric("A")
+        x = u.numeric("X")
+        y = u.numeric("Y")
+
+        gr = Graph()
+        gr.add_relationship(Causes(a, x))
+        gr.add_relationship(Causes(x, y))
+
+        # A only reaches Y through X
+        (common, children) = find_common_ancestors(variables=[x, y], gr=gr)
+        self.assertEqual(common, set())
+        (common, children) = find_common_ancestors(variables=[a, y], gr=gr)
+        self.assertEqual(common, set())
+        gr.add_relationship(Causes(a, y))
+        (common, children) = find_common_ancestors(variables=[x, y], gr=gr)
+        self.assertEqual(common, {"A"})
+        self.assertEqual(children, {"A": ["X", "Y"]})
@@ -677,6 +677,92 @@ class VariableTest(unittest.TestCase):
         self.assertTrue(per_obj.cardinality)
         self.assertFalse(per_obj.number_of_instances)
 
+    def test_variables_and_relationships_have_no_dict(self):
+        unit = ts.Unit("Unit", cardinality=10)
+        setup = ts.SetUp("Week", cardinality=4)
+        nominal = unit.nominal("Nominal_variable", cardinality=3)
+        ordinal = unit.ordinal("Ordinal_variable", order=[1, 2, 3])
+        numeric = unit.numeric("Numeric_variable", number_of_instances=setup)
+        nominal.causes(numeric)
+        ordinal.associates_with(numeric)
+        ordinal.moderates(nominal, on=numeric)
+
+        for obj in [unit, setup, nominal, ordinal, numeric] + numeric.relationships:
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj))
+        self.assertFalse(hasattr(Exactly(2).per(cardinality=unit), "__dict__"))
+        with self.assertRaises(AttributeError):
+            numeric.not_an_attribute = True
+
+    def test_small_number_values_are_interned(self):
+        import copy
+        import pickle
+
+        self.assertIs(Exactly(1), Exactly(1))
+        self.assertIs(AtMost(20), AtMost(20))
+        self.assertIsNot(Exactly(3), AtMost(3))
+        self.assertIsNot(Exactly(10 ** 6), Exactly(10 ** 6))
+        self.assertEqual(Exactly(10 ** 6).get_value(), 10 ** 6)
+        self.assertIs(copy.deepcopy(Exactly(2)), Exactly(2))
+        self.assertIs(pickle.loads(pickle.dumps(AtMost(5))), AtMost(5))
+
+        unit = ts.Unit("Unit")
+        first = unit.numeric("First")
+        second = unit.numeric("Second")
+        self.assertIs(first.get_number_of_instances(), second.get_number_of_instances())
+        self.assertEqual(first.get_number_of_instances().get_value(), 1)
+
+    def test_get_relationships_by_type(self):
+        student = ts.Unit("student")
+        school = ts.Unit("school")
+        score = student.numeric("score")
+        tutoring = student.nominal("tutoring", cardinality=2)
+        student.nests_within(school)
+        tutoring.causes(score)
+        tutoring.associates_with(score)
+
+        self.assertEqual(
+            [r.measure for r in student.get_relationships(Has)], [score, tutoring]
+        )
+        self.assertEqual(len(student.get_relationships(Nests)), 1)
+        self.assertEqual(student.get_relationships(Causes), [])
+        self.assertEqual(len(score.get_relationships(Causes)), 1)
+        self.assertEqual(len(score.get_relationships(Associates)), 1)
+        self.assertIs(score.get_unit(), student)
+
+        # Relationships added after the index is built are found too
+        math = student.numeric("math")
+        self.assertEqual(len(student.get_relationships(Has)), 3)
+        self.assertIs(student.get_relationships(Has)[-1].measure, math)
+
+    def test_relationships_are_deduplicated_by_identity(self):
+        student = ts.Unit("student")
+        race = student.nominal("race", cardinality=3)
+        score = student.numeric("score")
+        race.moderates(moderator=[race], on=score)
+        self.assertEqual(len(race.get_relationships(Moderates)), 1)
+        self.assertEqual(len(race.relationships), 2)
+
+        relat = race.relationships[-1]
+        race.add_relationship(relat)
+        self.assertEqual(len(race.relationships), 2)
+
+        # Variables with many relationships
+        dv = student.numeric("dv")
+        causes = [student.numeric("iv_{}".format(i)) for i in range(50)]
+        for c in causes:
+            c.causes(dv)
+            dv.add_relationship(c.relationships[-1])
+            pass
+        self.assertEqual(len(dv.relationships), 51)
+        self.assertEqual([r.cause for r in dv.get_relationships(Causes)], causes)
+
+        import copy
+
+        dv_copy = copy.deepcopy(dv)
+        self.assertEqual(len(dv_copy.get_relationships(Causes)), 50)
+        dv_copy.add_relationship(dv_copy.relationships[-1])
+        self.assertEqual(len(dv_copy.relationships), 51)
+
     # def test_has_variables(self):
     #     # Main question: How do we specify "time" variables that are necessary for expressing repeated measures and inferring random effects
 
@@ -12,3 +12,5 @@ from tisane.statistical_model import (
 from tisane.design import (
     Design,
 )
+
+from tisane.graph_vis_cache import RenderCache
@@ -0,0 +1,94 @@
+"""
+Benchmark for the memory used by the variables and relationships of large designs.
+
+Generates synthetic designs with 1k, 10k and 100k variables: units, each with nominal, ordinal and numeric measures, where each measure is associated with the next one and causes the dependent variable of its unit.
+Memory is measured with tracemalloc, so it includes the relationship objects and the lists that hold them.
+
+Run with: python -m tisane.benchmark [--sizes 1000 10000 100000] [--measures-per-unit 99]
+"""
+from tisane.variable import Unit
+import argparse
+import gc
+import time
+import tracemalloc
+
+default_sizes = [1000, 10000, 100000]
+default_measures_per_unit = 99
+
+
+# @returns list of the variables of a synthetic design with @param num_variables variables
+def create_synthetic_variables(
+    num_variables: int, measures_per_unit: int = default_measures_per_unit
+) -> list:
+    variables = list()
+    num_units = max(1, num_variables // (measures_per_unit + 1))
+    for u in range(num_units):
+        unit = Unit("unit_{}".format(u), cardinality=100)
+        variables.append(unit)
+        dv = unit.numeric("dv_{}".format(u))
+        variables.append(dv)
+        previous = None
+        for i in range(measures_per_unit - 1):
+            name = "measure_{}_{}".format(u, i)
+            if i % 3 == 0:
+                measure = unit.nominal(name, cardinality=4)
+            elif i % 3 == 1:
+                measure = unit.ordinal(name, order=[1, 2, 3, 4, 5])
+            else:
+                measure = unit.numeric(name)
+            measure.causes(dv)
+            if previous is not None:
+                previous.associates_with(measure)
+                pass
+            previous = measure
+            variables.append(measure)
+            pass
+        pass
+    return variables
+
+
+# @returns dict of measurements for a synthetic design with @param num_variables variables: time in milliseconds, memory in bytes
+def benchmark_variables(
+    num_variables: int, measures_per_unit: int = default_measures_per_unit
+) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    variables = create_synthetic_variables(num_variables, measures_per_unit)
+    build_time = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Each relationship is in the lists of all the variables it relates
+    relationships = {id(r) for v in variables for r in v.relationships}
+    return {
+        "variables": len(variables),
+        "relationships": len(relationships),
+        "build (ms)": 1000 * build_time,
+        "memory": memory,
+        "bytes per variable": memory / len(variables),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes)
+    parser.add_argument(
+        "--measures-per-unit", type=int, default=default_measures_per_unit
+    )
+    args = parser.parse_args()
+
+    rows = [benchmark_variables(n, args.measures_per_unit) for n in args.sizes]
+    columns = list(rows[0].keys())
+    print("  ".join("{:>18}".format(c) for c in columns))
+    for row in rows:
+        print(
+            "  ".join(
+                "{:>18.1f}".format(v) if isinstance(v, float) else "{:>18}".format(v)
+                for v in row.values()
+            )
+        )
+        pass
+
+
+if __name__ == "__main__":
+    main()
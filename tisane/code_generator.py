@@ -10,11 +10,14 @@ from tisane.random_effects import (
 )
 
 import os
-from typing import List, Any, Tuple
+import itertools
+import tempfile
+from typing import Dict, List, Any, Tuple
 import typing
 import pandas as pd
 import statsmodels.api as sm
 import statsmodels.formula.api as smf
+from patsy import dmatrices
 
 
 ### GLOBALs
@@ -29,6 +32,7 @@ import matplotlib.pyplot as plt # for visualizing residual plots to diagnose mod
 statsmodels_preamble = """
 # Tisane inferred the following statistical model based on this query:  {}
 
+import os
 import pandas as pd
 import statsmodels.api as sm
 import statsmodels.formula.api as smf
@@ -39,6 +43,13 @@ model_function_wrapper = """
 def fit_model(): 
 """
 
+# Fitted results are optionally cached on disk so that repeated diagnostics runs do not refit the model
+statsmodels_model_function_wrapper = """ 
+def fit_model(cache_path=None): 
+    if cache_path is not None and os.path.exists(cache_path):
+        return sm.load(cache_path)
+"""
+
 model_diagnostics_function_wrapper = """
 # What should you look for in the plot? 
 # If there is systematic bias in how residuals are distributed, you may want to try a new link or family function. You may also want to reconsider your conceptual and statistical models. 
@@ -46,21 +57,36 @@ model_diagnostics_function_wrapper = """
 def show_model_diagnostics(model): 
 """
 
+statsmodels_model_diagnostics_function_wrapper = """
+# What should you look for in the plot? 
+# If there is systematic bias in how residuals are distributed, you may want to try a new link or family function. You may also want to reconsider your conceptual and statistical models. 
+# Read more here: https://sscc.wisc.edu/sscc/pubs/RegressionDiagnostics.html
+def show_model_diagnostics(res): 
+"""
+
 main_function = """
 if __name__ == "__main__":
     model = fit_model()
     show_model_diagnostics(model)
 """
 
+statsmodels_main_function = """
+if __name__ == "__main__":
+    # Set to a file path (e.g., 'model_results.pickle') to save the fitted results and reuse them in later runs
+    results_cache_path = None
+    res = fit_model(cache_path=results_cache_path)
+    show_model_diagnostics(res)
+"""
+
 load_data_from_csv_template = """
-    df = pd.read_csv('{path}')
+    df = {loader}('{path}'{load_options}){post_load}
 """
 
 load_data_from_dataframe_template = """
-    # Dataframe is stored in local file: data.csv
+    # Dataframe is stored in local file: {filename}
     # You may want to replace the data path with an existing data file you already have.
     # You may also set df equal to a pandas dataframe you are already working with. 
-    df = pd.read_csv('{path}') # Make sure that the data path is correct
+    df = {loader}('{path}'{load_options}) # Make sure that the data path is correct{post_load}
 """
 
 load_data_no_data_source = """
@@ -71,6 +97,12 @@ load_data_no_data_source = """
     # df = <your pandas Dataframe>
 """
 
+# Only load the columns the model uses and tell pandas their types up front
+load_data_csv_options = ", usecols={columns}, dtype={dtypes}"
+load_data_columnar_options = ", columns={columns}"
+load_data_post_load = """
+    df = df.astype({dtypes})"""
+
 pymer4_model_template = """
     model = Lmer(formula={formula}, family=\"{family_name}\", data=df)
     print(model.fit())
@@ -81,7 +113,9 @@ statsmodels_model_template = """
     model = smf.glm(formula={formula}, data=df, family=sm.families.{family_name}(sm.families.links.{link_obj}))
     res = model.fit()
     print(res.summary())
-    return model
+    if cache_path is not None:
+        res.save(cache_path)
+    return res
 """
 
 pymer4_model_diagnostics = """
@@ -94,7 +128,6 @@ pymer4_model_diagnostics = """
 """
 
 statsmodels_model_diagnostics = """
-    res = model.fit()
     plt.clf()
     plt.grid(True)
     plt.axhline(y=0, color='r', linestyle='-')
@@ -118,14 +151,14 @@ pymer4_code_templates = {
 
 statsmodels_code_templates = {
     "preamble": statsmodels_preamble,
-    "model_function_wrapper": model_function_wrapper,
+    "model_function_wrapper": statsmodels_model_function_wrapper,
     "load_data_from_csv_template": load_data_from_csv_template,
     "load_data_from_dataframe_template": load_data_from_dataframe_template,
     "load_data_no_data_source": load_data_no_data_source,
     "model_template": statsmodels_model_template,
-    "model_diagnostics_function_wrapper": model_diagnostics_function_wrapper,
+    "model_diagnostics_function_wrapper": statsmodels_model_diagnostics_function_wrapper,
     "model_diagnostics": statsmodels_model_diagnostics,
-    "main_function": main_function,
+    "main_function": statsmodels_main_function,
 }
 
 # Reference from:
@@ -173,62 +206,395 @@ statsmodels_link_name_to_functions = {
     # "LogLogLink": "",
 }
 
+# Directory (relative to the directory the generated code is written to) that holds data snapshots
+data_snapshot_directory = "tisane_data"
+
+# Formats a DataFrame snapshot can be written in: file extension, pandas loader used in generated code
+# Parquet and Feather are columnar binary formats that load much faster than csv but require pyarrow
+data_snapshot_formats = {
+    "csv": ("csv", "pd.read_csv"),
+    "parquet": ("parquet", "pd.read_parquet"),
+    "feather": ("feather", "pd.read_feather"),
+}
+
+# Types to load data columns as, based on the kind of variable the column represents
+# Variables that are not listed (e.g., Nominal, Ordinal, SetUp) are left for pandas to infer, so the generated code
+# builds the same design matrix as fitting in process (see get_design_matrices), e.g., a numerically coded nominal
+# variable stays a single numeric column
+variable_type_to_dtypes = {
+    "Numeric": "float64",
+}
+
+# Link objects used when fitting models in process (see fit_statistical_model)
+statsmodels_link_name_to_objects = {
+    "IdentityLink": lambda: sm.families.links.identity(),
+    "InverseLink": lambda: sm.families.links.inverse_power(),
+    "InverseSquaredLink": lambda: sm.families.links.inverse_squared(),
+    "LogLink": lambda: sm.families.links.log(),
+    "LogitLink": lambda: sm.families.links.logit(),
+    "ProbitLink": lambda: sm.families.links.probit(),
+    "CauchyLink": lambda: sm.families.links.cauchy(),
+    "CLogLogLink": lambda: sm.families.links.cloglog(),
+    "PowerLink": lambda: sm.families.links.Power(),
+    "SquarerootLink": lambda: sm.families.links.Power(power=0.5),
+    "NegativeBinomialLink": lambda: sm.families.links.NegativeBinomial(),
+}
+
+### Templates for NumPy-only predictor modules (see generate_numpy_predictor_code)
+numpy_predictor_template = """
+# Tisane exported this predictor for the statistical model: {formula}
+# It only depends on NumPy. Call predict(rows) with a dict of column name to values (or a pandas DataFrame).
+
+import math
+import numpy as np
+
+FORMULA = {formula_repr}
+COLUMNS = {columns}
+COEFFICIENTS = np.array({coefficients})
+
+# Levels and contrast matrices (one row per level) of categorical variables
+LEVELS = {levels}
+CONTRASTS = {contrasts}
+
+# Each design matrix column is the product of its factors: (name, contrast column) for categorical variables, (name, None) for numeric variables
+COLUMN_FACTORS = {column_factors}
+
+# Random effect BLUPs keyed by grouping variable: group levels, terms ("(Intercept)" or a numeric variable), and one row of values per level
+RANDOM_EFFECTS = {random_effects}
+
+
+# @returns predictions on the response scale for the linear predictor @param eta
+{inverse_link_source}
+
+
+_LEVEL_INDEX = {{name: {{str(level): i for i, level in enumerate(levels)}} for name, levels in LEVELS.items()}}
+_GROUP_INDEX = {{name: {{str(level): i for i, level in enumerate(ranef["levels"])}} for name, ranef in RANDOM_EFFECTS.items()}}
+
+
+# @returns the index of each of @param values in @param index, or -1 for values not in index
+def _codes(index, values):
+    uniques, inverse = np.unique(np.asarray(values).astype(str), return_inverse=True)
+    unique_codes = np.array([index.get(u, -1) for u in uniques], dtype=np.int64)
+    return unique_codes[inverse]
+
+
+def design_matrix(rows):
+    n = len(np.asarray(rows[next(iter(rows.keys()))]))
+    contrast_columns = dict()
+    for name in LEVELS:
+        codes = _codes(_LEVEL_INDEX[name], rows[name])
+        if (codes < 0).any():
+            raise ValueError(f"Unknown levels of {{name}}: {{set(np.asarray(rows[name])[codes < 0])}}")
+        contrast_columns[name] = np.asarray(CONTRASTS[name])[codes]
+    X = np.ones((n, len(COLUMNS)))
+    for j, factors in enumerate(COLUMN_FACTORS):
+        for name, contrast_column in factors:
+            if contrast_column is None:
+                X[:, j] *= np.asarray(rows[name], dtype=float)
+            else:
+                X[:, j] *= contrast_columns[name][:, contrast_column]
+    return X
+
+
+# @returns predictions for each row in @param rows on the response scale, or the linear predictor if @param linear
+def predict(rows, linear=False):
+    eta = design_matrix(rows) @ COEFFICIENTS
+    for name, ranef in RANDOM_EFFECTS.items():
+        codes = _codes(_GROUP_INDEX[name], rows[name])
+        known = codes >= 0
+        values = np.asarray(ranef["values"])[np.where(known, codes, 0)]
+        for k, term in enumerate(ranef["terms"]):
+            contribution = values[:, k] if term == "(Intercept)" else values[:, k] * np.asarray(rows[term], dtype=float)
+            # Groups not seen when fitting only get the fixed effects
+            eta = eta + np.where(known, contribution, 0.0)
+    if linear:
+        return eta
+    return inverse_link(eta)
+"""
+
+# Link class name: source of inverse_link(eta) in exported predictors
+# Each matches the inverse of the link in tisane.family (and statsmodels), and only uses NumPy and math
+numpy_inverse_link_templates = {
+    "IdentityLink": """def inverse_link(eta):
+    return np.asarray(eta, dtype=float)""",
+    "InverseLink": """def inverse_link(eta):
+    with np.errstate(divide="ignore"):
+        return 1.0 / np.asarray(eta, dtype=float)""",
+    "InverseSquaredLink": """def inverse_link(eta):
+    with np.errstate(divide="ignore"):
+        return 1.0 / np.sqrt(np.asarray(eta, dtype=float))""",
+    "LogLink": """def inverse_link(eta):
+    with np.errstate(over="ignore"):
+        return np.exp(np.asarray(eta, dtype=float))""",
+    "LogCLink": """def inverse_link(eta):
+    with np.errstate(over="ignore"):
+        return 1.0 - np.exp(np.asarray(eta, dtype=float))""",
+    "LogitLink": """def inverse_link(eta):
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-np.asarray(eta, dtype=float)))""",
+    # Standard normal CDF, Phi(eta) = erfc(-eta / sqrt(2)) / 2
+    "ProbitLink": """def inverse_link(eta):
+    eta = np.asarray(eta, dtype=float)
+    erfc = np.frompyfunc(math.erfc, 1, 1)
+    return 0.5 * erfc(-eta / math.sqrt(2.0)).astype(float)""",
+    "CauchyLink": """def inverse_link(eta):
+    return np.arctan(np.asarray(eta, dtype=float)) / np.pi + 0.5""",
+    "CLogLogLink": """def inverse_link(eta):
+    with np.errstate(over="ignore"):
+        return 1.0 - np.exp(-np.exp(np.asarray(eta, dtype=float)))""",
+    "LogLogLink": """def inverse_link(eta):
+    with np.errstate(over="ignore"):
+        return np.exp(-np.exp(-np.asarray(eta, dtype=float)))""",
+    # statsmodels' Power() defaults to power=1
+    "PowerLink": """def inverse_link(eta):
+    return np.asarray(eta, dtype=float)""",
+    "SquarerootLink": """def inverse_link(eta):
+    return np.square(np.asarray(eta, dtype=float))""",
+    # mu = -1 / (alpha * (1 - exp(-eta))), with alpha = 1
+    "NegativeBinomialLink": """def inverse_link(eta):
+    with np.errstate(over="ignore", divide="ignore"):
+        return -1.0 / (1.0 - np.exp(-np.asarray(eta, dtype=float)))""",
+    # p = odds / (1 + odds), with odds = (1 + alpha * eta)**(1 / alpha) and alpha = 1
+    "OPowerLink": """def inverse_link(eta):
+    odds = np.asarray(eta, dtype=float) + 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return odds / (odds + 1.0)""",
+}
+
 ### HELPERS
 def absolute_path(p: str) -> str:
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), p)
 
 
-# Write data out to path
-# Return path
-def write_out_dataframe(data: Dataset) -> os.path:
-    destinationDir = os.getcwd()
-    output_filename = os.path.join(destinationDir, "data.csv")
-    # path = absolute_path("data.csv")
+# @returns True if pandas can write @param format in this environment
+def is_data_format_available(format: str) -> bool:
+    if format == "csv":
+        return True
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# Write data out to a content-addressed snapshot file
+# The file name is derived from a hash of the data, so unchanged data is not written again
+# and concurrent code generations for different data do not clobber each other
+# @param format is one of the keys in data_snapshot_formats; binary formats fall back to csv if pyarrow is unavailable
+# @param destinationDir defaults to data_snapshot_directory in @param output_dir (or the current working directory)
+# @returns path to the snapshot
+def write_out_dataframe(
+    data: Dataset,
+    format: str = "csv",
+    destinationDir: str = None,
+    output_dir: str = None,
+) -> os.path:
+    global data_snapshot_formats
     assert data.has_data()
-    data.get_data().to_csv(output_filename)
+    format = format.lower()
+    if format not in data_snapshot_formats:
+        raise ValueError(
+            f"Unsupported data format: {format}. Use one of {list(data_snapshot_formats.keys())}"
+        )
+    if not is_data_format_available(format):
+        format = "csv"
+
+    if destinationDir is None:
+        destinationDir = os.path.join(
+            output_dir or os.getcwd(), data_snapshot_directory
+        )
+    os.makedirs(destinationDir, exist_ok=True)
+
+    df = data.get_data()
+    extension = data_snapshot_formats[format][0]
+    output_filename = os.path.join(
+        destinationDir, f"data_{data.get_fingerprint()[:16]}.{extension}"
+    )
+    if os.path.exists(output_filename):
+        return output_filename
+
+    # Write to a temporary file first and move it into place so readers never see a partial snapshot
+    fd, tmp_filename = tempfile.mkstemp(dir=destinationDir, suffix=f".{extension}.tmp")
+    os.close(fd)
+    try:
+        if format == "csv":
+            df.to_csv(tmp_filename, index=False)
+        elif format == "parquet":
+            df.to_parquet(tmp_filename, index=False)
+        else:
+            assert format == "feather"
+            df.reset_index(drop=True).to_feather(tmp_filename)
+        os.replace(tmp_filename, output_filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
 
     return output_filename
 
 
+# @returns dict of column names the @param statistical_model uses to the types to load them as (None to infer)
+# Only grouping factors of random effects are loaded as categorical ids, and only if they are not also fixed effects
+def generate_data_column_types(statistical_model: StatisticalModel) -> Dict[str, str]:
+    global variable_type_to_dtypes
+    variables = dict()
+
+    def add_variable(v: AbstractVariable):
+        if "*" in v.name:
+            # Interaction effects are computed from their component columns
+            for name in v.name.split("*"):
+                variables.setdefault(name, None)
+        else:
+            variables[v.name] = variable_type_to_dtypes.get(type(v).__name__, None)
+
+    dv = statistical_model.dependent_variable
+    variables[dv.name] = variable_type_to_dtypes.get(type(dv).__name__, None)
+    for v in statistical_model.main_effects:
+        add_variable(v)
+    for v in statistical_model.interaction_effects:
+        add_variable(v)
+    for rc in statistical_model.random_effects:
+        if isinstance(rc, RandomSlope) or isinstance(rc, RandomIntercept):
+            slope = rc if isinstance(rc, RandomSlope) else None
+            groups = rc.groups
+        else:
+            slope = rc.random_slope
+            groups = rc.random_slope.groups
+        if slope is not None and slope.iv.name not in variables:
+            add_variable(slope.iv)
+        # Do not change how a variable that is also a fixed effect is treated
+        if groups.name not in variables:
+            variables[groups.name] = "category"
+
+    return {name: variables[name] for name in sorted(variables.keys())}
+
+
+# @returns code that loads the data at @param data_path, using @param template
+# Only the columns of @param data that the @param statistical_model uses are loaded
+def generate_load_data_code(
+    template: str,
+    statistical_model: StatisticalModel,
+    data: Dataset,
+    data_path: str,
+) -> str:
+    global data_snapshot_formats
+    extension = os.path.splitext(str(data_path))[1].lstrip(".").lower()
+    loader = data_snapshot_formats.get(extension, data_snapshot_formats["csv"])[1]
+
+    column_types = generate_data_column_types(statistical_model=statistical_model)
+    available_columns = set(data.get_data().columns)
+    column_types = {
+        name: dtype for name, dtype in column_types.items() if name in available_columns
+    }
+    dtypes = {name: dtype for name, dtype in column_types.items() if dtype is not None}
+
+    load_options = ""
+    post_load = ""
+    # If none of the model's variables are in the data, load everything and let the user fix up names
+    if len(column_types) > 0:
+        if loader == "pd.read_csv":
+            load_options = load_data_csv_options.format(
+                columns=list(column_types.keys()), dtypes=dtypes
+            )
+        else:
+            load_options = load_data_columnar_options.format(
+                columns=list(column_types.keys())
+            )
+            if len(dtypes) > 0:
+                post_load = load_data_post_load.format(dtypes=dtypes)
+
+    return template.format(
+        filename=os.path.basename(str(data_path)),
+        loader=loader,
+        path=str(data_path),
+        load_options=load_options,
+        post_load=post_load,
+    )
+
+
+# @returns code that loads the data assigned to @param statistical_model
+# @param data_format describes the file format to load data from; non-csv formats write a snapshot of the data
+# @param output_dir is the directory the generated code is written to; snapshots are written to a directory in it
+def generate_data_code(
+    statistical_model: StatisticalModel,
+    code_templates: Dict[str, str],
+    data_format: str,
+    output_dir: str = None,
+) -> str:
+    if not statistical_model.has_data():
+        return code_templates["load_data_no_data_source"]
+
+    data = statistical_model.get_data()
+    if data.has_data_path() and (
+        data_format == "csv" or not is_data_format_available(data_format)
+    ):
+        return generate_load_data_code(
+            code_templates["load_data_from_csv_template"],
+            statistical_model,
+            data,
+            data.get_data_path(),
+        )
+
+    data_path = write_out_dataframe(data, format=data_format, output_dir=output_dir)
+    return generate_load_data_code(
+        code_templates["load_data_from_dataframe_template"],
+        statistical_model,
+        data,
+        data_path,
+    )
+
+
 # @param target describes the backend for which to generate code
+# @param data_format describes the file format for data snapshots of DataFrames (see data_snapshot_formats)
+# @param output_dir is the directory the code will be written to, which data snapshots are written to (defaults to the
+# current working directory)
+# NUMPY exports a fitted model as a predictor module that only depends on NumPy (see generate_numpy_predictor_code)
 def generate_code(
     statistical_model: StatisticalModel, target: str = "PYTHON", **kwargs
 ):
     if target.upper() == "PYTHON":
         return generate_python_code(statistical_model=statistical_model, **kwargs)
+    elif target.upper() == "NUMPY":
+        return generate_numpy_predictor_code(
+            statistical_model=statistical_model, **kwargs
+        )
+    raise ValueError(f"Unsupported target: {target}. Use PYTHON or NUMPY.")
 
 
-def generate_python_code(statistical_model: StatisticalModel):
+def generate_python_code(
+    statistical_model: StatisticalModel, data_format: str = "csv", output_dir: str = None
+):
     global pymer4_code_templates
 
     if statistical_model.has_random_effects():
-        return generate_pymer4_code(statistical_model=statistical_model)
+        return generate_pymer4_code(
+            statistical_model=statistical_model,
+            data_format=data_format,
+            output_dir=output_dir,
+        )
     else:
         assert not statistical_model.has_random_effects()
-        return generate_statsmodels_code(statistical_model=statistical_model)
+        return generate_statsmodels_code(
+            statistical_model=statistical_model,
+            data_format=data_format,
+            output_dir=output_dir,
+        )
 
 
-def generate_pymer4_code(statistical_model: StatisticalModel):
+def generate_pymer4_code(
+    statistical_model: StatisticalModel, data_format: str = "csv", output_dir: str = None
+):
     global pymer4_code_templates
 
     ### Specify preamble
     preamble = pymer4_code_templates["preamble"]
 
     ### Generate data code
-    data_code = None
-    if not statistical_model.has_data():
-        data_code = pymer4_code_templates["load_data_no_data_source"]
-    else:
-        data = statistical_model.get_data()
-        if data.has_data_path():
-            data_code = pymer4_code_templates["load_data_from_csv_template"]
-            data_code = data_code.format(path=str(data.data_path))
-        else:
-            assert not data.has_data_path()
-            data_path = write_out_dataframe(data)
-            data_code = pymer4_code_templates[
-                "load_data_from_dataframe_template"
-            ].format(path=data_path)
+    data_code = generate_data_code(
+        statistical_model=statistical_model,
+        code_templates=pymer4_code_templates,
+        data_format=data_format,
+        output_dir=output_dir,
+    )
 
     ### Generate model code
     model_code = generate_pymer4_model(statistical_model=statistical_model)
@@ -361,27 +727,21 @@ def generate_pymer4_family(statistical_model: StatisticalModel) -> str:
 #     return str()
 
 
-def generate_statsmodels_code(statistical_model: StatisticalModel):
+def generate_statsmodels_code(
+    statistical_model: StatisticalModel, data_format: str = "csv", output_dir: str = None
+):
     global statsmodels_code_templates
 
     ### Specify preamble
     preamble = statsmodels_code_templates["preamble"]
 
     ### Generate data code
-    data_code = None
-    if not statistical_model.has_data():
-        data_code = statsmodels_code_templates["load_data_no_data_source"]
-    else:
-        data = statistical_model.get_data()
-        if data.data_path is not None:
-            data_code = statsmodels_code_templates["load_data_from_csv_template"]
-            data_code = data_code.format(path=str(data.data_path))
-        else:
-            assert data.data_path is None
-            data_path = write_out_dataframe(data)
-            data_code = statsmodels_code_templates[
-                "load_data_from_dataframe_template"
-            ].format(path=data_path)
+    data_code = generate_data_code(
+        statistical_model=statistical_model,
+        code_templates=statsmodels_code_templates,
+        data_format=data_format,
+        output_dir=output_dir,
+    )
 
     ### Generate model code
     formula_code = generate_statsmodels_formula(statistical_model=statistical_model)
@@ -479,6 +839,166 @@ def generate_statsmodels_link(statistical_model=StatisticalModel):
     return statsmodels_link_name_to_functions[sm_link_name]
 
 
+# Fit @param statistical_model in the current process against its assigned data
+# Unlike generate_code, this does not produce a script to run separately
+# @param design_matrices is an optional (endog, exog) pair that was already built for this model's formula
+# @returns fitted results object (statsmodels GLMResults, or a fitted pymer4 Lmer model if there are random effects)
+def fit_statistical_model(
+    statistical_model: StatisticalModel,
+    design_matrices: Tuple[pd.DataFrame, pd.DataFrame] = None,
+):
+    if not statistical_model.has_data():
+        raise ValueError("Cannot fit a statistical model that has no data assigned.")
+
+    if statistical_model.has_random_effects():
+        return fit_pymer4_model(statistical_model=statistical_model)
+    return fit_statsmodels_model(
+        statistical_model=statistical_model, design_matrices=design_matrices
+    )
+
+
+# @returns formula for @param statistical_model without the quotes used in generated code
+def get_statsmodels_formula(statistical_model: StatisticalModel) -> str:
+    formula = generate_statsmodels_formula(statistical_model=statistical_model)
+    formula = formula.strip("'").strip()
+    # Intercept-only model
+    if formula.endswith("~"):
+        formula += " 1"
+    return formula
+
+
+# @returns (endog, exog) design matrices for @param statistical_model's formula and data
+# Matrices are cached on the Dataset so that models with the same formula (e.g., different family and link functions) reuse them
+# The cache is keyed by the Dataset's fingerprint too (hashed once per Dataset), so replacing the data (or calling
+# Dataset.data_changed after editing it in place) builds new matrices
+def get_design_matrices(
+    statistical_model: StatisticalModel,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    data = statistical_model.get_data()
+    formula = get_statsmodels_formula(statistical_model=statistical_model)
+    key = (formula, data.get_fingerprint())
+    matrices = data.get_design_matrices(key)
+    if matrices is None:
+        matrices = dmatrices(formula, data.get_data(), return_type="dataframe")
+        data.add_design_matrices(key, matrices)
+    return matrices
+
+
+def fit_statsmodels_model(
+    statistical_model: StatisticalModel,
+    design_matrices: Tuple[pd.DataFrame, pd.DataFrame] = None,
+):
+    global statsmodels_family_name_to_functions
+    global statsmodels_link_name_to_objects
+
+    if design_matrices is None:
+        design_matrices = get_design_matrices(statistical_model=statistical_model)
+    endog, exog = design_matrices
+
+    family_name = statsmodels_family_name_to_functions[
+        type(statistical_model.family_function).__name__
+    ]
+    link = statsmodels_link_name_to_objects[
+        type(statistical_model.link_function).__name__
+    ]()
+    family = getattr(sm.families, family_name)(link=link)
+
+    model = sm.GLM(endog, exog, family=family)
+    return model.fit()
+
+
+def fit_pymer4_model(statistical_model: StatisticalModel):
+    # pymer4 requires R, so only import it when a mixed effects model is fit
+    from pymer4.models import Lmer
+
+    formula = generate_pymer4_formula(statistical_model=statistical_model).strip("'")
+    family = generate_pymer4_family(statistical_model=statistical_model)
+    model = Lmer(formula=formula, family=family, data=statistical_model.get_data().get_data())
+    model.fit(summarize=False)
+    return model
+
+
+# @returns source of inverse_link(eta) for the link class named @param link_name
+def generate_numpy_inverse_link_source(link_name: str) -> str:
+    global numpy_inverse_link_templates
+    if link_name not in numpy_inverse_link_templates:
+        raise ValueError(
+            f"Cannot export a predictor for {link_name}. Use one of {list(numpy_inverse_link_templates.keys())}"
+        )
+    return numpy_inverse_link_templates[link_name]
+
+
+# Export a fitted @param statistical_model as the source of a self-contained predictor module that only depends on NumPy
+# @param results is the fitted results for @param statistical_model (e.g., from fit_statistical_model); the model is fit if not given
+# @returns string to write out to a module
+def generate_numpy_predictor_code(statistical_model: StatisticalModel, results=None):
+    global numpy_predictor_template
+
+    if results is None:
+        results = fit_statistical_model(statistical_model=statistical_model)
+    design_info = get_design_matrices(statistical_model=statistical_model)[1].design_info
+
+    ### Fixed effects
+    if statistical_model.has_random_effects():
+        # pymer4 coefficients follow the same column order as the fixed effects design matrix
+        coefficients = [float(c) for c in results.coefs["Estimate"]]
+    else:
+        coefficients = [float(c) for c in results.params]
+    assert len(coefficients) == len(design_info.column_names)
+
+    ### Categorical level encodings
+    levels = dict()
+    contrasts = dict()
+    column_factors = list()
+    for subterms in design_info.term_codings.values():
+        for subterm in subterms:
+            factor_columns = list()
+            for factor in subterm.factors:
+                name = factor.name()
+                factor_info = design_info.factor_infos[factor]
+                if name not in statistical_model.get_data().get_data().columns:
+                    raise ValueError(
+                        f"Cannot export a predictor for the expression {name}. Only data columns are supported."
+                    )
+                if factor_info.type == "categorical":
+                    levels[name] = list(factor_info.categories)
+                    matrix = subterm.contrast_matrices[factor].matrix
+                    contrasts[name] = matrix.tolist()
+                    factor_columns.append([(name, i) for i in range(matrix.shape[1])])
+                else:
+                    assert factor_info.num_columns == 1
+                    factor_columns.append([(name, None)])
+            # Patsy varies the first factor's columns fastest
+            for combination in itertools.product(*reversed(factor_columns)):
+                column_factors.append(list(reversed(combination)))
+    assert len(column_factors) == len(design_info.column_names)
+
+    ### Random effects
+    random_effects = dict()
+    if statistical_model.has_random_effects():
+        ranefs = results.ranef if isinstance(results.ranef, list) else [results.ranef]
+        for group_name, ranef in zip(results.grps.keys(), ranefs):
+            random_effects[group_name] = {
+                "levels": [str(level) for level in ranef.index],
+                "terms": list(ranef.columns),
+                "values": ranef.values.astype(float).tolist(),
+            }
+
+    link_name = type(statistical_model.link_function).__name__
+    formula = get_statsmodels_formula(statistical_model=statistical_model)
+    return numpy_predictor_template.format(
+        formula=formula,
+        formula_repr=repr(formula),
+        columns=repr(list(design_info.column_names)),
+        coefficients=repr(coefficients),
+        levels=repr(levels),
+        contrasts=repr(contrasts),
+        column_factors=repr(column_factors),
+        random_effects=repr(random_effects),
+        inverse_link_source=generate_numpy_inverse_link_source(link_name),
+    )
+
+
 def generate_statsmodels_glm_code(statistical_model: StatisticalModel, **kwargs) -> str:
     has_random = len(statistical_model.random_ivs) > 0
     assert has_random is False
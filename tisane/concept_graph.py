@@ -1,11 +1,18 @@
 from tisane.concept import Concept
 from tisane.statistical_model import StatisticalModel
-from tisane.effect_set import EffectSet, MainEffect, InteractionEffect, MixedEffect
+from tisane.effect_set import (
+    EffectSet,
+    EffectIndex,
+    MainEffect,
+    InteractionEffect,
+    MixedEffect,
+)
 
 from enum import Enum
 from typing import List, Union, Dict
 from more_itertools import powerset
 from collections import namedtuple
+from itertools import combinations, islice
 import copy
 import pandas as pd
 import networkx as nx
@@ -187,7 +194,10 @@ class ConceptGraph(object):
                 )
         return cast_effect_list
 
-    def generate_effects_sets(self, dv: Concept):
+    # @returns the candidate (main effects, interaction effects) for @param dv, from the transitive closure of this graph
+    # Both are sorted by name, so they (and the effect sets enumerated from them) are in the same order in every
+    # process, whatever the hash seed
+    def get_candidate_effects(self, dv: Concept):
         # Get the transitive closure of the graph (all edges)
         tc = self.getRelationships(
             dv=dv, relationship_type=CONCEPTUAL_RELATIONSHIP.CAUSE
@@ -197,21 +207,110 @@ class ConceptGraph(object):
         )  # do not get multiples, only get set of edges in the transitive closure
 
         # Get the main and interaction effects
-        main_effects = self.infer_main_effects(dv, set_tc)
-        interaction_effects = self.infer_interaction_effects(dv, set_tc)
-
-        # Create sets of main and interaction effects
-        main_powerset = powerset(main_effects)
-        interaction_powerset = powerset(interaction_effects)
-        main_cast = self.cast(effect_type="main", effect_powerset=main_powerset)
-        interaction_cast = self.cast(
-            effect_type="interaction", effect_powerset=interaction_powerset
+        main_effects = sorted(self.infer_main_effects(dv, set_tc))
+        interaction_effects = sorted(self.infer_interaction_effects(dv, set_tc))
+        return main_effects, interaction_effects
+
+    def generate_effects_sets(self, dv: Concept, **constraints):
+        return set(self.iter_effects_sets(dv=dv, **constraints))
+
+    # Yield the EffectSets for @param dv one at a time, in a fixed order: main effects by increasing size, and for
+    # each, interaction effects by increasing size, with subsets of the same size in the order of get_candidate_effects
+    # Constraints prune the enumeration, so effect sets that do not satisfy them are never built:
+    # @param max_terms is the most main and interaction effects (together) in an effect set
+    # @param max_main_effects and @param max_interaction_effects bound each kind of effect separately
+    # @param required_main_effects are names of concepts every effect set must have as main effects
+    # @param hierarchical only allows an interaction if both of its concepts are main effects of the effect set
+    # @param limit is the most effect sets to yield; stopping iteration early also stops the enumeration
+    def iter_effects_sets(
+        self,
+        dv: Concept,
+        max_terms: int = None,
+        max_main_effects: int = None,
+        max_interaction_effects: int = None,
+        required_main_effects: List[str] = None,
+        hierarchical: bool = False,
+        limit: int = None,
+    ):
+        main_effects, interaction_effects = self.get_candidate_effects(dv)
+        effects = self._iter_effects(
+            main_effects=main_effects,
+            interaction_effects=interaction_effects,
+            max_terms=max_terms,
+            max_main_effects=max_main_effects,
+            max_interaction_effects=max_interaction_effects,
+            required_main_effects=required_main_effects,
+            hierarchical=hierarchical,
         )
-        all_effects_set = self.get_all_effects_combinations(
-            dv=dv, powerset_lists={"main": main_cast, "interaction": interaction_cast}
+        effects_sets = (
+            EffectSet(
+                dv=dv,
+                main=MainEffect(main if main else None),
+                interaction=InteractionEffect(interaction if interaction else None),
+            )
+            for (main, interaction) in effects
         )
-
-        return all_effects_set
+        return islice(effects_sets, limit)
+
+    # Yield the effect sets of iter_effects_sets as masks of the effects' ids in @param index (see EffectIndex)
+    # Candidate effects that are not in @param index yet are added to it before the first mask is yielded, in the
+    # (sorted) order of get_candidate_effects, so a new index gets the same ids in every process
+    # Takes the same constraints as iter_effects_sets
+    def iter_effects_masks(self, dv: Concept, index: EffectIndex, **constraints):
+        main_effects, interaction_effects = self.get_candidate_effects(dv)
+        main_bits = {m: 1 << index.add_effect("main", m) for m in main_effects}
+        interaction_bits = {
+            i: 1 << index.add_effect("interaction", i) for i in interaction_effects
+        }
+        limit = constraints.pop("limit", None)
+        effects = self._iter_effects(
+            main_effects=main_effects,
+            interaction_effects=interaction_effects,
+            **constraints,
+        )
+        masks = (
+            sum(main_bits[m] for m in main)
+            | sum(interaction_bits[i] for i in interaction)
+            for (main, interaction) in effects
+        )
+        return islice(masks, limit)
+
+    # Yield (main effects, interaction effects) tuples for iter_effects_sets and iter_effects_masks
+    def _iter_effects(
+        self,
+        main_effects: list,
+        interaction_effects: list,
+        max_terms: int = None,
+        max_main_effects: int = None,
+        max_interaction_effects: int = None,
+        required_main_effects: List[str] = None,
+        hierarchical: bool = False,
+    ):
+        required = list(required_main_effects or [])
+        if any(r not in main_effects for r in required):
+            return  # No effect set can have all of the required main effects
+        max_main = min_bound(len(main_effects), max_main_effects, max_terms)
+
+        for main in iter_subsets(main_effects, required=required, max_size=max_main):
+            allowed_interactions = interaction_effects
+            if hierarchical:
+                main_set = set(main)
+                allowed_interactions = [
+                    i
+                    for i in interaction_effects
+                    if i[0] in main_set and i[1] in main_set
+                ]
+            max_interactions = min_bound(
+                len(allowed_interactions),
+                max_interaction_effects,
+                None if max_terms is None else max_terms - len(main),
+            )
+            for interaction in iter_subsets(
+                allowed_interactions, max_size=max_interactions
+            ):
+                if not main and not interaction:
+                    continue
+                yield (main, interaction)
 
     # @returns a subgraph (type ConceptGraph) of this ConceptGraph that treats the dv as the final "sinking" node
     def _prune_graph_for_effects_sets_generation(self, dv: Concept):
@@ -258,10 +357,28 @@ class ConceptGraph(object):
         # Prune graph/Take subgraph from which to generate possible sets of effects
         sub = self._prune_graph_for_effects_sets_generation(dv=dv)
 
-        # Generate effects sets
-        sub.generate_effects_sets(dv=dv)
-
         # Filter effects sets to only include those that involve the IVs
 
         return sub.generate_effects_sets(dv=dv)
         # TODO: What ahppens if the ivs contain variables that receive edges from DV?  --> should check that the model is possible, raise error if not (this is in the interaction and checking layer?)
+
+
+# @returns the smallest of @param size and the bounds that are not None
+def min_bound(size: int, *bounds) -> int:
+    return min([size] + [b for b in bounds if b is not None])
+
+
+# Yield the subsets (as tuples) of @param items that include all of @param required and have at most @param max_size
+# items, by increasing size; within a subset, items are in the order of @param items
+# Without required items or a max_size, this is the same order as more_itertools.powerset
+def iter_subsets(items: list, required: list = None, max_size: int = None):
+    required = set(required or [])
+    optional = [i for i in items if i not in required]
+    max_size = len(items) if max_size is None else max_size
+    for size in range(len(required), max_size + 1):
+        for chosen in combinations(optional, size - len(required)):
+            if required:
+                chosen = set(chosen)
+                yield tuple(i for i in items if i in required or i in chosen)
+            else:
+                yield chosen
@@ -1,8 +1,14 @@
 import os
+import math
+import numpy as np
 import pandas as pd
-from typing import Union
+from typing import Iterable, Union
 
 from pandas.core.frame import DataFrame
+from tisane.hashing import hash_dataframe
+
+# Most design matrices a Dataset keeps; the least recently used are dropped first
+max_cached_design_matrices = 16
 
 
 def absolute_path(p: str) -> str:
@@ -34,10 +40,46 @@ class Dataset(object):
 
         # TODO: post-processing? E.g., break up into DataVectors?
         self.dataset = df
+        # Fingerprint of the data (see hash_dataframe), computed once on first use
+        self.fingerprint = None
+        # Design matrices built from this data, keyed by (formula, data fingerprint), so models sharing a formula
+        # reuse them and changes to the data are never served stale matrices
+        self.design_matrices = dict()
 
     def get_data(self) -> pd.DataFrame:
         return self.dataset
 
+    # Replace the data with @param df
+    def set_data(self, df: pd.DataFrame):
+        self.dataset = df
+        self.data_changed()
+
+    # Drop the fingerprint and design matrices of the data
+    # Call after editing the DataFrame from get_data in place, as the edit cannot be detected without hashing every row
+    def data_changed(self):
+        self.fingerprint = None
+        self.design_matrices = dict()
+
+    # @returns fingerprint of the data, hashing it only the first time (or the first time after data_changed)
+    def get_fingerprint(self) -> str:
+        if self.fingerprint is None:
+            self.fingerprint = hash_dataframe(self.dataset)
+        return self.fingerprint
+
+    # @returns design matrices cached for @param key, or None if there are none
+    def get_design_matrices(self, key: tuple):
+        matrices = self.design_matrices.pop(key, None)
+        if matrices is not None:
+            self.design_matrices[key] = matrices  # Most recently used
+        return matrices
+
+    # Cache @param matrices for @param key, dropping the least recently used beyond max_cached_design_matrices
+    def add_design_matrices(self, key: tuple, matrices):
+        global max_cached_design_matrices
+        self.design_matrices[key] = matrices
+        while len(self.design_matrices) > max_cached_design_matrices:
+            self.design_matrices.pop(next(iter(self.design_matrices)))
+
     def get_data_path(self) -> os.path:
         return self.data_path
 
@@ -74,3 +116,181 @@ class DataVector(object):
 
     def get_cardinality(self):
         pass
+
+
+# Summary statistics of a numeric column computed in a single pass over chunks of values
+# Chunks are combined with the pairwise update for central moments (Chan et al.; Pebay), so large files never need to be loaded at once
+# Missing and non-finite values are counted but otherwise ignored
+class MomentStatistics(object):
+    count: int
+    missing: int
+    mean: float
+    zeros: int
+    minimum: float
+    maximum: float
+    is_integral: bool
+
+    def __init__(self):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self._m3 = 0.0  # Sum of cubed deviations from the mean
+        self._m4 = 0.0  # Sum of deviations from the mean to the fourth power
+        self.zeros = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.is_integral = True
+
+    # Add the values in @param chunk to the statistics
+    def update(self, chunk) -> "MomentStatistics":
+        values = np.asarray(chunk, dtype=float).ravel()
+        finite = np.isfinite(values)
+        if not finite.all():
+            self.missing += int(values.size - np.count_nonzero(finite))
+            values = values[finite]
+        n_b = values.size
+        if n_b == 0:
+            return self
+
+        mean_b = float(values.mean())
+        deviations = values - mean_b
+        squared = np.square(deviations)
+        m2_b = float(squared.sum())
+        m3_b = float(np.dot(squared, deviations))
+        m4_b = float(np.dot(squared, squared))
+
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self._m4 = (
+            self._m4
+            + m4_b
+            + delta ** 4 * n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2) / n ** 3
+            + 6.0 * delta ** 2 * (n_a ** 2 * m2_b + n_b ** 2 * self._m2) / n ** 2
+            + 4.0 * delta * (n_a * m3_b - n_b * self._m3) / n
+        )
+        self._m3 = (
+            self._m3
+            + m3_b
+            + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+            + 3.0 * delta * (n_a * m2_b - n_b * self._m2) / n
+        )
+        self._m2 = self._m2 + m2_b + delta ** 2 * n_a * n_b / n
+        self.mean = self.mean + delta * n_b / n
+        self.count = n
+
+        self.zeros += int(n_b - np.count_nonzero(values))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        if self.is_integral:
+            self.is_integral = bool(np.all(np.mod(values, 1.0) == 0))
+
+        return self
+
+    # @returns (population) variance
+    def get_variance(self) -> float:
+        if self.count == 0:
+            return math.nan
+        return self._m2 / self.count
+
+    def get_standard_deviation(self) -> float:
+        return math.sqrt(self.get_variance())
+
+    # @returns (biased, i.e., population) skewness, as in scipy.stats.skew
+    def get_skewness(self) -> float:
+        if self.count == 0 or self._m2 == 0:
+            return math.nan
+        return math.sqrt(self.count) * self._m3 / self._m2 ** 1.5
+
+    # @returns (biased, i.e., population) Pearson kurtosis, as in scipy.stats.kurtosis(fisher=False)
+    def get_kurtosis(self) -> float:
+        if self.count == 0 or self._m2 == 0:
+            return math.nan
+        return self.count * self._m4 / self._m2 ** 2
+
+    # @returns fraction of (finite) values that are zero
+    def get_zero_fraction(self) -> float:
+        if self.count == 0:
+            return math.nan
+        return self.zeros / self.count
+
+    def is_non_negative(self) -> bool:
+        return self.count > 0 and self.minimum >= 0
+
+    def is_positive(self) -> bool:
+        return self.count > 0 and self.minimum > 0
+
+    # @returns True if all values are in [@param lower, @param upper]
+    def is_bounded(self, lower: float, upper: float) -> bool:
+        return self.count > 0 and self.minimum >= lower and self.maximum <= upper
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "missing": self.missing,
+            "mean": self.mean,
+            "variance": self.get_variance(),
+            "skewness": self.get_skewness(),
+            "kurtosis": self.get_kurtosis(),
+            "zero fraction": self.get_zero_fraction(),
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "is integral": self.is_integral,
+            "is non-negative": self.is_non_negative(),
+        }
+
+
+# @returns True if every value in @param values is a non-negative integer (missing values are not)
+# Values are checked @param chunk_size at a time, stopping at the first chunk with a violation
+def is_all_non_negative_integers(
+    values: Union[np.ndarray, pd.Series], chunk_size: int = 1000000
+) -> bool:
+    values = np.asarray(values)
+    if values.dtype.kind == "u" or values.dtype.kind == "b":
+        return True
+    if values.dtype.kind not in "if":
+        try:
+            values = values.astype(float)
+        except (TypeError, ValueError):
+            return False
+
+    for start in range(0, values.size, chunk_size):
+        chunk = values[start : start + chunk_size]
+        if values.dtype.kind == "i":
+            if chunk.min(initial=0) < 0:
+                return False
+        else:
+            # NaN and infinity fail both comparisons
+            with np.errstate(invalid="ignore"):
+                if not np.all((chunk >= 0) & (np.mod(chunk, 1.0) == 0)):
+                    return False
+
+    return True
+
+
+# @returns MomentStatistics of @param values, processed @param chunk_size values at a time
+def compute_moment_statistics(
+    values: Union[np.ndarray, pd.Series, Iterable], chunk_size: int = 1000000
+) -> MomentStatistics:
+    statistics = MomentStatistics()
+    if isinstance(values, (np.ndarray, pd.Series, list, tuple)):
+        values = np.asarray(values, dtype=float).ravel()
+        for start in range(0, values.size, chunk_size):
+            statistics.update(values[start : start + chunk_size])
+    else:
+        # Iterable of chunks, e.g., from pd.read_csv(..., chunksize=...)
+        for chunk in values:
+            statistics.update(chunk)
+
+    return statistics
+
+
+# @returns MomentStatistics of the column @param column in the csv at @param path, read @param chunk_size rows at a time
+def compute_moment_statistics_from_csv(
+    path: os.PathLike, column: str, chunk_size: int = 1000000
+) -> MomentStatistics:
+    chunks = pd.read_csv(path, usecols=[column], chunksize=chunk_size)
+    return compute_moment_statistics(
+        (chunk[column] for chunk in chunks), chunk_size=chunk_size
+    )
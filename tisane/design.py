@@ -10,6 +10,8 @@ from tisane.variable import (
     Repeats,
 )
 from tisane.graph import Graph
+from tisane.graph_vis_cache import RenderCache
+from tisane.graph_vis_support import default_dot_edge_style, default_dot_edge_color
 from tisane.data import Dataset
 
 import os
@@ -25,6 +27,10 @@ Relies on Class Treatment, Nests, Repeats
 
 interaction_effects = list()
 
+# Data collection edges stand out in visualize_design
+design_vis_edge_style = {**default_dot_edge_style, "treat": "dotted", "nests": "dotted"}
+design_vis_edge_color = {**default_dot_edge_color, "treat": "blue", "nests": "green"}
+
 
 class Design(object):
     """Represents your study design
@@ -267,26 +273,18 @@ class Design(object):
         variables = self.graph.get_variables()
 
         for v in variables:
-            relationships = v.relationships
-
-            for r in relationships:
-                if isinstance(r, Nests):
-                    self.graph.add_relationship(relationship=r)
+            for r in v.get_relationships(Nests):
+                self.graph.add_relationship(relationship=r)
 
     def _add_identifiers_has_relationships_to_graph(self):
         identifiers = self.graph.get_identifiers()
 
         for unit in identifiers:
             # Does this unit have any other relationships/edges not already in the graph?
-            relationships = unit.relationships
-
-            for r in relationships:
-                if isinstance(r, Has):
-                    measure = r.measure
-                    if not self.graph.has_edge(
-                        start=unit, end=measure, edge_type="has"
-                    ):
-                        self.graph.add_relationship(relationship=r)
+            for r in unit.get_relationships(Has):
+                measure = r.measure
+                if not self.graph.has_edge(start=unit, end=measure, edge_type="has"):
+                    self.graph.add_relationship(relationship=r)
 
     # def _add_ivs(self, ivs: List[typing.Union[Treatment, AbstractVariable]]):
 
@@ -375,26 +373,18 @@ class Design(object):
         return self.graph
 
     def get_design_vis(self):
-        graph = self.graph._get_graph_vis()
-
-        edges = list(self.graph._graph.edges(data=True))  # get list of edges
-
-        for (n0, n1, edge_data) in edges:
-            edge_type = edge_data["edge_type"]
-            if edge_type == "treat":
-                graph.add_edge(pydot.Edge(n0, n1, style="dotted", color="blue"))
-            elif edge_type == "nests":
-                graph.add_edge(pydot.Edge(n0, n1, style="dotted", color="green"))
-            else:
-                pass
-                # raise ValueError (f"Unsupported edge type: {edge_type}")
-
-        return graph
-
-    def visualize_design(self):
-        p_graph = self.get_design_vis()
+        return self.graph._get_dot_graph(
+            style=design_vis_edge_style, color=design_vis_edge_color
+        )
 
-        p_graph.write_png("design_vis.png")
+    # @param cache is an optional RenderCache, so that drawing an unchanged design copies the previous drawing
+    def visualize_design(self, path="design_vis.png", cache: RenderCache = None):
+        self.graph.get_dot_graph(
+            path=path,
+            style=design_vis_edge_style,
+            color=design_vis_edge_color,
+            cache=cache,
+        )
 
     # TODO: Update if move to more atomic API
     # @returns the number of levels involved in this study design
@@ -1,7 +1,8 @@
 from tisane.concept import Concept
 
 from collections import namedtuple
-from typing import Any, List
+from typing import Any, Dict, Iterable, List
+import numpy as np
 
 
 MainEffect = namedtuple("MainEffect", "effect")
@@ -151,3 +152,163 @@ class EffectSet(object):
     # @returns effect set properties
     def get_assertions(self) -> dict:
         return self.properties
+
+
+# Kinds of effects in an EffectIndex. An EffectSet's mixed effects are its random effects
+effect_kinds = ["main", "interaction", "random"]
+
+
+class EffectIndex(object):
+    """Gives each effect (main, interaction, or random) of a design an integer id, so that a candidate model is a
+    bitmask: an int whose bit i is set if the model includes the effect with id i.
+
+    Set operations on candidate models are then operations on ints: `a | b` (union), `a & b` (intersection),
+    `a & ~b` (difference), and deduplicating candidates is a set of ints. Ids are assigned in the order effects are
+    added, so an index (and masks using it) only make sense within one design.
+
+    Parameters
+    ----------
+    main_effects, interaction_effects, random_effects : Iterable, optional
+        Effects to add to the index, in that order. Effects can be any hashable objects, such as names or variables.
+
+    """
+
+    effects: list  # id -> (kind, effect)
+    ids: dict  # (kind, effect) -> id
+    kind_masks: dict  # kind -> mask of the ids of that kind
+
+    def __init__(
+        self,
+        main_effects: Iterable = (),
+        interaction_effects: Iterable = (),
+        random_effects: Iterable = (),
+    ):
+        self.effects = list()
+        self.ids = dict()
+        self.kind_masks = {kind: 0 for kind in effect_kinds}
+        for (kind, effects) in zip(
+            effect_kinds, [main_effects, interaction_effects, random_effects]
+        ):
+            for e in effects:
+                self.add_effect(kind, e)
+
+    def __len__(self):
+        return len(self.effects)
+
+    # @returns id of @param effect of @param kind, adding it to the index if it is new
+    def add_effect(self, kind: str, effect) -> int:
+        if kind not in self.kind_masks:
+            raise ValueError(
+                f"Effect kind {kind} not supported! Try one of {effect_kinds}"
+            )
+        key = (kind, effect)
+        if key not in self.ids:
+            self.ids[key] = len(self.effects)
+            self.effects.append(key)
+            self.kind_masks[kind] |= 1 << self.ids[key]
+        return self.ids[key]
+
+    # @returns id of @param effect of @param kind; raises KeyError if it is not in the index
+    def get_id(self, kind: str, effect) -> int:
+        return self.ids[(kind, effect)]
+
+    # @returns (kind, effect) with @param id
+    def get_effect(self, id: int) -> tuple:
+        return self.effects[id]
+
+    # @returns mask of the given effects, adding any that are new to the index
+    def to_mask(
+        self,
+        main_effects: Iterable = (),
+        interaction_effects: Iterable = (),
+        random_effects: Iterable = (),
+    ) -> int:
+        mask = 0
+        for (kind, effects) in zip(
+            effect_kinds, [main_effects, interaction_effects, random_effects]
+        ):
+            for e in effects or ():
+                mask |= 1 << self.add_effect(kind, e)
+        return mask
+
+    # @returns tuple of the effects in @param mask (only those of @param kind, if given), in id order
+    def get_effects(self, mask: int, kind: str = None) -> tuple:
+        if kind is not None:
+            mask &= self.kind_masks[kind]
+        return tuple(self.effects[i][1] for i in iter_mask_ids(mask))
+
+    # @returns mask of @param effect_set, adding any of its effects that are new to the index
+    def encode(self, effect_set: EffectSet) -> int:
+        mixed = effect_set.mixed.effect if effect_set.mixed else None
+        return self.to_mask(
+            main_effects=effect_set.main.effect if effect_set.main else None,
+            interaction_effects=effect_set.interaction.effect
+            if effect_set.interaction
+            else None,
+            random_effects=mixed,
+        )
+
+    # @returns EffectSet for @param dv with the effects in @param mask
+    def decode(self, mask: int, dv: Concept) -> EffectSet:
+        main = self.get_effects(mask, "main")
+        interaction = self.get_effects(mask, "interaction")
+        random = self.get_effects(mask, "random")
+        return EffectSet(
+            dv=dv,
+            main=MainEffect(main if main else None),
+            interaction=InteractionEffect(interaction if interaction else None),
+            mixed=MixedEffect(random) if random else None,
+        )
+
+    # @returns bool array with a row for each of @param masks and a column for each effect in the index
+    def to_array(self, masks: Iterable[int]) -> np.ndarray:
+        masks = list(masks)
+        num_bytes = max(1, (len(self) + 7) // 8)
+        packed = np.frombuffer(
+            b"".join(m.to_bytes(num_bytes, "little") for m in masks), dtype=np.uint8
+        ).reshape(len(masks), num_bytes)
+        bits = np.unpackbits(packed, axis=1, bitorder="little")
+        return bits[:, : len(self)].astype(bool)
+
+    # @returns list of masks, one for each row of @param array (see to_array)
+    def from_array(self, array: np.ndarray) -> List[int]:
+        packed = np.packbits(np.asarray(array, dtype=bool), axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    # @returns dict to serialize this index with (e.g., as json, if the effects are names), listing each (kind, effect)
+    # in id order. Masks are ints, so they serialize as they are
+    def to_dict(self) -> Dict[str, list]:
+        return {"effects": [[kind, effect] for (kind, effect) in self.effects]}
+
+    # @returns EffectIndex with the same ids as the index @param index_dict was created from (see to_dict)
+    @classmethod
+    def from_dict(cls, index_dict: Dict[str, list]):
+        index = cls()
+        for (kind, effect) in index_dict["effects"]:
+            # json turns tuples, such as interaction effects, into lists
+            effect = tuple(effect) if isinstance(effect, list) else effect
+            index.add_effect(kind, effect)
+        return index
+
+
+# @returns iterator over the ids of the effects in @param mask, in increasing order
+def iter_mask_ids(mask: int):
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+# @returns number of effects in @param mask
+def count_effects(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+# @returns True if every effect in @param mask is also in @param other
+def is_subset(mask: int, other: int) -> bool:
+    return mask & ~other == 0
+
+
+# @returns True if @param mask has every effect in @param other
+def is_superset(mask: int, other: int) -> bool:
+    return other & ~mask == 0
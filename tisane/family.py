@@ -2,22 +2,272 @@ from abc import ABC, abstractmethod
 from os import PRIO_PGRP
 from tisane.variable import AbstractVariable
 from tisane.data import Dataset, DataVector
-from typing import Any, List
+from typing import Any, Callable, Dict, List, Tuple
 import typing  # for typing.Unit
+import hashlib
+import math
+import threading
+import numpy as np
+from scipy import special
+
+"""
+Vectorized link functions and their inverses.
+Each takes an array and an optional output array (which may be the input array, to transform in place).
+The parameterization of each link matches the statsmodels link used in generated code (see code_generator).
+"""
+
+
+def _prepare_link_arrays(data, out):
+    data = np.asarray(data, dtype=float)
+    if out is None:
+        out = np.empty_like(data)
+    return data, out
+
+
+def _identity(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.copyto(out, data)
+    return out
+
+
+# g(mu) = 1/mu, which is its own inverse
+def _inverse_power(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(divide="ignore"):
+        return np.reciprocal(data, out=out)
+
+
+# g(mu) = 1/mu**2
+def _inverse_squared(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.square(data, out=out)
+    with np.errstate(divide="ignore"):
+        return np.reciprocal(out, out=out)
+
+
+def _inverse_squared_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.sqrt(data, out=out)
+    with np.errstate(divide="ignore"):
+        return np.reciprocal(out, out=out)
+
+
+def _log(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(divide="ignore"):
+        return np.log(data, out=out)
+
+
+def _log_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(over="ignore"):
+        return np.exp(data, out=out)
+
+
+# g(p) = log(1 - p)
+def _logc(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.subtract(1.0, data, out=out)
+    with np.errstate(divide="ignore"):
+        return np.log(out, out=out)
+
+
+def _logc_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(over="ignore"):
+        np.exp(data, out=out)
+    return np.subtract(1.0, out, out=out)
+
+
+# g(p) = log(p / (1 - p))
+def _logit(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(divide="ignore"):
+        np.divide(data, np.subtract(1.0, data), out=out)
+        return np.log(out, out=out)
+
+
+def _logit_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.negative(data, out=out)
+    with np.errstate(over="ignore"):
+        np.exp(out, out=out)
+    np.add(out, 1.0, out=out)
+    return np.reciprocal(out, out=out)
+
+
+# g(p) = Phi^-1(p), where Phi is the standard normal CDF
+def _probit(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    return special.ndtri(data, out=out)
+
+
+def _probit_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    return special.ndtr(data, out=out)
+
+
+# g(p) = tan(pi * (p - 1/2))
+def _cauchy(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.subtract(data, 0.5, out=out)
+    np.multiply(out, np.pi, out=out)
+    return np.tan(out, out=out)
+
+
+def _cauchy_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.arctan(data, out=out)
+    np.divide(out, np.pi, out=out)
+    return np.add(out, 0.5, out=out)
+
+
+# g(p) = log(-log(1 - p))
+def _cloglog(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.subtract(1.0, data, out=out)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.log(out, out=out)
+        np.negative(out, out=out)
+        return np.log(out, out=out)
+
+
+def _cloglog_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(over="ignore"):
+        np.exp(data, out=out)
+        np.negative(out, out=out)
+        np.exp(out, out=out)
+    return np.subtract(1.0, out, out=out)
+
+
+# g(p) = -log(-log(p))
+def _loglog(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.log(data, out=out)
+        np.negative(out, out=out)
+        np.log(out, out=out)
+    return np.negative(out, out=out)
+
+
+def _loglog_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.negative(data, out=out)
+    with np.errstate(over="ignore"):
+        np.exp(out, out=out)
+    np.negative(out, out=out)
+    return np.exp(out, out=out)
+
+
+# g(mu) = mu**.5
+def _squareroot(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    return np.sqrt(data, out=out)
+
+
+def _squareroot_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    return np.square(data, out=out)
+
+
+# g(mu) = log(mu / (mu + 1/alpha)), with alpha = 1
+def _negative_binomial(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.divide(data, np.add(data, 1.0), out=out)
+    with np.errstate(divide="ignore"):
+        return np.log(out, out=out)
+
+
+def _negative_binomial_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.negative(data, out=out)
+    with np.errstate(over="ignore"):
+        np.exp(out, out=out)
+    np.subtract(1.0, out, out=out)
+    with np.errstate(divide="ignore"):
+        np.reciprocal(out, out=out)
+    return np.negative(out, out=out)
+
+
+# g(p) = ((p / (1 - p))**alpha - 1) / alpha, the odds-power link, with alpha = 1
+def _opower(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    with np.errstate(divide="ignore"):
+        np.divide(data, np.subtract(1.0, data), out=out)
+    return np.subtract(out, 1.0, out=out)
+
+
+def _opower_inverse(data, out=None):
+    data, out = _prepare_link_arrays(data, out)
+    np.add(data, 1.0, out=out)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.divide(out, np.add(out, 1.0), out=out)
+
+
+# Link class name: (link function, inverse link function), for every AbstractLink subclass
+link_transforms: Dict[str, Tuple[Callable, Callable]] = {
+    "IdentityLink": (_identity, _identity),
+    "InverseLink": (_inverse_power, _inverse_power),
+    "InverseSquaredLink": (_inverse_squared, _inverse_squared_inverse),
+    "LogLink": (_log, _log_inverse),
+    "LogCLink": (_logc, _logc_inverse),
+    "LogitLink": (_logit, _logit_inverse),
+    "ProbitLink": (_probit, _probit_inverse),
+    "CauchyLink": (_cauchy, _cauchy_inverse),
+    "CLogLogLink": (_cloglog, _cloglog_inverse),
+    "LogLogLink": (_loglog, _loglog_inverse),
+    # statsmodels' Power() defaults to power=1
+    "PowerLink": (_identity, _identity),
+    "SquarerootLink": (_squareroot, _squareroot_inverse),
+    "NegativeBinomialLink": (_negative_binomial, _negative_binomial_inverse),
+    # Not implemented in statsmodels, so models with it cannot be fit, but data can still be transformed
+    "OPowerLink": (_opower, _opower_inverse),
+}
+
+
+# @returns (link function, inverse link function) for the link class named @param link_name
+def get_link_transforms(link_name: str) -> Tuple[Callable, Callable]:
+    global link_transforms
+    if link_name not in link_transforms:
+        raise ValueError(
+            f"Unknown link function: {link_name}. Use one of {list(link_transforms.keys())}"
+        )
+    return link_transforms[link_name]
+
 
 """
 Abstract super class for all family functions.
 """
 
 
+# Simulating data from family functions
+# Number of values simulated when no size is given
+default_simulated_samples = 1000
+# Most values simulated at once, regardless of the size of the data being compared against
+max_simulated_samples = 10000
+max_simulation_cache_entries = 64
+_simulation_seed = 0
+_simulation_cache = dict()
+_simulation_cache_lock = threading.Lock()
+
+
 class AbstractFamily(ABC):
     variable: AbstractVariable
 
     def set_link(self, link: "AbstractLink"):
         self.link = link
 
+    # @returns simulated data from this family, moment-matched to @param mean and @param std (see simulate_family_data)
+    def simulate_data(self, mean: float = None, std: float = None, size: int = None):
+        return simulate_family_data(
+            type(self).__name__, mean=mean, std=std, size=size
+        )
+
+    # Draw @param size values from this family using @param rng, with parameters matched to @param mean and @param std (None for defaults)
+    @staticmethod
     @abstractmethod
-    def simulate_data(self):
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
         pass
 
     # TODO: Should this be an abstract super class method?
@@ -32,252 +282,253 @@ class AbstractLink(ABC):
     def set_variable(self, variable: AbstractVariable):
         self.variable = variable
 
-    @abstractmethod
-    def transform_data(self, data):
-        pass
+    # Apply the link function to @param data (values on the scale of the response)
+    # @param out is an optional array to write the result into; it may be @param data itself
+    # @returns array of transformed values
+    def transform_data(self, data, out=None):
+        return get_link_transforms(type(self).__name__)[0](data, out=out)
+
+    # Apply the inverse link function to @param data (values on the scale of the linear predictor)
+    # @param out is an optional array to write the result into; it may be @param data itself
+    # @returns array of values on the scale of the response
+    def inverse_transform_data(self, data, out=None):
+        return get_link_transforms(type(self).__name__)[1](data, out=out)
 
 
 class IdentityLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # return data
-        pass
-
 
 class InverseLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        pass
-
 
 class InverseSquaredLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class LogLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # return np.log(data)
-        pass
-
 
 class LogCLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # return np.log(data)
-        pass
-
 
 class LogitLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        # transformed_data = logit(data["data"])
-        # return pd.DataFrame(data=transformed_data)
-        pass
-
 
 class ProbitLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class CauchyLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class CLogLogLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class PowerLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        # transformed_data = stats.boxcox(data["data"])[0]
-        # return pd.DataFrame(data=transformed_data)
-        pass
-
 
 class SquarerootLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        # return sm.Power(power=.5) ??
-        pass
 
-
-class OPowerLink(AbstractLink):  # TODO: Is this implemented in statsmodels?
+class OPowerLink(AbstractLink):  # Not implemented in statsmodels
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class NegativeBinomialLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class LogLogLink(AbstractLink):
     def __init__(self, variable: AbstractVariable):
         super().set_variable(variable)
 
-    def transform_data(self, data):
-        # wrapper around python statsmodels?
-        pass
-
 
 class GaussianFamily(AbstractFamily):
     def __init__(self, variable: AbstractVariable):
         self.link = IdentityLink(variable)
 
-    def simulate_data(self, data):
-        # if "GaussianFamily" in str(fact) and "Inverse" not in str(fact):
-        # if design.dataset is not None:
-        #     mean = design.dataset.get_column(dv.name).mean()
-        #     std = design.dataset.get_column(dv.name).std()  # np default = 1
-        # else:
-        #     mean = 0
-        #     std = 1
-
-        # return np.random.default_rng().normal(loc=mean, scale=std, size=size)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        mean = 0.0 if mean is None else mean
+        std = 1.0 if std is None else std
+        return rng.normal(loc=mean, scale=std, size=size)
 
 
 class InverseGaussianFamily(AbstractFamily):
     def __init__(self, variable: AbstractVariable):
         self.link = InverseSquaredLink(variable)
 
-    def simulate_data(self):
-        # if design.dataset is not None:
-        #     mean = design.dataset.get_column(dv.name).mean()  # should be > 0
-        #     std = design.dataset.get_column(dv.name).std()  # should be >= 0
-        #     if mean <= 0 or std < 0:
-        #         mean = 1
-        #         std = 1
-
-        # else:
-        #     mean = 1
-        #     std = 1
-
-        # return np.random.default_rng().wald(mean=mean, scale=std, size=size)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        # Variance = mean**3 / shape
+        if mean is None or std is None or mean <= 0 or std <= 0:
+            mean, shape = 1.0, 1.0
+        else:
+            shape = mean ** 3 / std ** 2
+        return rng.wald(mean=mean, scale=shape, size=size)
 
 
 class GammaFamily(AbstractFamily):
     def __init__(self, variable: AbstractVariable):
         self.link = InverseLink(variable)
 
-    def simulate_data(self):
-        # shape = 2.0  # k, >= 0
-        # scale = 1.0  # theta, np default, >= 0
-
-        # return np.random.default_rng().gamma(shape=shape, scale=scale, size=size)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        # Mean = shape * scale, Variance = shape * scale**2
+        if mean is None or std is None or mean <= 0 or std <= 0:
+            shape, scale = 2.0, 1.0
+        else:
+            shape, scale = mean ** 2 / std ** 2, std ** 2 / mean
+        return rng.gamma(shape=shape, scale=scale, size=size)
 
 
 class TweedieFamily(AbstractFamily):
+    # Can be changed to update to other familiar distributions: https://en.wikipedia.org/wiki/Tweedie_distribution
+    power = 1.5
+
     def __init__(self, variable: AbstractVariable):
         self.link = LogLink(variable)
 
-    def simulate_data(self):
-        # if design.dataset is not None:
-        #     mean = design.dataset.get_column(dv.name).mean()
-        # else:
-        #     mean = 1.0
-        # p = 1.5  # Can be changed to update to other familiar distributions: https://en.wikipedia.org/wiki/Tweedie_distribution
-        # phi = 20  # this can be reset
-        # n = size
-        # return tweedie.tweedie(mu=mean, p=p, phi=phi).rvs(n)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        # Compound Poisson-Gamma for 1 < p < 2, with Variance = phi * mean**p
+        p = TweedieFamily.power
+        if mean is None or mean <= 0:
+            mean = 1.0
+        phi = 20.0 if std is None or std <= 0 else std ** 2 / mean ** p
+        counts = rng.poisson(lam=mean ** (2 - p) / (phi * (2 - p)), size=size)
+        shape = (2 - p) / (p - 1)
+        scale = phi * (p - 1) * mean ** (p - 1)
+        # A gamma with shape 0 is 0 (no events)
+        return rng.gamma(shape=counts * shape, scale=scale)
 
 
 class PoissonFamily(AbstractFamily):
     def __init__(self, variable: AbstractVariable):
         self.link = LogLink(variable)
 
-    def simulate_data(self):
-        # lam = 1.0  # np default
-        # return np.random.default_rng().poisson(lam=lam, size=size)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        lam = 1.0 if mean is None or mean < 0 else mean
+        return rng.poisson(lam=lam, size=size)
 
 
 class BinomialFamily(AbstractFamily):
     def __init__(self, variable: AbstractVariable):
         self.link = LogitLink(variable)
 
-    def simulate_data(self):
-        # elif "BinomialFamily" in str(fact) and "Negative" not in str(fact):
-        # n = size  # number of trials  >= 0
-        # p = 0.5  # probability of success [0, 1]
-
-        # return np.random.default_rng().binomial(n=n, p=p, size=size)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        # Binary outcomes, so the mean is the probability of success
+        p = 0.5 if mean is None or mean < 0 or mean > 1 else mean
+        return rng.binomial(n=1, p=p, size=size)
 
 
 class NegativeBinomialFamily(AbstractFamily):
     def __init__(self, variable: AbstractVariable):
         self.link = LogLink(variable)
 
-    def simulate_data(self):
-        # n = size  # number of successes, > 0
-        # p = 0.5  # probability of success [0, 1]
-
-        # return np.random.default_rng().negative_binomial(n=n, p=p, size=size)
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        # Mean = n(1-p)/p, Variance = Mean/p, so the data must be overdispersed to match both
+        if mean is None or mean <= 0:
+            n, p = 1.0, 0.5
+        elif std is None or std ** 2 <= mean:
+            n, p = mean, 0.5
+        else:
+            p = mean / std ** 2
+            n = mean * p / (1 - p)
+        return rng.negative_binomial(n=n, p=p, size=size)
 
 
 class MultinomialFamily(AbstractFamily):
+    cardinality = 3  # should be > 2
+
     def __init__(self, variable: AbstractVariable):
         self.link = LogitLink(variable)
 
-    def simulate_data(self):
-        # dv = design.dv
-        # assert dv.cardinality > 2
-        # n = size  # number of trials/experiments, > 0
-        # pvals = 1.0 / dv.cardinality  # probability of each case
-
-        # return np.random.default_rng().multinomial(n=n, pvals=pvals, size=size)
-        # else:
-        #     raise ValueError(f"Unknown distribution fact: {str(fact)}")
-        pass
+    @staticmethod
+    def sample(rng: np.random.Generator, mean: float, std: float, size: int):
+        # Category of each observation, with each category equally likely
+        return rng.integers(0, MultinomialFamily.cardinality, size=size)
+
+
+# Family class name: family class
+family_name_to_class = {
+    family.__name__: family
+    for family in [
+        GaussianFamily,
+        InverseGaussianFamily,
+        GammaFamily,
+        TweedieFamily,
+        PoissonFamily,
+        BinomialFamily,
+        NegativeBinomialFamily,
+        MultinomialFamily,
+    ]
+}
+
+
+# @returns generator for simulating the data identified by @param key, seeded from the simulation seed and @param key
+# Each simulation gets its own generator, so its data does not depend on what was simulated before or on other threads
+def get_simulation_rng(key: tuple) -> np.random.Generator:
+    encoded = repr((_simulation_seed,) + key).encode("utf-8")
+    digest = hashlib.sha256(encoded).digest()
+    return np.random.default_rng(int.from_bytes(digest[:8], "little"))
+
+
+# @returns simulated data from the family named @param family_name, matching @param mean and @param std where the family allows
+# At most max_simulated_samples values are drawn, from a generator seeded by the arguments (see get_simulation_rng)
+# Results are cached by (family, moments, size)
+def simulate_family_data(
+    family_name: str, mean: float = None, std: float = None, size: int = None
+) -> np.ndarray:
+    if family_name not in family_name_to_class:
+        raise ValueError(f"Unknown distribution family: {family_name}")
+    mean = None if mean is None or not math.isfinite(mean) else float(mean)
+    std = None if std is None or not math.isfinite(std) else float(std)
+    size = min(size or default_simulated_samples, max_simulated_samples)
+
+    key = (family_name, mean, std, size)
+    with _simulation_cache_lock:
+        data = _simulation_cache.get(key)
+    if data is None:
+        rng = get_simulation_rng(key)
+        data = family_name_to_class[family_name].sample(rng, mean, std, size)
+        data.setflags(write=False)
+        with _simulation_cache_lock:
+            # Another thread may have simulated the same (identical) data meanwhile
+            data = _simulation_cache.setdefault(key, data)
+            while len(_simulation_cache) > max_simulation_cache_entries:
+                _simulation_cache.pop(next(iter(_simulation_cache)))
+    return data
+
+
+# Seed simulations with @param seed, and clear cached simulations
+def set_simulation_seed(seed: int):
+    global _simulation_seed
+    with _simulation_cache_lock:
+        _simulation_seed = seed
+        _simulation_cache.clear()
@@ -43,7 +43,10 @@ from tisane.variable import (
 from tisane.random_effects import RandomSlope, RandomIntercept
 from tisane.graph import Graph
 from tisane.design import Design
+from tisane.data import MomentStatistics, compute_moment_statistics
 from itertools import chain, combinations
+import math
+import pandas as pd
 from typing import Dict, List, Set, Any, Tuple
 import typing  # for Union
 
@@ -200,3 +203,104 @@ def generate_family_selection_questions_options(dv: AbstractVariable):
 
     return choices
 
+
+### Answering the family selection questions automatically from data
+# Skewness above which a DV "has positive skew"
+positive_skew_threshold = 0.5
+# Fraction of zeros above which a DV "has lots of zeros"
+zero_inflation_threshold = 0.1
+
+# Family name: check that the DV's values are in the support of the family
+family_support_checks = {
+    GaussianFamily.__name__: lambda stats: True,
+    InverseGaussianFamily.__name__: lambda stats: stats.is_positive(),
+    GammaFamily.__name__: lambda stats: stats.is_positive(),
+    TweedieFamily.__name__: lambda stats: stats.is_non_negative(),
+    PoissonFamily.__name__: lambda stats: stats.is_integral
+    and stats.is_non_negative(),
+    NegativeBinomialFamily.__name__: lambda stats: stats.is_integral
+    and stats.is_non_negative(),
+    BinomialFamily.__name__: lambda stats: stats.is_integral
+    and stats.is_bounded(0, 1),
+    MultinomialFamily.__name__: lambda stats: True,
+}
+
+
+# @returns MomentStatistics of the DV in @param query's data, or None if there is no data or the DV is not numeric
+def compute_dv_statistics(
+    query: Design, chunk_size: int = 1000000
+) -> typing.Union[MomentStatistics, None]:
+    if query.dataset is None:
+        return None
+    column = query.dataset.get_column(query.dv.name)
+    if not pd.api.types.is_numeric_dtype(column):
+        return None
+    return compute_moment_statistics(column.values, chunk_size=chunk_size)
+
+
+# Answer the questions from generate_family_selection_questions_options using @param statistics about @param dv's data
+# @returns tuple: (answers from the root of the questions to a leaf, names of the families at that leaf)
+def answer_family_selection_questions(
+    dv: AbstractVariable, statistics: typing.Union[MomentStatistics, None]
+) -> Tuple[List[str], List[str]]:
+    choices = generate_family_selection_questions_options(dv)
+    if len(choices) == 0:
+        return (list(), list())
+
+    # Data that are not numbers (or are binary) can only be treated as categories
+    if "treat as categories" in choices and (
+        statistics is None or dv.get_cardinality() == 2
+    ):
+        return (["treat as categories"], choices["treat as categories"])
+    if statistics is None or statistics.count == 0:
+        return (list(), list())
+
+    has_lots_of_zeros = statistics.get_zero_fraction() > zero_inflation_threshold
+    if statistics.is_integral and statistics.is_non_negative():
+        answers = ["treat as counts"]
+    else:
+        answers = ["treat as continuous"]
+        skewness = statistics.get_skewness()
+        if not math.isnan(skewness) and skewness > positive_skew_threshold:
+            answers.append("has positive skew")
+        else:
+            answers.append("false")
+    if isinstance(_get_choice(choices, answers), dict):
+        answers.append("has lots of zeros" if has_lots_of_zeros else "false")
+
+    return (answers, _get_choice(choices, answers))
+
+
+def _get_choice(choices: Dict, answers: List[str]):
+    choice = choices
+    for answer in answers:
+        choice = choice[answer]
+    return choice
+
+
+# Rank the candidate family functions for @param query using statistics about the DV's data
+# Families the answered selection questions suggest come first, followed by other candidates the data are valid for, then the rest
+# @param statistics are computed from @param query's data if not provided
+# @returns list of family function candidates, best first
+def rank_family_functions(
+    query: Design, statistics: MomentStatistics = None
+) -> List[AbstractFamily]:
+    global family_support_checks
+    if statistics is None:
+        statistics = compute_dv_statistics(query)
+
+    candidates = infer_family_functions(query)
+    _, suggested = answer_family_selection_questions(query.dv, statistics)
+
+    def rank(family: AbstractFamily):
+        name = type(family).__name__
+        is_supported = statistics is None or family_support_checks[name](statistics)
+        is_suggested = name in suggested
+        return (
+            not is_supported,
+            not is_suggested,
+            suggested.index(name) if is_suggested else 0,
+            name,
+        )
+
+    return sorted(candidates, key=rank)
@@ -0,0 +1,147 @@
+"""
+Fitting and ranking every candidate (family, link) pair for a statistical model's effects structure
+"""
+
+from tisane.family import AbstractFamily, AbstractLink
+from tisane.statistical_model import StatisticalModel
+from tisane.code_generator import (
+    get_design_matrices,
+    statsmodels_family_name_to_functions,
+    statsmodels_link_name_to_objects,
+)
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import time
+import warnings
+from typing import Dict, List, Set, Tuple
+import pandas as pd
+import statsmodels.api as sm
+
+ranking_criteria = ["aic", "bic", "deviance"]
+
+ranking_columns = [
+    "family",
+    "link",
+    "aic",
+    "bic",
+    "deviance",
+    "converged",
+    "fit_time",
+    "error",
+]
+
+# Design matrices shared with each worker process once, instead of with every task
+_worker_design_matrices = None
+
+
+def _set_worker_design_matrices(design_matrices: Tuple[pd.DataFrame, pd.DataFrame]):
+    global _worker_design_matrices
+    _worker_design_matrices = design_matrices
+
+
+# Fit a GLM for the (family, link) pair named by @param family_link against the shared design matrices
+# @returns dict describing the fit, with an error message instead of fit statistics if fitting failed
+def _fit_family_link(family_link: Tuple[str, str]) -> Dict:
+    global _worker_design_matrices
+    family_name, link_name = family_link
+    row = {
+        "family": family_name,
+        "link": link_name,
+        "aic": math.nan,
+        "bic": math.nan,
+        "deviance": math.nan,
+        "converged": False,
+        "fit_time": math.nan,
+        "error": None,
+    }
+
+    endog, exog = _worker_design_matrices
+    start = time.perf_counter()
+    try:
+        link = statsmodels_link_name_to_objects[link_name]()
+        family = getattr(sm.families, statsmodels_family_name_to_functions[family_name])(
+            link=link
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            res = sm.GLM(endog, exog, family=family).fit()
+            row["aic"] = res.aic
+            # Use the likelihood-based BIC rather than statsmodels' deviance-based default
+            row["bic"] = getattr(res, "bic_llf", res.bic)
+            row["deviance"] = res.deviance
+        row["converged"] = bool(res.converged)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["fit_time"] = time.perf_counter() - start
+
+    return row
+
+
+# @returns list of (family name, link name) pairs that can be fit with statsmodels
+def get_family_link_names(
+    family_link_paired: Dict[AbstractFamily, Set[AbstractLink]]
+) -> List[Tuple[str, str]]:
+    pairs = set()
+    for family, links in family_link_paired.items():
+        family_name = type(family).__name__
+        if family_name not in statsmodels_family_name_to_functions:
+            continue
+        for link in links:
+            link_name = type(link).__name__
+            if link_name in statsmodels_link_name_to_objects:
+                pairs.add((family_name, link_name))
+
+    return sorted(pairs)
+
+
+# Fit @param statistical_model's effects structure with every (family, link) pair in @param family_link_paired
+# The design matrix is built once and shared with the worker processes
+# @param family_link_paired maps each candidate family to its candidate links (e.g., from infer_family_functions and infer_link_functions)
+# @param sort_by is one of ranking_criteria; lower is better
+# @param max_workers is the number of processes to fit with; 1 fits in the current process
+# @param ignore_random_effects ranks a model with random effects by fitting GLMs of only its fixed effects
+# Candidates are fit as GLMs, so ranking a model with random effects raises a ValueError unless
+# @param ignore_random_effects is set. The fixed effects ranking is an approximation: the fit statistics of the mixed
+# effects model (and so possibly the order of the candidates) differ.
+# @returns DataFrame with one row per pair, ranked by @param sort_by, with pairs that failed to fit last
+def rank_family_link_candidates(
+    statistical_model: StatisticalModel,
+    family_link_paired: Dict[AbstractFamily, Set[AbstractLink]],
+    sort_by: str = "aic",
+    max_workers: int = None,
+    ignore_random_effects: bool = False,
+) -> pd.DataFrame:
+    global ranking_criteria
+    if sort_by not in ranking_criteria:
+        raise ValueError(f"Cannot rank by {sort_by}. Use one of {ranking_criteria}")
+    if not statistical_model.has_data():
+        raise ValueError("Cannot fit a statistical model that has no data assigned.")
+    if statistical_model.has_random_effects() and not ignore_random_effects:
+        raise ValueError(
+            "Family and link functions are ranked by fitting GLMs, which cannot include random effects. "
+            + "Pass ignore_random_effects=True to rank them using only the fixed effects."
+        )
+
+    pairs = get_family_link_names(family_link_paired)
+    design_matrices = get_design_matrices(statistical_model=statistical_model)
+
+    if max_workers is None:
+        max_workers = min(len(pairs), os.cpu_count() or 1)
+    if max_workers <= 1 or len(pairs) <= 1:
+        _set_worker_design_matrices(design_matrices)
+        rows = [_fit_family_link(pair) for pair in pairs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_set_worker_design_matrices,
+            initargs=(design_matrices,),
+        ) as executor:
+            rows = list(executor.map(_fit_family_link, pairs))
+
+    ranking = pd.DataFrame(rows, columns=ranking_columns)
+    ranking = ranking.sort_values(
+        by=[sort_by, "family", "link"], na_position="last", kind="mergesort"
+    )
+    return ranking.reset_index(drop=True)
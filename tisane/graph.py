@@ -25,6 +25,10 @@ from tisane.graph_vis_support import (
     default_dot_edge_color,
     default_dot_edge_label,
 )
+from tisane.graph_vis_cache import RenderCache, render_cache_key
+from tisane.reachability import ReachabilityIndex, reachability_views
+import hashlib
+import json
 import re
 import os
 
@@ -36,6 +40,7 @@ conceptual level: cause, correlate, contribute.
 
 class Graph(object):
     _graph: nx.MultiDiGraph
+    _reachability: dict  # view -> ReachabilityIndex, built on first use
 
     @classmethod
     def cast(**kwargs):
@@ -45,6 +50,7 @@ class Graph(object):
 
     def __init__(self):
         self._graph = nx.MultiDiGraph()
+        self._reachability = dict()
 
     def __repr__(self):
         return str(self._graph.__dict__)
@@ -72,13 +78,12 @@ class Graph(object):
     def get_edge(
         self, start: AbstractVariable, end: AbstractVariable, edge_type: str
     ) -> Union[Tuple, None]:
-        edges = self.get_edges()
-
-        for (n0, n1, edge_data) in edges:
+        # Only look at the edges between @param start and @param end
+        edges = self._graph.get_edge_data(start.name, end.name) or {}
 
-            if n0 == start.name and n1 == end.name:
-                if edge_type == edge_data["edge_type"]:
-                    return (n0, n1, edge_data)
+        for edge_data in edges.values():
+            if edge_type == edge_data["edge_type"]:
+                return (start.name, end.name, edge_data)
 
         return None
 
@@ -167,78 +172,128 @@ class Graph(object):
                 repetitions=repetitions,
             )
 
+        # Keep the reachability indexes that have been built up to date
+        for (view, index) in self._reachability.items():
+            if edge_type in reachability_views[view]:
+                index.add_edge(start_node[0], end_node[0])
+
+    # Drop the reachability indexes, so they are rebuilt on next use
+    # Call after removing edges from _graph: removing an edge can make any pair of nodes unreachable
+    def _invalidate_reachability(self):
+        self._reachability = dict()
+
+    # @returns ReachabilityIndex over the edges in @param view (see reachability_views): "causal" for causes edges,
+    # "conceptual" for causes and associates edges
+    # The index is built on first use and updated as edges are added, so repeated queries do not traverse the graph
+    def get_reachability_index(self, view: str = "causal") -> ReachabilityIndex:
+        if view not in reachability_views:
+            raise ValueError(
+                f"Reachability view {view} not supported! Try one of {list(reachability_views)}"
+            )
+        indexes = self._reachability
+        if view not in indexes:
+            edge_types = reachability_views[view]
+            edges = [
+                (n0, n1)
+                for (n0, n1, edge_type) in self._graph.edges(data="edge_type")
+                if edge_type in edge_types
+            ]
+            indexes[view] = ReachabilityIndex(edges=edges, nodes=self._graph.nodes())
+        return indexes[view]
+
+    # @returns True if there is a path from @param start to @param end in @param view (e.g., start causes end
+    # transitively)
+    def reaches(
+        self, start: AbstractVariable, end: AbstractVariable, view: str = "causal"
+    ) -> bool:
+        return self.get_reachability_index(view).reaches(start.name, end.name)
+
     def get_causes_associates_tikz_graph(
-        self, path="causes_associates_graph.tex", dv: AbstractVariable = None
+        self,
+        path="causes_associates_graph.tex",
+        dv: AbstractVariable = None,
+        collapsed: bool = False,
+        cache: RenderCache = None,
     ):
         self.get_tikz_graph(
             edge_filter=lambda edge_data: edge_data["edge_type"] == "causes"
             or edge_data["edge_type"] == "associates",
             path=path,
             dv=dv,
+            collapsed=collapsed,
+            cache=cache,
         )
 
     def get_tikz_graph(
-        self, path="graph.tex", edge_filter=lambda x: True, dv: AbstractVariable = None
+        self,
+        path="graph.tex",
+        edge_filter=lambda x: True,
+        dv: AbstractVariable = None,
+        collapsed: bool = False,
+        cache: RenderCache = None,
     ):
         path_dir = os.path.dirname(path)
         if path_dir and not os.path.exists(path_dir):
             os.makedirs(path_dir)
+        if cache is not None:
+            fingerprint = self.get_render_fingerprint(
+                edge_filter=edge_filter, dv=dv, collapsed=collapsed
+            )
+            key = render_cache_key(fingerprint, "tikz")
+            if cache.copy_to(key, path):
+                return
+            pass
         with open(path, "w") as f:
-            f.write(self._get_tikz_graph(edge_filter=edge_filter, dv=dv))
+            tikz = self._get_tikz_graph(
+                edge_filter=edge_filter, dv=dv, collapsed=collapsed
+            )
+            f.write(tikz)
             pass
+        if cache is not None:
+            cache.store(key, path)
 
-    def _get_tikz_graph(self, edge_filter=lambda x: True, dv: AbstractVariable = None):
+    def _get_tikz_graph(
+        self,
+        edge_filter=lambda x: True,
+        dv: AbstractVariable = None,
+        collapsed: bool = False,
+    ):
         def sanitize_characters(string):
             # Remove all underscores from the string, and replace them with
             # spaces. LaTeX doesn't like underscores, because of math mode.
             return re.sub(r"_", " ", string)
 
-        edges = list(self._graph.edges(data=True))
-        tikz_edges = []
-        nodes = []
-        for (nstart, nend, edge_data) in edges:
-            if edge_filter(edge_data):
-                n0 = sanitize_characters(nstart)
-                n1 = sanitize_characters(nend)
-                if n0 not in nodes:
-                    nodes.append(n0)
-                    pass
-                if n1 not in nodes:
-                    nodes.append(n1)
-                edge_type = edge_data["edge_type"]
-                tikz_edges.append({"start": n0, "end": n1, "style": edge_type})
+        nodes, edges = self._get_render_elements(
+            edge_filter=edge_filter, dv=dv, collapsed=collapsed, filtered_nodes=True
+        )
+        nodeStyles = {}
+        for (n, node) in nodes.items():
+            nodeStyles[n] = ("unit" if node["is_unit"] else "measure") + (
+                ",depvar" if node["is_dv"] else ""
+            )
+            if node["label"] != n:
+                nodeStyles[n] += ",as={{{}}}".format(
+                    sanitize_characters(node["label"])
+                )
                 pass
             pass
-
-        # variables = self.get_variables()
-        nodeStyles = {}
-        for n in nodes:
-            var = self.get_variable(n)
-            if var:
-                nodeStyles[n] = (
-                    "unit"
-                    if isinstance(var, Unit) and not isinstance(var, Measure)
-                    else "measure"
-                ) + (",depvar" if var == dv else "")
-        nodes_code = ""
-        # for n in nodes:
-        #     # TODO: get the type of the node
-        #     nodes_code += "\\node ({}) at ()"
         graph_code = ""
-        seen_nodes = []
-        for tedge in tikz_edges:
+        seen_nodes = set()
+        for (n0, n1, edge_type) in edges:
             start_style = ""
             end_style = ""
-            if tedge["start"] not in seen_nodes:
-                start_style = f"[{nodeStyles[tedge['start']]}]"
-                seen_nodes.append(tedge["start"])
+            if n0 not in seen_nodes:
+                start_style = f"[{nodeStyles[n0]}]"
+                seen_nodes.add(n0)
                 pass
-            if tedge["end"] not in seen_nodes:
-                end_style = f"[{nodeStyles[tedge['end']]}]"
-                seen_nodes.append(tedge["end"])
+            if n1 not in seen_nodes:
+                end_style = f"[{nodeStyles[n1]}]"
+                seen_nodes.add(n1)
                 pass
             graph_code += "{} -> [{}] {};\n".format(
-                tedge["start"] + start_style, tedge["style"], tedge["end"] + end_style
+                sanitize_characters(n0) + start_style,
+                edge_type,
+                sanitize_characters(n1) + end_style,
             )
             pass
         return formatTikzVis(graph_code, siblingDistance=3, levelDistance=3)
@@ -253,6 +308,8 @@ class Graph(object):
         color=default_dot_edge_color,
         label=default_dot_edge_label,
         dv: AbstractVariable = None,
+        collapsed: bool = False,
+        cache: RenderCache = None,
     ):
         """Write a DOT graph representation to a file, containing only the edges with types "causes" or "associates"
 
@@ -269,6 +326,11 @@ class Graph(object):
             to the end of the path. Defaults to `True`. If `True`, and
             an extension is known for the specified format, such as `psd`, and `path=graph`, then the output graph will be
             written to `graph.psd`.
+        collapsed : bool
+            Whether to draw a summary of the graph instead of every variable. See `_get_dot_graph`. Defaults to `False`.
+        cache : RenderCache
+            An optional cache of rendered graphs. If this graph has been rendered with the same options before, the cached
+            file is copied to `path` instead of running Graphviz again. Defaults to `None`, which renders every time.
 
         """
         # TODO: Add style, color, and label parameter descriptions
@@ -285,6 +347,8 @@ class Graph(object):
             color=color,
             label=label,
             dv=dv,
+            collapsed=collapsed,
+            cache=cache,
         )
 
     def get_dot_graph(
@@ -297,6 +361,8 @@ class Graph(object):
         color=default_dot_edge_color,
         label=default_dot_edge_label,
         dv: AbstractVariable = None,
+        collapsed: bool = False,
+        cache: RenderCache = None,
     ):
         """Write the DOT graph representation to a file.
 
@@ -314,12 +380,14 @@ class Graph(object):
             to the end of the path. Defaults to `True`. If `True`, and
             an extension is known for the specified format, such as `psd`, and `path=graph`, then the output graph will be
             written to `graph.psd`.
+        collapsed : bool
+            Whether to draw a summary of the graph instead of every variable. See `_get_dot_graph`. Defaults to `False`.
+        cache : RenderCache
+            An optional cache of rendered graphs. If this graph has been rendered with the same options before, the cached
+            file is copied to `path` instead of running Graphviz again. Defaults to `None`, which renders every time.
 
         """
         # TODO: Add style, color, and label parameter descriptions
-        graph = self._get_dot_graph(
-            edge_filter=edge_filter, style=style, color=color, label=label, dv=dv
-        )
         assert (
             format in dot_formats
         ), "Format {} not supported. Supported formats are {}".format(
@@ -343,7 +411,25 @@ class Graph(object):
             os.makedirs(path_dir)
             pass
 
+        if cache is not None:
+            fingerprint = self.get_render_fingerprint(
+                edge_filter=edge_filter, dv=dv, collapsed=collapsed
+            )
+            key = render_cache_key(fingerprint, format, style, color, label)
+            if cache.copy_to(key, path):
+                return
+            pass
+        graph = self._get_dot_graph(
+            edge_filter=edge_filter,
+            style=style,
+            color=color,
+            label=label,
+            dv=dv,
+            collapsed=collapsed,
+        )
         graph.write(path, format=format)
+        if cache is not None:
+            cache.store(key, path)
 
     def _get_dot_graph(
         self,
@@ -352,6 +438,7 @@ class Graph(object):
         color=default_dot_edge_color,
         label=default_dot_edge_label,
         dv: AbstractVariable = None,
+        collapsed: bool = False,
     ):
         """Internal method to obtain a DOT graph object representing this graph.
 
@@ -367,6 +454,11 @@ class Graph(object):
             A dictionary where keys are edge types and values are the DOT color to use for an edge. All edges by default are black. To customize edge color, provide a dictionary with a default defined (by the key `default`), and edges customized by edge type.
         label : dict
             A dictionary where keys are edge types and values are the label to use for the edge. Associates and cause edges are labeled with their type, and all other edges have no label by default. To provide custom labels, use the edge keys `associate`, `cause`, etc., and provide a `default`
+        collapsed : bool
+            Whether to draw a summary of the graph, for designs too large to read (or lay out) variable by variable. Measures are
+            drawn as part of the unit that has them, except for `dv`, and chains of two or more measures that each have exactly
+            one cause and cause exactly one other variable are drawn as one node. Edges that become the same edge are drawn once,
+            labeled with how many edges they stand for. Defaults to `False`.
 
         Returns
         -------
@@ -376,57 +468,193 @@ class Graph(object):
         """
         # TODO: fix style parameter description
         graph = pydot.Dot("graph_vis", graph_type="digraph")
-        edges = list(self._graph.edges(data=True))
-        nodes = []
-        for (n0, n1, _) in edges:
-            if n0 not in nodes:
-                nodes.append(n0)
-                pass
-            if n1 not in nodes:
-                nodes.append(n1)
-                pass
-            pass
-        for n0 in nodes:
-            var0 = self.get_variable(n0)
-            shape = (
-                "box"
-                if isinstance(var0, Unit) and not isinstance(var0, Measure)
-                else "ellipse"
-            )
+        nodes, edges = self._get_render_elements(
+            edge_filter=edge_filter, dv=dv, collapsed=collapsed
+        )
+        for (n0, node) in nodes.items():
+            shape = "box" if node["is_unit"] else "ellipse"
             nodestyle = ""
             fillcolor = "white"
-            if var0 == dv:
+            if node["is_dv"]:
                 nodestyle = "filled"
                 fillcolor = "#AAAAAA"
                 pass
             graph.add_node(
                 pydot.Node(
-                    n0, label=n0, style=nodestyle, fillcolor=fillcolor, shape=shape
+                    n0,
+                    label=node["label"],
+                    style=nodestyle,
+                    fillcolor=fillcolor,
+                    shape=shape,
                 )
             )
             pass
 
-        for (n0, n1, edge_data) in edges:
-            if edge_filter(edge_data):
-                edge_type = edge_data["edge_type"]
-                edge_style = (
-                    style[edge_type] if edge_type in style else style["default"]
-                )
-                edge_color = (
-                    color[edge_type] if edge_type in color else color["default"]
-                )
-                edge_label = (
-                    label[edge_type] if edge_type in label else label["default"]
-                )
-                graph.add_edge(
-                    pydot.Edge(
-                        n0, n1, style=edge_style, color=edge_color, label=edge_label
-                    )
-                )
+        for ((n0, n1, edge_type), count) in edges.items():
+            edge_style = style[edge_type] if edge_type in style else style["default"]
+            edge_color = color[edge_type] if edge_type in color else color["default"]
+            edge_label = label[edge_type] if edge_type in label else label["default"]
+            if count > 1:
+                edge_label = "{} ({})".format(edge_label, count).strip()
                 pass
+            graph.add_edge(
+                pydot.Edge(n0, n1, style=edge_style, color=edge_color, label=edge_label)
+            )
             pass
         return graph
 
+    # @returns hex digest identifying what is drawn for this graph with @param edge_filter, @param dv, and @param collapsed
+    # (see _get_dot_graph): the same nodes, with the same labels and kinds, and the same edges give the same fingerprint,
+    # whatever order they were added in
+    def get_render_fingerprint(
+        self,
+        edge_filter=lambda x: True,
+        dv: AbstractVariable = None,
+        collapsed: bool = False,
+    ) -> str:
+        nodes, edges = self._get_render_elements(
+            edge_filter=edge_filter, dv=dv, collapsed=collapsed
+        )
+        canonical = [
+            sorted(
+                (n, node["label"], node["is_unit"], node["is_dv"])
+                for (n, node) in nodes.items()
+            ),
+            sorted((n0, n1, t, count) for ((n0, n1, t), count) in edges.items()),
+        ]
+        encoded = json.dumps(canonical).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    # @returns (nodes, edges) to draw, in the order they were added to the graph
+    # nodes maps node names to a dict with the node's "label" and whether it "is_unit" or "is_dv"
+    # edges maps (start, end, edge type) to the number of edges in the graph it is drawn for
+    # Nodes are the ends of every edge, or only of those that pass @param edge_filter if @param filtered_nodes
+    # If @param collapsed, measures are drawn as part of their unit and chains of causes as one node (see _get_dot_graph)
+    def _get_render_elements(
+        self,
+        edge_filter=lambda x: True,
+        dv: AbstractVariable = None,
+        collapsed: bool = False,
+        filtered_nodes: bool = False,
+    ):
+        variables = dict(self._graph.nodes(data="variable"))
+        all_edges = list(self._graph.edges(data=True))
+        filtered_edges = [
+            (n0, n1, edge_data["edge_type"])
+            for (n0, n1, edge_data) in all_edges
+            if edge_filter(edge_data)
+        ]
+        units = dict()
+        if collapsed:
+            units = self._get_measure_units(all_edges, variables, dv)
+            pass
+
+        nodes = dict()
+        for (n0, n1, _) in filtered_edges if filtered_nodes else all_edges:
+            for n in (units.get(n0, n0), units.get(n1, n1)):
+                if n not in nodes:
+                    var = variables[n]
+                    is_unit = isinstance(var, Unit) and not isinstance(var, Measure)
+                    nodes[n] = {"label": n, "is_unit": is_unit, "is_dv": var == dv}
+                    pass
+                pass
+            pass
+        edges = dict()
+        for (n0, n1, edge_type) in filtered_edges:
+            key = (units.get(n0, n0), units.get(n1, n1), edge_type)
+            # Edges between a unit and its own measures are drawn by the unit's node
+            if key[0] != key[1]:
+                edges[key] = edges.get(key, 0) + 1
+                pass
+            pass
+
+        if collapsed:
+            measure_counts = dict()
+            for u in units.values():
+                measure_counts[u] = measure_counts.get(u, 0) + 1
+                pass
+            for (u, count) in measure_counts.items():
+                if u in nodes:
+                    nodes[u]["label"] = "{} ({} measure{})".format(
+                        u, count, "" if count == 1 else "s"
+                    )
+                    pass
+                pass
+            self._collapse_causal_chains(nodes, edges)
+            pass
+        return nodes, edges
+
+    # @returns dict from each measure to the unit it is drawn as part of in a collapsed graph
+    # A measure is drawn as part of a unit if it is had by exactly one unit and is not @param dv
+    def _get_measure_units(self, edges: List, variables: dict, dv: AbstractVariable):
+        measure_units = dict()
+        for (n0, n1, edge_data) in edges:
+            if edge_data["edge_type"] != "has":
+                continue
+            unit = variables[n0]
+            measure = variables[n1]
+            if not isinstance(unit, Unit) or isinstance(measure, Unit) or measure == dv:
+                continue
+            measure_units.setdefault(n1, set()).add(n0)
+            pass
+        return {m: u.pop() for (m, u) in measure_units.items() if len(u) == 1}
+
+    # Replace each chain of two or more measures in @param nodes, such that each has exactly one incoming and one
+    # outgoing edge in @param edges and both are "causes" edges, with a single node
+    # @param nodes and @param edges are in the format returned by _get_render_elements, and are updated in place
+    def _collapse_causal_chains(self, nodes: dict, edges: dict):
+        incoming = {n: [] for n in nodes}
+        outgoing = {n: [] for n in nodes}
+        for (n0, n1, edge_type) in edges:
+            outgoing[n0].append((n1, edge_type))
+            incoming[n1].append((n0, edge_type))
+            pass
+
+        def in_chain(n):
+            return (
+                not nodes[n]["is_dv"]
+                and not nodes[n]["is_unit"]
+                and len(incoming[n]) == 1
+                and len(outgoing[n]) == 1
+                and incoming[n][0][1] == "causes"
+                and outgoing[n][0][1] == "causes"
+                and incoming[n][0][0] != outgoing[n][0][0]
+            )
+
+        chained = {n for n in nodes if in_chain(n)}
+        for first in list(chained):
+            cause = incoming[first][0][0]
+            if cause in chained:
+                # Not the first node of its chain (or part of a cycle, which is drawn as is)
+                continue
+            chain = [first]
+            while outgoing[chain[-1]][0][0] in chained:
+                chain.append(outgoing[chain[-1]][0][0])
+                pass
+            if len(chain) < 2:
+                continue
+            effect = outgoing[chain[-1]][0][0]
+            name = "{} to {}".format(chain[0], chain[-1])
+            if name in nodes:
+                continue
+            count = edges.pop((cause, chain[0], "causes"))
+            for (n0, n1) in zip(chain, chain[1:]):
+                edges.pop((n0, n1, "causes"))
+                pass
+            edges[(name, effect, "causes")] = edges.pop((chain[-1], effect, "causes"))
+            edges[(cause, name, "causes")] = count
+            for n in chain:
+                del nodes[n]
+                pass
+            nodes[name] = {
+                "label": "{} ... {} ({} variables)".format(
+                    chain[0], chain[-1], len(chain)
+                ),
+                "is_unit": False,
+                "is_dv": False,
+            }
+            pass
+
     # @return List of variables represented in this graph as nodes
     def get_variables(self) -> List[AbstractVariable]:
         variables = list()
@@ -478,12 +706,9 @@ class Graph(object):
     # @param name is the name of the variable we are looking for
     # @return AbstractVariable in Graph with @param name, None otherwise
     def get_variable(self, name: str) -> AbstractVariable:
-        nodes = self.get_nodes()
-
-        for (n, data) in nodes:
-            n_var = data["variable"]
-            if n_var.name == name:
-                return n_var
+        # Nodes are indexed by their variable's name
+        if self._graph.has_node(name):
+            return self._graph.nodes[name].get("variable")
         return None
 
     # @return iterator over predecessors of @param var
@@ -545,6 +770,7 @@ class Graph(object):
         # First remove
         assert self._graph.has_edge(start_node[0], end_node[0])
         self._graph.remove_edge(start_node[0], end_node[0])
+        self._invalidate_reachability()
 
         # Then add back in
         self._add_edge(start=start, end=end, edge_type=new_edge_type)
@@ -751,6 +977,7 @@ class Graph(object):
                 pass
             else:
                 gr._graph.remove_edge(n0, n1)
+        gr._invalidate_reachability()
 
         return gr
 
@@ -765,6 +992,7 @@ class Graph(object):
                 pass
             else:
                 gr._graph.remove_edge(n0, n1)
+        gr._invalidate_reachability()
 
         return gr
 
@@ -794,6 +1022,7 @@ class Graph(object):
 
         for n in nodes_to_remove:
             gr._graph.remove_node(n)
+        gr._invalidate_reachability()
 
         return gr
 
@@ -806,5 +1035,6 @@ class Graph(object):
         # Iterate over outgoing edges from dv
         for n in self._graph.neighbors(variable.name):
             gr._graph.remove_edge(variable.name, n)
+        gr._invalidate_reachability()
 
         return gr
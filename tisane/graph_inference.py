@@ -22,6 +22,7 @@ from tisane.variable import (
 )
 from tisane.random_effects import RandomEffect, RandomSlope, RandomIntercept
 from tisane.graph import Graph
+from tisane.reachability import ReachabilityIndex
 from tisane.design import Design
 from itertools import chain, combinations
 from typing import Dict, List, Set, Any, Tuple
@@ -151,54 +152,32 @@ def find_common_ancestors(
     common_ancestors = set()
     common_ancestor_to_children = dict()
 
-    # Map counting ancestors of all @param variables
-    _ancestor_to_count_ = dict()
-    _ancestor_to_children_ = (
-        dict()
-    )  # keep track of children IVs for each common ancestor, mostly useful for explanations
-    # Get causal subgraph
-    causal_sub = gr.get_causal_subgraph()
-
-    # Remove any edges between variables (IVs)
+    # Causal edges, ignoring any edges between variables (IVs)
     var_names = [v.name for v in variables]
+    causal_edges = [
+        (n0, n1)
+        for (n0, n1, edge_data) in gr.get_edges()
+        if edge_data["edge_type"] == "causes"
+    ]
+    edges = [
+        (n0, n1)
+        for (n0, n1) in causal_edges
+        if not (n0 in var_names and n1 in var_names)
+    ]
+    if len(edges) == len(causal_edges):
+        reachability = gr.get_reachability_index("causal")
+    else:
+        reachability = ReachabilityIndex(edges=edges)
 
-    edges = causal_sub.get_edges()
-    for (n0, n1, edge_data) in edges:
-        edge_type = edge_data["edge_type"]
-        if edge_type == "causes":
-            if n0 in var_names and n1 in var_names:
-                causal_sub._graph.remove_edge(n0, n1)
-
-    # Take transitive closure of causal subgraph
-    tc = nx.transitive_closure_dag(causal_sub._graph)
+    # Common ancestors are the ancestors of at least two variables
+    common_ancestors = reachability.get_common_ancestors(var_names)
 
-    # For each variable in @param variables:
-    # Get its predecessors from the transitive closure
-    # Add them to a map (key is variable, count is value)
+    # Keep track of children IVs for each common ancestor, mostly useful for explanations
+    for key in common_ancestors:
+        common_ancestor_to_children[key] = list()
     for v in variables:
-        # node = causal_sub.get_node(variable=v)
-        # if v.name == "Time":
-        #     import pdb; pdb.set_trace()
-        predecessors = tc.predecessors(v.name)
-
-        # Add each predecessor to the dictionary
-        for p in predecessors:
-            # Have we seen this ancestor before?
-            if p in _ancestor_to_count_.keys():
-                _ancestor_to_count_[p] += 1
-            else:
-                _ancestor_to_count_[p] = 1
-                _ancestor_to_children_[p] = list()
-            # Add v to list of children that @p is an ancestor to
-            assert p in _ancestor_to_children_.keys()
-            _ancestor_to_children_[p].append(v.name)
-
-    # At the end, add to set and return set of variables that have count > 1
-    # At the end, also add to the dict of shared ancestor to variables that share that ancestor
-    for key, value in _ancestor_to_count_.items():
-        if value > 1:
-            common_ancestors.add(key)
-            common_ancestor_to_children[key] = _ancestor_to_children_[key]
+        for p in reachability.get_ancestors(v.name) & common_ancestors:
+            common_ancestor_to_children[p].append(v.name)
 
     assert len(common_ancestors) == len(common_ancestor_to_children.keys())
     return (common_ancestors, common_ancestor_to_children)
@@ -209,19 +188,12 @@ def find_common_ancestors(
 def find_variable_causal_ancestors(variable: AbstractVariable, gr: Graph) -> Set[str]:
     causal_ancestors = set()
 
-    causal_sub = gr.get_causal_subgraph()
-    if not isinstance(variable, AbstractVariable):
-        import pdb
-
-        pdb.set_trace()
     assert isinstance(variable, AbstractVariable)
     if gr.has_variable(variable):
-        pred = causal_sub._graph.predecessors(variable.name)  # Returns an iterator obj
-        # Add each predecessor to the set
-        for p in pred:
-            causal_ancestors.add(p)
-            ancestors = find_variable_causal_ancestors(gr.get_variable(p), gr)
-            causal_ancestors = causal_ancestors.union(ancestors)
+        # All the variables with a causal path to @param variable
+        causal_ancestors = gr.get_reachability_index("causal").get_ancestors(
+            variable.name
+        )
     # Else: There is nothing to add to the set of causal ancestors
     return causal_ancestors
 
@@ -647,30 +619,27 @@ def construct_random_effects_for_composed_measures(
     # Go through the selected main effects, looking only for Measures
     for v in variables:
         if isinstance(v, Measure):
-            for r in v.relationships:
-                if isinstance(r, Has):
-                    v_unit = gr.get_identifier_for_variable(v)
-                    (n0, n1, edge_data) = gr.get_edge(
-                        start=v_unit, end=v, edge_type="has"
-                    )
-                    v_unit_has_obj = edge_data["edge_obj"]
-                    assert isinstance(v_unit_has_obj.repetitions, NumberValue)
-                    # Is variable v within-subjects?
-                    if v_unit_has_obj.repetitions.is_greater_than_one():
-                        # Does variable v have multiple instances of the unit r.measure?
-                        if r.repetitions.is_greater_than_one():
-                            # If so, for each instance of v_unit account for clusters in r.measure observations within each instance of v.
-                            rs = RandomSlope(iv=v, groups=v_unit)
-                            random_effects.add(rs)
-                        # There is only one observation of r.measure per
-                        # each v. This is like saying r.measure and v are
-                        # 1:1, meaning they are redundant measures of each
-                        # other. By transitive property, v_unit has multiple
-                        # r.measure instances.
-                        else:
-                            assert v_unit_has_obj.repetitions.is_equal_to_one()
-                            ri = RandomIntercept(groups=v_unit)
-                            random_effects.add(ri)
+            for r in v.get_relationships(Has):
+                v_unit = gr.get_identifier_for_variable(v)
+                (n0, n1, edge_data) = gr.get_edge(start=v_unit, end=v, edge_type="has")
+                v_unit_has_obj = edge_data["edge_obj"]
+                assert isinstance(v_unit_has_obj.repetitions, NumberValue)
+                # Is variable v within-subjects?
+                if v_unit_has_obj.repetitions.is_greater_than_one():
+                    # Does variable v have multiple instances of the unit r.measure?
+                    if r.repetitions.is_greater_than_one():
+                        # If so, for each instance of v_unit account for clusters in r.measure observations within each instance of v.
+                        rs = RandomSlope(iv=v, groups=v_unit)
+                        random_effects.add(rs)
+                    # There is only one observation of r.measure per
+                    # each v. This is like saying r.measure and v are
+                    # 1:1, meaning they are redundant measures of each
+                    # other. By transitive property, v_unit has multiple
+                    # r.measure instances.
+                    else:
+                        assert v_unit_has_obj.repetitions.is_equal_to_one()
+                        ri = RandomIntercept(groups=v_unit)
+                        random_effects.add(ri)
 
     return random_effects
 
@@ -751,10 +720,9 @@ def find_largest_subset_of_variables_that_vary_within_unit(
         # Is the variable a unit variable?
         if v == v_unit:
             # Get nesting parent
-            for r in v.relationships:
-                if isinstance(r, Nests):
-                    if r.base == v:
-                        subset.add(r.group)
+            for r in v.get_relationships(Nests):
+                if r.base == v:
+                    subset.add(r.group)
         else:
             assert gr.has_variable(variable=v)
             v_unit = gr.get_identifier_for_variable(variable=v)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+"""
+On-disk cache of rendered graph visualizations.
+
+Renders are keyed by a fingerprint of what is drawn (see Graph.get_render_fingerprint) and the options used to draw it,
+so rendering an unchanged graph again copies the cached file instead of invoking Graphviz.
+"""
+
+default_max_render_cache_size = 256 * 1024 * 1024  # bytes
+
+
+# @returns hex digest identifying a render of the graph with @param fingerprint in @param format, drawn with the
+# @param style, @param color, and @param label dicts (see Graph._get_dot_graph)
+def render_cache_key(
+    fingerprint: str,
+    format: str,
+    style: dict = None,
+    color: dict = None,
+    label: dict = None,
+) -> str:
+    options = [fingerprint, format, style or {}, color or {}, label or {}]
+    encoded = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class RenderCache(object):
+    """A directory of rendered graphs, shared by every process that uses the same directory
+
+    Parameters
+    ----------
+    directory : str
+        Where to store rendered files. Created if it does not exist.
+    max_size : int
+        Largest total size, in bytes, of the rendered files kept. When a new render makes the cache larger, the least
+        recently used renders are removed. Defaults to 256MB.
+
+    """
+
+    directory: str
+    max_size: int
+
+    def __init__(self, directory: str, max_size: int = default_max_render_cache_size):
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    # @returns path of the render with @param key, whether or not it is cached
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    # Copy the render with @param key to @param path
+    # @returns True if the render was cached; False otherwise
+    def copy_to(self, key: str, path: str) -> bool:
+        cached = self.get_path(key)
+        try:
+            shutil.copyfile(cached, path)
+        except FileNotFoundError:
+            return False
+        # Mark as recently used, so eviction keeps it
+        try:
+            os.utime(cached)
+        except FileNotFoundError:
+            pass
+        return True
+
+    # Add the render at @param path to the cache with @param key, then evict renders until the cache fits in max_size
+    # Written to a temporary file first, so other processes never copy a partially written render
+    def store(self, key: str, path: str):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, open(path, "rb") as source:
+                shutil.copyfileobj(source, f)
+                pass
+            os.replace(temp_path, self.get_path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    # @returns list of (last used time, size, path) for each cached render, least recently used first
+    def get_entries(self) -> list:
+        entries = list()
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # Evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            pass
+        return sorted(entries)
+
+    # @returns total size, in bytes, of the cached renders
+    def get_size(self) -> int:
+        return sum(size for (_, size, _) in self.get_entries())
+
+    # Remove the least recently used renders until the cache is at most @param max_size bytes (defaults to max_size)
+    def evict(self, max_size: int = None):
+        max_size = self.max_size if max_size is None else max_size
+        entries = self.get_entries()
+        size = sum(size for (_, size, _) in entries)
+        for (_, entry_size, path) in entries:
+            if size <= max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            pass
+
+    def clear(self):
+        self.evict(max_size=0)
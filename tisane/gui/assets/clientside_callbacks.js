@@ -0,0 +1,155 @@
+// Callbacks for transitions that only change how the GUI looks (progress bars, tabs)
+// They run in the browser, so they never make a request to the server
+// Registered in callbacks.py with ClientsideFunction("tisane", <function name>)
+
+var tabs = ["tab-1", "tab-2", "tab-3", "tab-4"];
+// Tab that each continue button goes to
+var continueButtonTabs = {
+    "continue-to-interaction-effects": "tab-2",
+    "continue-to-random-effects": "tab-3",
+    "continue-to-family-link-functions": "tab-4",
+};
+// Highest active tab once code has been generated, so every progress bar is marked done
+var codeGeneratedTabIndex = 5;
+
+// @returns id of the component that triggered the callback, or false when the page loads
+function getTriggered() {
+    var triggered = window.dash_clientside.callback_context.triggered;
+    if (!triggered || triggered.length === 0) {
+        return false;
+    }
+    return triggered[0].prop_id.split(".")[0];
+}
+
+// @returns id of the callback's input at @param index
+function getInputId(index) {
+    return window.dash_clientside.callback_context.inputs_list[index].id;
+}
+
+// @param highest is the highest active tab index stored before @param activeTab became active
+function getHighestActiveTab(highest, activeTab) {
+    return Math.max(highest === null || highest === undefined ? -1 : highest, tabs.indexOf(activeTab));
+}
+
+function preventUpdate() {
+    throw window.dash_clientside.PreventUpdate;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    tisane: {
+        continueToTab: function () {
+            var triggered = getTriggered();
+            if (triggered && triggered in continueButtonTabs) {
+                return continueButtonTabs[triggered];
+            }
+            preventUpdate();
+        },
+
+        updateHighestActiveTab: function (activeTab, modalData, highest) {
+            if (getTriggered() === "modal-data-store" && modalData && JSON.parse(modalData).path) {
+                return codeGeneratedTabIndex;
+            }
+            var newHighest = getHighestActiveTab(highest, activeTab);
+            if (newHighest === highest) {
+                preventUpdate();
+            }
+            return newHighest;
+        },
+
+        // @returns @param activeTab if its body has not been built yet
+        tabToRender: function (activeTab, unrenderedTabs) {
+            if (unrenderedTabs && unrenderedTabs.indexOf(activeTab) >= 0) {
+                return activeTab;
+            }
+            preventUpdate();
+        },
+
+        mainEffectsProgressAnimated: function (nClicksMain, nClicksInteraction, activeTab) {
+            var triggered = getTriggered();
+            if (!triggered) {
+                return [true, true];
+            }
+            if (triggered === "tabs") {
+                return [activeTab === "tab-1", activeTab === "tab-1"];
+            }
+            return [false, false];
+        },
+
+        mainEffectsProgressColor: function (nClicksMain, activeTab) {
+            var triggered = getTriggered();
+            if (triggered && (triggered === "continue-to-interaction-effects" || activeTab !== "tab-1")) {
+                return "success";
+            }
+            preventUpdate();
+        },
+
+        // Inputs: the continue button leaving the progress bar's tab, then the tabs
+        progressAnimated: function (nClicks, activeTab, highest) {
+            var progressTab = tabs[tabs.indexOf(continueButtonTabs[getInputId(0)]) - 1];
+            var triggered = getTriggered();
+            if (!triggered) {
+                return [true, true];
+            }
+            if (triggered === "tabs") {
+                var isActive =
+                    activeTab === progressTab ||
+                    (getHighestActiveTab(highest, activeTab) >= tabs.indexOf(progressTab) &&
+                        tabs.indexOf(activeTab) < tabs.indexOf(progressTab));
+                return [isActive, isActive];
+            }
+            return [false, false];
+        },
+
+        // Inputs: the continue button leaving the progress bar's tab, the one going to it, then the tabs
+        progressColor: function (nClicksTo, nClicksFrom, activeTab, highest) {
+            var continueTo = getInputId(0);
+            var continueFrom = getInputId(1);
+            var progressTab = continueButtonTabs[continueFrom];
+            var triggered = getTriggered();
+            if (triggered) {
+                if (
+                    triggered === continueTo ||
+                    tabs.indexOf(activeTab) > tabs.indexOf(progressTab) ||
+                    getHighestActiveTab(highest, activeTab) > tabs.indexOf(progressTab)
+                ) {
+                    return "success";
+                }
+                if (triggered === continueFrom || progressTab === activeTab) {
+                    return "primary";
+                }
+            }
+            preventUpdate();
+        },
+
+        familyLinkFunctionsProgressAnimated: function (nClicks, activeTab, highest) {
+            var triggered = getTriggered();
+            if (!triggered) {
+                preventUpdate();
+            }
+            if (triggered === "tabs") {
+                var isActive =
+                    activeTab === "tab-4" ||
+                    (getHighestActiveTab(highest, activeTab) >= tabs.indexOf("tab-4") &&
+                        tabs.indexOf(activeTab) < tabs.indexOf("tab-4"));
+                return [isActive, isActive];
+            }
+            if (triggered === "continue-to-family-link-functions") {
+                return [true, true];
+            }
+            return [false, false];
+        },
+
+        familyLinkFunctionsProgressColor: function (nClicksGenerate, nClicksContinue, activeTab, highest) {
+            var triggered = getTriggered();
+            if (triggered) {
+                if (triggered === "generate-code" || getHighestActiveTab(highest, activeTab) > tabs.indexOf(activeTab)) {
+                    return "success";
+                }
+                if (triggered === "continue-to-family-link-functions" || activeTab === "tab-4") {
+                    return "primary";
+                }
+            }
+            preventUpdate();
+        },
+    },
+});
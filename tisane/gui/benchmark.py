@@ -0,0 +1,252 @@
+"""
+Benchmark for how the Tisane GUI scales with the number of candidate effects.
+
+Generates synthetic inputs with 10, 100 and 1000 main effects (and as many interaction effects), builds the app, and clicks main effect checkboxes through Flask's test client, so no browser or server is needed.
+The bodies of the tabs after the first are timed separately, since they are only built when an analyst opens those tabs.
+Also counts the requests a typical analyst's session makes to the server, by following the app's callback graph.
+
+Run with: python -m tisane.gui.benchmark [--sizes 10 100 1000] [--clicks 20]
+"""
+from tisane.gui.gui import TisaneGUI
+from tisane.gui.gui_components import getPatternId
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+defaultSizes = [10, 100, 1000]
+defaultClicks = 20
+
+# A typical analyst's session: each step lists the (component id, property) pairs the analyst changes
+# Pattern-matching ids are given by their type
+userSessionSteps = [
+    [({"type": "main-effect-checkbox"}, "checked")],
+    [({"type": "main-effect-checkbox"}, "checked")],
+    [({"type": "main-effect-checkbox"}, "checked")],
+    [("continue-to-interaction-effects", "n_clicks")],
+    [({"type": "interaction-effect-checkbox"}, "checked")],
+    [({"type": "interaction-effect-checkbox"}, "checked")],
+    [("continue-to-random-effects", "n_clicks")],
+    [("continue-to-family-link-functions", "n_clicks")],
+    [("family-options", "value")],
+    [("tabs", "active_tab")],
+    [("tabs", "active_tab")],
+    [("generate-code", "n_clicks")],
+    [("close-code-generated-modal", "n_clicks")],
+]
+
+syntheticFamilyLinkFunctions = {
+    "GaussianFamily": ["IdentityLink", "LogLink", "InverseLink"],
+    "PoissonFamily": ["LogLink", "IdentityLink", "SquarerootLink"],
+}
+
+
+# @returns dict in the format of the GUI's input json with @param numEffects main effects and @param numEffects interaction effects
+def createSyntheticInput(numEffects: int) -> dict:
+    measures = ["Measure_{}".format(i) for i in range(numEffects)]
+    interactions = [
+        "{}*{}".format(measures[i], measures[(i + 1) % numEffects])
+        for i in range(numEffects)
+    ]
+    return {
+        "input": {
+            "query": {"DV": "Dependent_variable", "IVs": measures[:2]},
+            "generated main effects": measures,
+            "generated interaction effects": interactions,
+            "generated random effects": {},
+            "generated family, link functions": syntheticFamilyLinkFunctions,
+            "associative intermediary main effects": [],
+            "measures to units": {
+                v: "Unit" for v in ["Dependent_variable"] + measures + interactions
+            },
+            "explanations": {
+                **{m: ["Explanation for query"] for m in measures},
+                **{ie: ["Explanation for interaction effects"] for ie in interactions},
+            },
+        }
+    }
+
+
+# @returns id of the checkbox as the Dash renderer sends it in "changedPropIds"
+def stringifyId(id: dict) -> str:
+    return json.dumps(id, sort_keys=True, separators=(",", ":"))
+
+
+# @returns the body of the request the Dash renderer sends when the checkbox with @param clickedId (a generated component id) is clicked
+def createClickRequest(comp, callbackKey: str, clickedId: str, checked: bool) -> dict:
+    checkboxes = [
+        {
+            "id": getPatternId("main effects", id),
+            "property": "checked",
+            "value": checked if id == clickedId else False,
+        }
+        for id in comp.getMainEffectCheckboxIds()
+    ]
+    return {
+        "output": callbackKey,
+        "outputs": [
+            {"id": "added-main-effects", "property": "children"},
+            {"id": "added-main-effects-store", "property": "data"},
+        ],
+        "inputs": [checkboxes],
+        "changedPropIds": [
+            stringifyId(getPatternId("main effects", clickedId)) + ".checked"
+        ],
+        "state": [],
+    }
+
+
+# @returns list of (component id, property) pairs in a callback_map key or input list
+def parseCallbackProps(props) -> list:
+    parsed = []
+    for prop in props:
+        if isinstance(prop, dict):
+            id, property = prop["id"], prop["property"]
+        else:
+            id, property = prop.rsplit(".", 1)
+        parsed.append((json.loads(id) if id.startswith("{") else id, property))
+    return parsed
+
+
+def isSameProp(a, b) -> bool:
+    (idA, propertyA), (idB, propertyB) = a, b
+    if isinstance(idA, dict) or isinstance(idB, dict):
+        return (
+            isinstance(idA, dict)
+            and isinstance(idB, dict)
+            and idA["type"] == idB["type"]
+            and propertyA == propertyB
+        )
+    return a == b
+
+
+# Follow @param app's callback graph through @param steps (default: userSessionSteps), assuming every callback changes its outputs
+# @returns tuple: (requests to the server, callbacks run in the browser), including the calls made when the page loads
+def countSessionRequests(app, steps: list = None) -> tuple:
+    steps = userSessionSteps if steps is None else steps
+    preventInitialCall = {
+        spec["output"]: spec["prevent_initial_call"] for spec in app._callback_list
+    }
+    callbacks = []
+    for key, callback in app.callback_map.items():
+        outputs = key[2:-2].split("...") if key.startswith("..") else [key]
+        callbacks.append(
+            {
+                "inputs": parseCallbackProps(callback["inputs"]),
+                "outputs": parseCallbackProps(outputs),
+                "server": "callback" in callback,
+                "initial call": not preventInitialCall.get(key),
+            }
+        )
+        pass
+
+    # Every callback runs once when the page loads, unless it prevents its initial call
+    serverRequests = sum(c["server"] and c["initial call"] for c in callbacks)
+    clientsideCalls = sum(not c["server"] and c["initial call"] for c in callbacks)
+    for changed in steps:
+        fired = set()
+        while changed:
+            triggered = [
+                i
+                for i, c in enumerate(callbacks)
+                if i not in fired
+                and any(isSameProp(a, b) for a in c["inputs"] for b in changed)
+            ]
+            fired.update(triggered)
+            changed = [o for i in triggered for o in callbacks[i]["outputs"]]
+            serverRequests += sum(callbacks[i]["server"] for i in triggered)
+            clientsideCalls += sum(not callbacks[i]["server"] for i in triggered)
+            pass
+        pass
+    return (serverRequests, clientsideCalls)
+
+
+# Build the GUI for @param numEffects synthetic effects and click @param clicks main effect checkboxes
+# @returns dict of measurements: times are in milliseconds, sizes in bytes
+def benchmarkGui(numEffects: int, clicks: int = defaultClicks) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        inputPath = os.path.join(directory, "input.json")
+        with open(inputPath, "w") as f:
+            f.write(json.dumps(createSyntheticInput(numEffects)))
+            pass
+
+        start = time.perf_counter()
+        gui = TisaneGUI()
+        app = gui.create_app(inputPath)
+        buildTime = time.perf_counter() - start
+        comp = gui.components
+
+    client = app.server.test_client()
+    start = time.perf_counter()
+    layout = client.get("/_dash-layout")
+    layoutTime = time.perf_counter() - start
+
+    callbackKey = next(
+        key for key in app.callback_map if "added-main-effects.children" in key
+    )
+    checkboxIds = comp.getMainEffectCheckboxIds()
+    clickTimes = []
+    requestSizes = []
+    for i in range(clicks):
+        body = json.dumps(
+            createClickRequest(
+                comp, callbackKey, checkboxIds[i % len(checkboxIds)], i % 2 == 0
+            )
+        )
+        start = time.perf_counter()
+        response = client.post(
+            "/_dash-update-component", data=body, content_type="application/json"
+        )
+        clickTimes.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data
+        requestSizes.append(len(body))
+        pass
+
+    # Tab bodies are built when their tabs are first opened, not when the app starts
+    start = time.perf_counter()
+    for tabId in comp.getLazyTabs():
+        comp.buildLazyTabBody(tabId)
+        pass
+    tabBodiesTime = time.perf_counter() - start
+
+    serverRequests, clientsideCalls = countSessionRequests(app)
+    return {
+        "effects": numEffects,
+        "callbacks": len(app.callback_map),
+        "callback inputs": sum(
+            len(c["inputs"]) for c in app.callback_map.values()
+        ),
+        "build (ms)": 1000 * buildTime,
+        "layout (ms)": 1000 * layoutTime,
+        "layout size": len(layout.data),
+        "tab bodies (ms)": 1000 * tabBodiesTime,
+        "click median (ms)": 1000 * statistics.median(clickTimes),
+        "click request size": int(statistics.mean(requestSizes)),
+        "session requests": serverRequests,
+        "clientside calls": clientsideCalls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=defaultSizes)
+    parser.add_argument("--clicks", type=int, default=defaultClicks)
+    args = parser.parse_args()
+
+    rows = [benchmarkGui(n, clicks=args.clicks) for n in args.sizes]
+    columns = list(rows[0].keys())
+    print("  ".join("{:>18}".format(c) for c in columns))
+    for row in rows:
+        print(
+            "  ".join(
+                "{:>18.1f}".format(v) if isinstance(v, float) else "{:>18}".format(v)
+                for v in row.values()
+            )
+        )
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
-from dash.dependencies import Output, Input, State, ALL, MATCH
+from dash.dependencies import Output, Input, State, ALL, MATCH, ClientsideFunction
 import dash
 from dash.exceptions import PreventUpdate
 import dash_html_components as html
-from tisane.gui.gui_components import GUIComponents
+from tisane.gui.gui_components import GUIComponents, getPatternId
 from tisane.gui.family_link_function_callbacks import createFamilyLinkFunctionCallbacks
 from tisane.gui.random_effects_callbacks import createRandomEffectsCallbacks
 import json
-from tisane.gui.gui_helpers import getTriggeredFromContext
+from tisane.gui.gui_helpers import getTriggeredFromContext, getTriggeredPatternValues
 import logging
 
 
@@ -32,6 +32,7 @@ def createCallbacks(app, comp: GUIComponents = None):
         comp,
     )
     createTabsCallbacks(app)
+    createLazyTabCallbacks(app, comp)
     createMainEffectsChecklistCallbacks(app, comp)
     createFamilyLinkFunctionsProgressCallbacks(app, comp)
     createInteractionEffectsChecklistCallbacks(app, comp)
@@ -73,281 +74,191 @@ def createTransitionCallback(
 
 
 def createTabsCallbacks(app):
-    logger = logging.getLogger("werkzeug")
-
-    def continueCallback(fromMain, fromInteraction, fromRandom):
-        ctx = dash.callback_context
-        triggered = getTriggeredFromContext(ctx)
-        logger.debug("Continue callback: {}".format(triggered))
-        if triggered:
-            if triggered == "continue-to-interaction-effects":
-                return "tab-2"
-            elif triggered == "continue-to-random-effects":
-                return "tab-3"
-            elif triggered == "continue-to-family-link-functions":
-                return "tab-4"
-        raise PreventUpdate
-
-    app.callback(
+    app.clientside_callback(
+        ClientsideFunction("tisane", "continueToTab"),
         Output("tabs", "active_tab"),
         Input("continue-to-interaction-effects", "n_clicks"),
         Input("continue-to-random-effects", "n_clicks"),
         Input("continue-to-family-link-functions", "n_clicks"),
-    )(continueCallback)
-
-
-mytabs = ["tab-1", "tab-2", "tab-3", "tab-4"]
+    )
+    # The highest tab the analyst has reached, which the progress bars are colored by
+    app.clientside_callback(
+        ClientsideFunction("tisane", "updateHighestActiveTab"),
+        Output("highest-active-tab-store", "data"),
+        Input("tabs", "active_tab"),
+        Input("modal-data-store", "data"),
+        State("highest-active-tab-store", "data"),
+    )
 
 
-def createMainEffectsChecklistCallbacks(app, comp: GUIComponents = None):
-    logger = logging.getLogger("werkzeug")
-    mainEffectCompIds = comp.getMainEffectCheckboxIds()
-    inputs = [Input(id, "checked") for id in mainEffectCompIds]
-    states = [State(id, "id") for id in mainEffectCompIds]
+# Build a tab's body the first time the tab is opened
+# Switching to a tab that has already been built is handled in the browser and makes no request
+def createLazyTabCallbacks(app, comp: GUIComponents = None):
+    if not comp:
+        return
+    lazyTabs = comp.getLazyTabs()
+    app.clientside_callback(
+        ClientsideFunction("tisane", "tabToRender"),
+        Output("tab-to-render-store", "data"),
+        Input("tabs", "active_tab"),
+        State("unrendered-tabs-store", "data"),
+        prevent_initial_call=True,
+    )
 
     @app.callback(
-        Output("added-main-effects", "children"),
-        Output("added-main-effects-store", "data"),
-        inputs,
-        states,
+        [Output("{}-body".format(tab), "children") for tab in lazyTabs]
+        + [Output("unrendered-tabs-store", "data")],
+        Input("tab-to-render-store", "data"),
+        State("unrendered-tabs-store", "data"),
+        prevent_initial_call=True,
     )
-    def addVariables(*args):
-        if not comp:
-            logger.warning("Cannot update added-main-effects")
+    def renderTab(tabId, unrenderedTabs):
+        if not tabId or tabId not in (unrenderedTabs or []):
             raise PreventUpdate
+        bodies = [
+            comp.buildLazyTabBody(tab) if tab == tabId else dash.no_update
+            for tab in lazyTabs
+        ]
+        return bodies + [[tab for tab in unrenderedTabs if tab != tabId]]
 
-        # print(options)
-        if not args:
-            raise PreventUpdate
-        assert (
-            len(args) % 2 == 0
-        ), "Weird length of args for added-main-effects callback"
-        half = int(len(args) / 2)
-        inputs = args[:half]
-        states = args[half:]
-        options = []
-        for i in range(len(inputs)):
-            id = states[i]
-            checked = inputs[i]
-            if checked and comp.hasMainEffectForComponentId(id):
-                mainEffect = comp.getMainEffectFromComponentId(id)
-                if mainEffect not in comp.output["main effects"]:
-                    comp.output["main effects"].append(mainEffect)
-                options.append(mainEffect)
-                pass
-            elif not checked and comp.hasMainEffectForComponentId(id):
-                mainEffect = comp.getMainEffectFromComponentId(id)
-                if mainEffect in comp.output["main effects"]:
-                    comp.output["main effects"].remove(mainEffect)
-            pass
-        newChildren = [html.Li(o) for o in options]
-        logger.debug("New children: {}".format(newChildren))
-        return newChildren, json.dumps(comp.output)
 
+def createMainEffectsChecklistCallbacks(app, comp: GUIComponents = None):
+    createEffectsChecklistCallbacks(
+        app,
+        comp,
+        "main effects",
+        Output("added-main-effects", "children"),
+        Output("added-main-effects-store", "data"),
+    )
     pass
 
 
 def createInteractionEffectsChecklistCallbacks(app, comp: GUIComponents = None):
-    logger = logging.getLogger("werkzeug")
     if comp and comp.hasInteractionEffects():
-        interactionEffectCompIds = comp.getInteractionEffectCheckboxIds()
-        inputs = [Input(id, "checked") for id in interactionEffectCompIds]
-        states = [State(id, "id") for id in interactionEffectCompIds]
-
-        def addVariables(*args):
-            if not comp:
-                logger.warning("Cannot update added-interaction-effects")
-                raise PreventUpdate
-            if not args:
-                raise PreventUpdate
-            assert (
-                len(args) % 2 == 0
-            ), "Weird length of args for added-interaction-effects callback"
-            half = int(len(args) / 2)
-            inputs = args[:half]
-            states = args[half:]
-            options = []
-            for i in range(len(inputs)):
-                id = states[i]
-                checked = inputs[i]
-                if checked and comp.hasInteractionEffectForComponentId(id):
-                    interactionEffect = comp.getInteractionEffectFromComponentId(id)
-                    if interactionEffect not in comp.output["interaction effects"]:
-                        comp.output["interaction effects"].append(interactionEffect)
-                    options.append(interactionEffect)
-                    pass
-                elif not checked and comp.hasInteractionEffectForComponentId(id):
-                    interactionEffect = comp.getInteractionEffectFromComponentId(id)
-                    if interactionEffect in comp.output["interaction effects"]:
-                        comp.output["interaction effects"].remove(interactionEffect)
-                    pass
-                pass
-            newChildren = [html.Li(o) for o in options]
-            logger.debug("New children: {}".format(newChildren))
-            return newChildren, json.dumps(comp.output)
-
-        app.callback(
+        createEffectsChecklistCallbacks(
+            app,
+            comp,
+            "interaction effects",
             Output("added-interaction-effects", "children"),
             Output("added-interaction-effects-store", "data"),
-            inputs,
-            states,
-        )(addVariables)
+        )
+    pass
 
 
-def createFamilyLinkFunctionsProgressCallbacks(app, comp: GUIComponents = None):
+# One callback listens to every checkbox of @param kind ("main effects" or "interaction effects") with an ALL pattern
+# Only the checkboxes that triggered the callback are applied to comp.output, so each click costs the same no matter how many effects there are
+def createEffectsChecklistCallbacks(
+    app, comp: GUIComponents, kind: str, childrenOutput: Output, storeOutput: Output
+):
     logger = logging.getLogger("werkzeug")
-
-    def animatedCallback(nclicks, active_tab):
-        ctx = dash.callback_context
-        if not ctx.triggered:
+    if kind == "main effects":
+        hasEffect = comp.hasMainEffectForComponentId
+        getEffect = comp.getMainEffectFromComponentId
+        order = comp.getGeneratedMainEffects()
+    else:
+        hasEffect = comp.hasInteractionEffectForComponentId
+        getEffect = comp.getInteractionEffectFromComponentId
+        order = comp.getGeneratedInteractionEffects()
+    # Effects are listed in the same order as their checkboxes
+    positions = {effect: i for i, effect in enumerate(order)}
+
+    def addVariables(checked):
+        if not comp:
+            logger.warning("Cannot update added {}".format(kind))
             raise PreventUpdate
-        logger.debug(ctx.triggered)
-        triggered = getTriggeredFromContext(ctx)
-        if triggered == "tabs":
-            mybool = active_tab == "tab-4" or (
-                comp
-                and comp.highestActiveTab >= mytabs.index("tab-4")
-                and mytabs.index(active_tab) < mytabs.index("tab-4")
-            )
-            return mybool, mybool
-        if triggered == "continue-to-family-link-functions":
-            return True, True
-        return False, False
+        ctx = dash.callback_context
+        changed = getTriggeredPatternValues(ctx)
+        if changed is None:
+            # Page load: read every checkbox once
+            changed = {
+                input["id"]["index"]: input.get("value")
+                for input in ctx.inputs_list[0]
+            }
+            pass
+
+        added = comp.output[kind]
+        for id, isChecked in changed.items():
+            if not hasEffect(id):
+                continue
+            effect = getEffect(id)
+            if isChecked and effect not in added:
+                added.append(effect)
+            elif not isChecked and effect in added:
+                added.remove(effect)
+            pass
+        newChildren = [html.Li(e) for e in sorted(added, key=positions.get)]
+        logger.debug("New children: {}".format(newChildren))
+        return newChildren, json.dumps(comp.output)
 
     app.callback(
+        childrenOutput,
+        storeOutput,
+        Input(getPatternId(kind, ALL), "checked"),
+    )(addVariables)
+    pass
+
+
+def createFamilyLinkFunctionsProgressCallbacks(app, comp: GUIComponents = None):
+    app.clientside_callback(
+        ClientsideFunction("tisane", "familyLinkFunctionsProgressAnimated"),
         Output("family-link-functions-progress", "animated"),
         Output("family-link-functions-progress", "striped"),
         Input("continue-to-family-link-functions", "n_clicks"),
         Input("tabs", "active_tab"),
-    )(animatedCallback)
-
-    def colorCallback(nclicksto, nclicksfrom, active_tab):
-        ctx = dash.callback_context
-        triggered = getTriggeredFromContext(ctx)
-        if comp.highestActiveTab < mytabs.index(active_tab):
-            comp.highestActiveTab = mytabs.index(active_tab)
-        logger.debug(
-            "{}, {}: {}, {}".format(
-                "tab-4", "family-link-functions-progress", triggered, active_tab
-            )
-        )
-        if triggered:
-            if triggered == "generate-code" or (
-                comp and comp.highestActiveTab > mytabs.index(active_tab)
-            ):
-                return "success"
-            if triggered == "continue-to-family-link-functions" or mytabs.index(
-                active_tab
-            ) == mytabs.index("tab-4"):
-                return "primary"
-        raise PreventUpdate
+        State("highest-active-tab-store", "data"),
+    )
 
-    app.callback(
+    app.clientside_callback(
+        ClientsideFunction("tisane", "familyLinkFunctionsProgressColor"),
         Output("family-link-functions-progress", "color"),
         Input("generate-code", "n_clicks"),
         Input("continue-to-family-link-functions", "n_clicks"),
         Input("tabs", "active_tab"),
-    )(colorCallback)
+        State("highest-active-tab-store", "data"),
+    )
 
 
+# @param triggered_tab is the tab whose progress bar has id @param progressid
+# @param continuefrom_id is the button that goes to @param triggered_tab, and @param continueto_id is the button that leaves it
+# The clientside functions find the tab from the continue buttons' ids, so the inputs must stay in this order
 def createProgressBarCallbacks(
     app, triggered_tab, progressid, continuefrom_id, continueto_id, comp: GUIComponents
 ):
-    logger = logging.getLogger("werkzeug")
-
-    def animatedCallback(nclicks, active_tab):
-        ctx = dash.callback_context
-        index = mytabs.index(active_tab)
-        if not ctx.triggered:
-            return True, True
-        logger.debug(ctx.triggered)
-        triggered = getTriggeredFromContext(ctx)
-        if triggered == "tabs":
-            myBool = active_tab == triggered_tab or (
-                comp
-                and comp.highestActiveTab >= mytabs.index(triggered_tab)
-                and mytabs.index(active_tab) < mytabs.index(triggered_tab)
-            )
-            return myBool, myBool
-        return False, False
-
-    app.callback(
+    app.clientside_callback(
+        ClientsideFunction("tisane", "progressAnimated"),
         Output(progressid, "animated"),
         Output(progressid, "striped"),
         Input(continueto_id, "n_clicks"),
         Input("tabs", "active_tab"),
-    )(animatedCallback)
-
-    def colorCallback(nclicksto, nclicksfrom, active_tab):
-        ctx = dash.callback_context
-        triggered = getTriggeredFromContext(ctx)
-        tabIndex = mytabs.index(active_tab)
-        if comp and comp.highestActiveTab < tabIndex:
-            comp.highestActiveTab = tabIndex
-        logger.debug(
-            "{}, {}: {}, {}".format(triggered_tab, progressid, triggered, active_tab)
-        )
-        if triggered:
-            if (
-                triggered == continueto_id
-                or mytabs.index(active_tab) > mytabs.index(triggered_tab)
-                or (
-                    comp
-                    and comp.highestActiveTab >= 0
-                    and comp.highestActiveTab > mytabs.index(triggered_tab)
-                )
-            ):
-                return "success"
-            if triggered == continuefrom_id or mytabs.index(
-                triggered_tab
-            ) == mytabs.index(active_tab):
-                return "primary"
-        raise PreventUpdate
+        State("highest-active-tab-store", "data"),
+    )
 
-    app.callback(
+    app.clientside_callback(
+        ClientsideFunction("tisane", "progressColor"),
         Output(progressid, "color"),
         Input(continueto_id, "n_clicks"),
         Input(continuefrom_id, "n_clicks"),
         Input("tabs", "active_tab"),
-    )(colorCallback)
+        State("highest-active-tab-store", "data"),
+    )
 
 
 def createMainEffectsProgressBarCallbacks(app, comp: GUIComponents = None):
-    logger = logging.getLogger("werkzeug")
-
-    def animatedCallback(nclicks_main, nclicks_interaction, active_tab):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            return True, True
-        logger.debug(ctx.triggered)
-        triggered = getTriggeredFromContext(ctx)
-        if triggered == "tabs":
-            return active_tab == "tab-1", active_tab == "tab-1"
-        return False, False
-
-    app.callback(
+    app.clientside_callback(
+        ClientsideFunction("tisane", "mainEffectsProgressAnimated"),
         Output("main-effects-progress", "animated"),
         Output("main-effects-progress", "striped"),
         Input("continue-to-interaction-effects", "n_clicks"),
         Input("continue-to-random-effects", "n_clicks"),
         Input("tabs", "active_tab"),
-    )(animatedCallback)
-
-    def colorCallback(nclicks_main, active_tab):
-        if comp and comp.highestActiveTab < mytabs.index(active_tab):
-            comp.highestActiveTab = mytabs.index(active_tab)
-        ctx = dash.callback_context
-        triggered = getTriggeredFromContext(ctx)
-        if triggered:
-            if triggered == "continue-to-interaction-effects" or active_tab != "tab-1":
-                return "success"
-        raise PreventUpdate
+    )
 
-    app.callback(
+    app.clientside_callback(
+        ClientsideFunction("tisane", "mainEffectsProgressColor"),
         Output("main-effects-progress", "color"),
         Input("continue-to-interaction-effects", "n_clicks"),
         Input("tabs", "active_tab"),
-    )(colorCallback)
+    )
 
 
 def createButtonCallback(app):
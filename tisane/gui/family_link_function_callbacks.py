@@ -5,11 +5,10 @@ import dash_html_components as html
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 from tisane.gui.gui_components import GUIComponents, separateByUpperCamelCase
+from tisane.family import get_link_transforms
 import numpy as np
 import plotly.graph_objects as go
 import tweedie
-from scipy.special import logit
-from scipy import stats
 import pandas as pd
 from tisane.gui.gui_helpers import simulate_data_dist, getTriggeredFromContext
 import json
@@ -21,9 +20,25 @@ def createFamilyLinkFunctionCallbacks(app, comp: GUIComponents = None):
     createLinkFunctionCallbacks(app, comp)
     createChartCallbacks(app, comp)
     createGenerateCodeCallback(app, comp)
+    createNormalityTestCallbacks(app, comp)
     pass
 
 
+def createNormalityTestCallbacks(app, comp: GUIComponents = None):
+    @app.callback(
+        [
+            Output("normality-tests-section", "children"),
+            Output("normality-tests-interval", "disabled"),
+        ],
+        Input("normality-tests-interval", "n_intervals"),
+    )
+    def update_normality_tests(n_intervals):
+        results = comp.getNormalityTestResults()
+        if results is None:
+            raise PreventUpdate
+        return comp.layoutNormalityTests(results), True
+
+
 def createGenerateCodeCallback(app, comp: GUIComponents = None):
     @app.callback(
         Output("modal-data-store", "data"), Input("generate-code", "n_clicks")
@@ -33,7 +48,6 @@ def createGenerateCodeCallback(app, comp: GUIComponents = None):
             result = comp.generateCode()
             if result:
                 resultObject = {"path": str(result)}
-                comp.highestActiveTab = 5
             else:
                 resultObject = {
                     "error": "No code generator provided. Did you not run the GUI using `tisane.infer_statistical_model_from_design`?"
@@ -169,32 +183,7 @@ def createChartCallbacks(app, comp: GUIComponents = None):
             raise PreventUpdate
 
 
+# Apply the link function named @param link_fact to @param data
+# Uses the same vectorized transforms as the link classes in tisane.family
 def transform_data_from_fact(data: np.ndarray, link_fact: str):
-    if "IdentityLink" == link_fact:
-        # Do nothing
-        return data
-    elif "LogLink" == link_fact:
-        return np.log(data)
-    elif "CLogLogLink" == link_fact:
-        raise np.log(-np.log(1 - data))
-    elif "SquarerootLink" == link_fact:
-        return np.sqrt(data)
-    elif "InverseLink" == link_fact:
-        raise NotImplementedError
-    elif "InverseSquaredLink" == link_fact:
-        raise NotImplementedError
-    elif "PowerLink" == link_fact:
-        transformed_data = stats.boxcox(data["data"])[0]
-        return pd.DataFrame(data=transformed_data)
-    elif "CauchyLink" == link_fact:
-        raise NotImplementedError
-    elif "LogLogLink" == link_fact:
-        raise NotImplementedError
-    elif "ProbitLink" == link_fact:
-        raise NotImplementedError
-    elif "LogitLink" == link_fact:
-        # TODO: make sure that the values are numbers
-        transformed_data = logit(data["data"])
-        return transformed_data
-    elif "NegativeBinomialLink" == link_fact:
-        raise NotImplementedError
+    return get_link_transforms(link_fact)[0](data)
@@ -16,6 +16,14 @@ import webbrowser  # For autoamtically opening the browser for the CLI
 import socket  # For finding next available socket
 from tisane.gui.gui_components import GUIComponents
 from tisane.gui.callbacks import createCallbacks
+from tisane.gui.sessions import (
+    SessionStore,
+    installSessions,
+    getInitialSessionState,
+)
+from werkzeug.serving import run_simple
+import os
+from typing import Dict, Union
 
 external_stylesheets = [
     dbc.themes.BOOTSTRAP,
@@ -56,22 +64,102 @@ class TisaneGUI:
     def __init__(self):
         pass
 
-    # @param input is a json file that has all the data to read in
-    def read_input(self, input: str, generateCode):
+    # @param input is the GUI's input: the dict built by tisane.main, or a json file with it
+    def read_input(self, input: Union[str, Dict], generateCode):
         self.components = GUIComponents(input, generateCode)
         pass
 
-    # @param input is a json file that has all the data to read in
-    def start_app(self, input: str, jupyter: bool = False, generateCode=None):
+    # @param input is the GUI's input: the dict built by tisane.main, or a json file with it
+    def start_app(
+        self, input: Union[str, Dict], jupyter: bool = False, generateCode=None
+    ):
+        app = self.create_app(input, jupyter=jupyter, generateCode=generateCode)
+
+        ### Start and run app on local server
+        # open_browser()
+        if jupyter:
+            app.run_server(mode="inline", port=port)
+            pass
+        else:
+            app.run_server(host="127.0.0.1", debug=True, threaded=True, port=port)
+
+    # Serve the GUI to many analysts at once
+    # Each browser session has its own selections, and its own output directory under @param sessionsDirectory
+    # Runs under gunicorn (with @param workers processes of @param threads threads each) if it is installed, otherwise under Werkzeug's forking server
+    # @param input is the GUI's input: the dict built by tisane.main, or a json file with it
+    def start_server(
+        self,
+        input: Union[str, Dict],
+        host: str = "127.0.0.1",
+        port: int = 8050,
+        workers: int = 4,
+        threads: int = 8,
+        sessionsDirectory: str = "tisane_sessions",
+        generateCode=None,
+    ):
+        def createServer():
+            return self.create_app(
+                input, generateCode=generateCode, sessionsDirectory=sessionsDirectory
+            ).server
+
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            BaseApplication = None
+
+        if BaseApplication is not None:
+
+            class TisaneApplication(BaseApplication):
+                def load_config(self):
+                    self.cfg.set("bind", "{}:{}".format(host, port))
+                    self.cfg.set("workers", workers)
+                    self.cfg.set("threads", threads)
+                    self.cfg.set("worker_class", "gthread")
+
+                # Called in each worker process
+                def load(self):
+                    return createServer()
+
+            TisaneApplication().run()
+            pass
+        elif hasattr(os, "fork"):
+            log.warning("gunicorn is not installed; serving with Werkzeug's forking server")
+            run_simple(host, port, createServer(), processes=workers)
+            pass
+        else:
+            log.warning("gunicorn is not installed; serving with Werkzeug's threaded server")
+            run_simple(host, port, createServer(), threaded=True)
+
+    # Build the app's layout and callbacks without starting a server
+    # @param input is the GUI's input: the dict built by tisane.main, or a json file with it
+    # @param sessionsDirectory enables server mode: selections are kept per browser session, and written under this directory
+    # @returns the Dash (or JupyterDash) app
+    def create_app(
+        self,
+        input: Union[str, Dict],
+        jupyter: bool = False,
+        generateCode=None,
+        sessionsDirectory: str = None,
+    ):
         ### Read in input data
         self.read_input(input, generateCode)
+        self.components.precomputeFamilyLinkFunctions()
 
         ### Create app
+        # Tab bodies are added to the layout when their tabs are first opened, so callbacks may refer to components that are not in the initial layout
         if jupyter:
-            app = JupyterDash(__name__, external_stylesheets=external_stylesheets)
+            app = JupyterDash(
+                __name__,
+                external_stylesheets=external_stylesheets,
+                suppress_callback_exceptions=True,
+            )
             pass
         else:
-            app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
+            app = dash.Dash(
+                __name__,
+                external_stylesheets=external_stylesheets,
+                suppress_callback_exceptions=True,
+            )
 
         ### Populate app
         # Get components
@@ -148,21 +236,27 @@ class TisaneGUI:
                 dcc.Store(id="added-main-effects-store"),
                 dcc.Store(id="added-interaction-effects-store"),
                 dcc.Store(id="random-effects-check-store"),
+                dcc.Store(id="highest-active-tab-store", data=-1),
+                dcc.Store(
+                    id="unrendered-tabs-store", data=self.components.getLazyTabs()
+                ),
+                dcc.Store(id="tab-to-render-store"),
             ]
-            + self.components.createEffectPopovers()
+            + self.components.createMainEffectPopovers()
             + self.components.createCodeGenerationModal(),
             fluid=jupyter,
         )
 
-        ### Start and run app on local server
         self.app = app
-        createCallbacks(app, self.components)
-        # open_browser()
-        if jupyter:
-            app.run_server(mode="inline", port=port)
+        if sessionsDirectory:
+            store = SessionStore(
+                sessionsDirectory, getInitialSessionState(self.components)
+            )
+            createCallbacks(app, installSessions(app, self.components, store))
             pass
         else:
-            app.run_server(host="127.0.0.1", debug=True, threaded=True, port=port)
+            createCallbacks(app, self.components)
+        return app
 
     def model_tabs(self):
         # Many different ways to create tabs: https://dash-bootstrap-components.opensource.faculty.ai/docs/components/tabs/
@@ -1,8 +1,12 @@
+import copy
 import json
 import os
 import logging
-from typing import Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
 from tisane.variable import AbstractVariable
+from tisane.data import is_all_non_negative_integers
 import dash_html_components as html
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
@@ -11,12 +15,22 @@ import plotly.graph_objects as go
 import pandas as pd
 import scipy.stats as stats
 import numpy as np
-from tisane.gui.gui_strings import GUIStrings
+from tisane.gui.gui_strings import getGUIStrings
+from tisane.gui.gui_resources import (
+    getDefaultExplanations,
+    getFamilyLinkFunctionsResource,
+    getMarkdown,
+)
 
 log = logging.getLogger("")
 log.setLevel(logging.ERROR)
 
-from tisane.gui.gui_helpers import simulate_data_dist
+from tisane.gui.gui_helpers import simulate_data_dist, binHistograms
+from tisane.gui.normality_diagnostics import (
+    requestNormalityDiagnostics,
+    getNormalityDiagnostics,
+    isNormalityDiagnosticsPending,
+)
 
 
 def cardP(text):
@@ -52,40 +66,67 @@ def getInfoBubble(id: str):
     return html.I(className="bi bi-info-circle text-info", id=id)
 
 
+# Types of the pattern-matching ids of checkboxes (and the components they update)
+# Callbacks listen to every checkbox of a type with ALL or MATCH instead of with one Input per checkbox
+patternIdTypes = {
+    "main effects": "main-effect-checkbox",
+    "interaction effects": "interaction-effect-checkbox",
+    "random effects": "random-effect-checkbox",
+    "correlated": "random-slope-correlated-checkbox",
+    "correlated span": "random-slope-correlated-span",
+    "random intercept cell": "random-intercept-cell",
+    "random slope cell": "random-slope-cell",
+}
+
+# Tabs whose bodies are built the first time the tab is opened, and the GUIComponents method that builds each one
+# The rest of each tab (title, continue button) is part of the initial layout, so callbacks that use it always find it
+lazyTabBodyBuilders = {
+    "tab-2": "getInteractionEffectsChecklist",
+    "tab-3": "getRandomEffectsTableSection",
+    "tab-4": "getFamilyLinkFunctionsSection",
+}
+
+defaultLinkForFamily = {
+    "GaussianFamily": "IdentityLink",
+    "BinomialFamily": "LogitLink",
+    "PoissonFamily": "LogLink",
+    "TweedieFamily": "LogLink",
+    "GammaFamily": "InverseLink",
+    "NegativeBinomialFamily": "LogLink",
+    "InverseGaussianFamily": "InverseSquaredLink",
+}
+
+# Computes the family/link charts in the background while the GUI starts
+figureExecutor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="family-figures")
+
+
+# @param index is a generated component id, or a wildcard (ALL, MATCH) when used in a callback
+# @returns pattern-matching id for the component of @param kind (key in patternIdTypes)
+def getPatternId(kind: str, index):
+    return {"type": patternIdTypes[kind], "index": index}
+
+
 class GUIComponents:
-    def __init__(self, input_json: str, generateCode):
-        self.strings = GUIStrings()
-        dir = os.path.dirname(os.path.abspath(__file__))
-        defaultExplanationsPath = os.path.join(dir, "default_explanations.json")
-        if os.path.exists(defaultExplanationsPath):
-            with open(defaultExplanationsPath, "r") as f:
-                self.defaultExplanations = json.loads(f.read())
-                pass
-            pass
-        else:
-            self.defaultExplanations = {}
+    # @param input_json is the GUI's input: the dict built by tisane.main, or the path to a json file containing it
+    def __init__(self, input_json: Union[str, Dict], generateCode):
+        # Static resources are loaded once per process and shared (read-only) by every instance
+        self.strings = getGUIStrings()
+        self.defaultExplanations = getDefaultExplanations()
         self.numGeneratedComponentIds = 0
         self.codeGenerator = generateCode
         self.generatedComponentIdToRandomEffect = {}
         self.generatedComponentIdToMainEffect = {}
         self.generatedComponentIdToInteractionEffect = {}
         self.simulatedData = {}
-        self.familyLinkFunctions = {}
-        familyLinkFunctionsPath = os.path.join(dir, "family_link_functions.json")
-        if os.path.exists(familyLinkFunctionsPath):
-            with open(familyLinkFunctionsPath, "r") as f:
-                self.familyLinkFunctions = json.loads(f.read())
-                pass
-            pass
-        self.defaultLinkForFamily = {
-            "GaussianFamily": "IdentityLink",
-            "BinomialFamily": "LogitLink",
-            "PoissonFamily": "LogLink",
-            "TweedieFamily": "LogLink",
-            "GammaFamily": "InverseLink",
-            "NegativeBinomialFamily": "LogLink",
-            "InverseGaussianFamily": "InverseSquaredLink",
-        }
+        # Futures for the family/link charts, keyed by family
+        self.figures = {}
+        self.figuresLock = threading.Lock()
+        self.lazyTabBodies = {}
+        self.lazyTabBodiesLock = threading.Lock()
+        self.normalityTestsFingerprint = None
+        self.columnProfiles = {}
+        self.familyLinkFunctions = getFamilyLinkFunctionsResource()
+        self.defaultLinkForFamily = defaultLinkForFamily
         self.output = {
             "main effects": [],
             "dependent variable": "",
@@ -94,7 +135,8 @@ class GUIComponents:
             "family": "",
             "link": "",
         }
-        self.highestActiveTab = -1
+        # Where model_spec.json and generated code are written; None for the current working directory
+        self.outputDirectory = None
 
         self.variables = {"main effects": {}, "interaction effects": {}}
         self.rowIdsByUnit = {}
@@ -104,7 +146,15 @@ class GUIComponents:
         self.randomSlopes = {}
         self.generatedCorrelatedIdToRandomSlope = {}
         log.debug(input_json)
-        if os.path.exists(input_json):
+        if isinstance(input_json, dict):
+            # Handed over in memory, so nothing is serialized or read back
+            # Copied, since the GUI marks its own state (e.g., correlated random slopes, component ids) in it, but the
+            # data is shared rather than copied as the GUI only reads it
+            data = input_json.get("input", {}).get("data")
+            memo = {id(data): data} if isinstance(data, pd.DataFrame) else {}
+            self.data = copy.deepcopy(input_json, memo)
+            pass
+        elif os.path.exists(input_json):
             with open(input_json, "r") as f:
                 self.data = json.loads(f.read())
                 pass
@@ -119,7 +169,9 @@ class GUIComponents:
         self.output["dependent variable"] = query["DV"]
         self.dv = query["DV"]
         if self.hasData():
-            self.dataDf = pd.DataFrame(self.getData())
+            data = self.getData()
+            # Data read from a json file is a dict of column name to values
+            self.dataDf = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
         for me in self.getGeneratedMainEffects():
             self.variables["main effects"][me] = {"info-id": self.getNewComponentId()}
             pass
@@ -128,6 +180,13 @@ class GUIComponents:
                 "info-id": self.getNewComponentId()
             }
             pass
+        # Checkbox ids are assigned up front so they do not depend on which tabs have been built
+        for me in self.getGeneratedMainEffects():
+            self.setComponentIdForMainEffect(me)
+            pass
+        for ie in self.getGeneratedInteractionEffects():
+            self.setComponentIdForInteractionEffect(ie)
+            pass
         randomEffects = self.getGeneratedRandomEffects()
         for unit, re in randomEffects.items():
             self.output["random effects"][unit] = {}
@@ -343,17 +402,24 @@ class GUIComponents:
     def generateCode(self):
         if self.codeGenerator:
             newOutput = self.filterOutput()
-            destinationDir = os.getcwd()
+            destinationDir = self.getOutputDirectory()
+            os.makedirs(destinationDir, exist_ok=True)
             jsonFile = "model_spec.json"
+            # model_spec.json records the choices next to the generated code; the code generator gets them in memory
             with open(os.path.join(destinationDir, jsonFile), "w") as f:
                 f.write(json.dumps(newOutput, indent=4, sort_keys=True))
                 pass
             path = self.codeGenerator(
-                destinationDir=destinationDir, modelSpecJson=jsonFile
+                destinationDir=destinationDir,
+                modelSpecJson=jsonFile,
+                modelSpec=newOutput,
             )
             return path
         return False
 
+    def getOutputDirectory(self):
+        return self.outputDirectory or os.getcwd()
+
     def getRandomInterceptCellIds(self):
         return [ri["cell-id"] for group, ri in self.randomIntercepts.items()]
 
@@ -472,11 +538,12 @@ class GUIComponents:
         return self.data["input"]["data"]
 
     def hasData(self):
-        return (
-            "input" in self.data
-            and "data" in self.data["input"]
-            and self.data["input"]["data"]
-        )
+        if "input" not in self.data or "data" not in self.data["input"]:
+            return False
+        data = self.data["input"]["data"]
+        if isinstance(data, pd.DataFrame):
+            return not data.empty
+        return bool(data)
 
     def getDefaultLinkForFamily(self, family):
         if family in self.defaultLinkForFamily:
@@ -755,10 +822,12 @@ class GUIComponents:
                                     [
                                         html.Span(
                                             " (correlated)",
-                                            id=self.getCorrelatedIdForRandomSlope(
-                                                group, iv
-                                            )
-                                            + "-span",
+                                            id=getPatternId(
+                                                "correlated span",
+                                                self.getCorrelatedIdForRandomSlope(
+                                                    group, iv
+                                                ),
+                                            ),
                                         )
                                     ]
                                     if "correlated" in randomEffect
@@ -822,6 +891,35 @@ class GUIComponents:
             return True
         return False
 
+    # @returns the tabs in lazyTabBodyBuilders that have a body in this GUI
+    def getLazyTabs(self):
+        lazyTabs = ["tab-4"]
+        if self.hasRandomEffects():
+            lazyTabs.insert(0, "tab-3")
+            pass
+        if self.hasInteractionEffects():
+            lazyTabs.insert(0, "tab-2")
+            pass
+        return lazyTabs
+
+    # @returns placeholder for the body of @param tabId, filled in when the tab is first opened
+    def getLazyTabBody(self, tabId: str):
+        return html.Div(
+            dbc.Spinner(color="primary"),
+            id="{}-body".format(tabId),
+            className="text-center",
+        )
+
+    # @returns the body of @param tabId, built the first time it is asked for and shared afterwards
+    def buildLazyTabBody(self, tabId: str):
+        with self.lazyTabBodiesLock:
+            if tabId not in self.lazyTabBodies:
+                self.lazyTabBodies[tabId] = html.Div(
+                    getattr(self, lazyTabBodyBuilders[tabId])()
+                )
+                pass
+            return self.lazyTabBodies[tabId]
+
     def getMainEffectsCard(self):
         ivs = self.getIndependentVariables()
         intermediaries = self.getAssociativeIntermediaries()
@@ -861,7 +959,7 @@ class GUIComponents:
         if ivs:
             body = [
                 cardP(self.strings.getMainEffectsPageTitle()),
-                dcc.Markdown(self.defaultExplanations["overall-main-effects"]),
+                getMarkdown(self.defaultExplanations["overall-main-effects"]),
                 self.layoutFancyChecklist(
                     {
                         me: html.Span(
@@ -877,6 +975,7 @@ class GUIComponents:
                     },
                     self.setComponentIdForMainEffect,
                     {me: me in ivs for me in self.getGeneratedMainEffects()},
+                    "main effects",
                 ),
             ]
         else:
@@ -912,27 +1011,10 @@ class GUIComponents:
             dbc.CardBody(
                 [
                     cardP(self.strings.getInteractionEffectsPageTitle()),
-                    dcc.Markdown(
+                    getMarkdown(
                         self.defaultExplanations["overall-interaction-effects"]
                     ),
-                    self.layoutFancyChecklist(
-                        {
-                            me: html.Span(
-                                [
-                                    me + " ",
-                                    html.I(
-                                        className="bi bi-info-circle",
-                                        id=self.variables["interaction effects"][me][
-                                            "info-id"
-                                        ],
-                                    ),
-                                ]
-                            )
-                            for me in self.getGeneratedInteractionEffects()
-                        },
-                        self.setComponentIdForInteractionEffect,
-                        {ie: False for ie in interactions},
-                    ),
+                    self.getLazyTabBody("tab-2"),
                     html.P(""),
                     continueButton,
                 ]
@@ -940,23 +1022,47 @@ class GUIComponents:
             className="mt-3",
         )
 
-    def layoutFancyChecklist(self, labelDict, componentIdSetter, checkedDict):
+    # Built when the interaction effects tab is first opened
+    def getInteractionEffectsChecklist(self):
+        interactions = self.getGeneratedInteractionEffects()
+        return [
+            self.layoutFancyChecklist(
+                {
+                    me: html.Span(
+                        [
+                            me + " ",
+                            html.I(
+                                className="bi bi-info-circle",
+                                id=self.variables["interaction effects"][me]["info-id"],
+                            ),
+                        ]
+                    )
+                    for me in interactions
+                },
+                self.setComponentIdForInteractionEffect,
+                {ie: False for ie in interactions},
+                "interaction effects",
+            )
+        ] + self.createInteractionEffectPopovers()
+
+    # @param kind is the key in patternIdTypes for the checkboxes' pattern-matching ids
+    def layoutFancyChecklist(self, labelDict, componentIdSetter, checkedDict, kind):
         options = []
         for name, label in labelDict.items():
+            # Pattern-matching ids are not valid html ids, so the label wraps its checkbox instead of pointing to it
             options.append(
                 dbc.FormGroup(
-                    [
-                        dbc.Checkbox(
-                            id=componentIdSetter(name),
-                            className="form-check-input",
-                            checked=checkedDict[name],
-                        ),
-                        dbc.Label(
+                    dbc.Label(
+                        [
+                            dbc.Checkbox(
+                                id=getPatternId(kind, componentIdSetter(name)),
+                                className="form-check-input",
+                                checked=checkedDict[name],
+                            ),
                             label,
-                            html_for=componentIdSetter(name),
-                            className="form-check-label",
-                        ),
-                    ],
+                        ],
+                        className="form-check-label",
+                    ),
                     check=True,
                 )
             )
@@ -1028,7 +1134,10 @@ class GUIComponents:
                             getInfoBubble(self.randomIntercepts[group]["info-id"]),
                         ],
                         rowSpan=rowsToSpan,
-                        id=self.randomIntercepts[group]["cell-id"],
+                        id=getPatternId(
+                            "random intercept cell",
+                            self.randomIntercepts[group]["cell-id"],
+                        ),
                     )
                 )
 
@@ -1059,14 +1168,20 @@ class GUIComponents:
                                 "IV: {} ".format(randomSlopes[0]["iv"]),
                                 getInfoBubble(self.randomSlopes[group][iv]["info-id"]),
                             ],
-                            id=self.randomSlopes[group][iv]["cell-id"],
+                            id=getPatternId(
+                                "random slope cell",
+                                self.randomSlopes[group][iv]["cell-id"],
+                            ),
                         )
                     )
                     if thisGroupHasCorrelation:
                         row.append(
                             html.Td(
                                 self.makeFancyCheckbox(
-                                    id=self.getCorrelatedIdForRandomSlope(group, iv),
+                                    id=getPatternId(
+                                        "correlated",
+                                        self.getCorrelatedIdForRandomSlope(group, iv),
+                                    ),
                                     checked=True,
                                 ),
                                 style=centeredStyle,
@@ -1093,8 +1208,11 @@ class GUIComponents:
                                 [
                                     html.Td(
                                         self.makeFancyCheckbox(
-                                            id=self.getCorrelatedIdForRandomSlope(
-                                                group, iv
+                                            id=getPatternId(
+                                                "correlated",
+                                                self.getCorrelatedIdForRandomSlope(
+                                                    group, iv
+                                                ),
                                             ),
                                             checked=True,
                                         ),
@@ -1120,7 +1238,10 @@ class GUIComponents:
                                                     ]
                                                 ),
                                             ],
-                                            id=self.randomSlopes[group][iv]["cell-id"],
+                                            id=getPatternId(
+                                                "random slope cell",
+                                                self.randomSlopes[group][iv]["cell-id"],
+                                            ),
                                         )
                                     ]
                                     + correlationCheckbox,
@@ -1178,8 +1299,8 @@ class GUIComponents:
             dbc.CardBody(
                 [
                     cardP(self.strings.getRandomEffectsPageTitle()),
-                    dcc.Markdown(self.defaultExplanations["overall-random-effects"]),
-                    self.layoutRandomEffectsTable(),
+                    getMarkdown(self.defaultExplanations["overall-random-effects"]),
+                    self.getLazyTabBody("tab-3"),
                     dcc.Markdown(id="random-effects-not-available-explanation"),
                     continueButton,
                 ]
@@ -1187,16 +1308,24 @@ class GUIComponents:
             className="mt-3",
         )
 
+    # Built when the random effects tab is first opened
+    def getRandomEffectsTableSection(self):
+        return [self.layoutRandomEffectsTable()] + self.createRandomEffectPopovers()
+
+    # @returns dict of properties computed about the data in @param column, shared across the GUI
+    def getColumnProfile(self, column: str) -> Dict:
+        if column not in self.columnProfiles:
+            self.columnProfiles[column] = dict()
+        return self.columnProfiles[column]
+
     def isDVDataAllNonNegativeIntegers(self):
         if self.hasData():
-            dvData = self.dataDf[self.dv]
-            allIntegers = dvData.dtype.kind == "i" or dvData.dtype.kind == "u"
-            if not allIntegers:
-                dvData = dvData.astype(float)
-                allIntegers = dvData.apply(float.is_integer).all()
-                pass
-            allIntegers = allIntegers and dvData.apply(lambda x: x >= 0).all()
-            return allIntegers
+            profile = self.getColumnProfile(self.dv)
+            if "all non-negative integers" not in profile:
+                profile["all non-negative integers"] = is_all_non_negative_integers(
+                    self.dataDf[self.dv].values
+                )
+            return profile["all non-negative integers"]
         return None
 
     def make_family_link_options(self):
@@ -1264,7 +1393,7 @@ class GUIComponents:
                 dbc.Popover(
                     [
                         dbc.PopoverHeader(linkExplanation["header"]),
-                        dbc.PopoverBody(dcc.Markdown(linkExplanation["body"])),
+                        dbc.PopoverBody(getMarkdown(linkExplanation["body"])),
                     ],
                     target="link-function-label-info",
                     trigger="hover",
@@ -1273,7 +1402,7 @@ class GUIComponents:
                     [
                         dbc.PopoverHeader(familyExplanation["header"]),
                         dbc.PopoverBody(
-                            dcc.Markdown(
+                            getMarkdown(
                                 familyExplanation["body"]
                                 + familyExplanation["note-begin"]
                                 + (
@@ -1295,13 +1424,31 @@ class GUIComponents:
 
         return controls
 
+    # Start building the chart of every candidate family, and the normality tests, in the background
+    # The family and link functions tab then does not wait for them when it is opened
+    def precomputeFamilyLinkFunctions(self):
+        # The tab opens on the Gaussian chart
+        for family in ["GaussianFamily"] + list(self.getGeneratedFamilyLinkFunctions()):
+            self.getFigureFuture(family)
+            pass
+        self.requestNormalityTests()
+
+    # Figures only depend on the family, so each is built once and reused across chart updates
+    def getFigureFuture(self, family):
+        with self.figuresLock:
+            if family not in self.figures:
+                self.figures[family] = figureExecutor.submit(self.buildFigure, family)
+                pass
+            return self.figures[family]
+
     def createFigure(self, family):
-        # Generate figure
-        fig = go.Figure()
+        return self.getFigureFuture(family).result()
+
+    def buildFigure(self, family):
+        observed = None
         if self.hasData():
-            fig.add_trace(
-                go.Histogram(x=self.dataDf[self.dv], name=f"{self.dv}", showlegend=True)
-            )
+            observed = self.dataDf[self.dv]
+        family_data = None
         if family:
             key = f"{family}_data"
 
@@ -1309,9 +1456,9 @@ class GUIComponents:
                 family_data = self.simulatedData[key]
             else:
                 # Do we need to generate data?
-                if self.hasData():
+                if self.hasData() and pd.api.types.is_numeric_dtype(observed):
                     # dvData = np.log(self.dataDf[self.dv])
-                    dvData = self.dataDf[self.dv]
+                    dvData = observed
                     family_data = simulate_data_dist(
                         family,
                         dataMean=dvData.mean(),
@@ -1325,13 +1472,47 @@ class GUIComponents:
                 self.simulatedData[key] = family_data
                 pass
 
+        # Generate figure
+        # Bin on the server so that only bin proportions (not every value) are sent to the browser
+        fig = go.Figure()
+        if observed is not None and not pd.api.types.is_numeric_dtype(observed):
+            # Categorical data: one bar per category
+            proportions = observed.value_counts(normalize=True, sort=False)
             fig.add_trace(
-                go.Histogram(
-                    x=family_data,
-                    name=f"Simulated {family} distribution.",
+                go.Bar(
+                    x=[str(c) for c in proportions.index],
+                    y=proportions.values,
+                    name=f"{self.dv}",
                     showlegend=True,
                 )
             )
+            observed = None
+        edges, observedProportions, simulatedProportions = binHistograms(
+            observed, family_data
+        )
+        if edges is not None:
+            centers = (edges[:-1] + edges[1:]) / 2
+            widths = np.diff(edges)
+            if observedProportions is not None:
+                fig.add_trace(
+                    go.Bar(
+                        x=centers,
+                        y=observedProportions,
+                        width=widths,
+                        name=f"{self.dv}",
+                        showlegend=True,
+                    )
+                )
+            if simulatedProportions is not None:
+                fig.add_trace(
+                    go.Bar(
+                        x=centers,
+                        y=simulatedProportions,
+                        width=widths,
+                        name=f"Simulated {family} distribution.",
+                        showlegend=True,
+                    )
+                )
         fig.update_layout(barmode="overlay")
         fig.update_traces(opacity=0.75)
         fig.update_layout(
@@ -1362,64 +1543,124 @@ class GUIComponents:
                 trigger="hover",
             ),
         ]
+        results = None
         if self.hasData():
-            normalityTestExplanation = self.getDefaultExplanation("normality-tests")
-            dvData = self.dataDf[self.dv].dropna()
-            shapiroStat, shapiroPvalue = stats.shapiro(dvData.values)
-            normaltestStat, normaltestPvalue = stats.normaltest(dvData.values)
-
-            shapiroHeader = html.Th(
-                html.A(
-                    "Shapiro-Wilk Test",
-                    href="https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.shapiro.html",
-                ),
-                colSpan=2,
+            # Tests run in a background thread so the tab renders immediately; the interval polls for the results
+            self.requestNormalityTests()
+            results = self.getNormalityTestResults()
+            normalityTestPortion = self.layoutNormalityTests(results)
+            pass
+
+        return [
+            html.Div(normalityTestPortion, id="normality-tests-section"),
+            dcc.Interval(
+                id="normality-tests-interval",
+                interval=500,
+                disabled=not self.hasData() or results is not None,
+            ),
+        ]
+
+    def requestNormalityTests(self):
+        if self.hasData() and self.normalityTestsFingerprint is None:
+            self.normalityTestsFingerprint = requestNormalityDiagnostics(
+                self.dataDf[self.dv]
             )
-            dagostinoAndPearsonsHeader = html.Th(
-                html.A(
-                    "D'Agostino and Pearson's Test",
-                    href="https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.normaltest.html",
-                ),
-                colSpan=2,
+            pass
+
+    # @returns normality test results for the DV, or None if they are still being computed
+    # Results dropped from the cache are computed again, so polling for them eventually succeeds
+    def getNormalityTestResults(self):
+        if self.normalityTestsFingerprint is None:
+            return None
+        results = getNormalityDiagnostics(self.normalityTestsFingerprint)
+        if results is None and not isNormalityDiagnosticsPending(
+            self.normalityTestsFingerprint
+        ):
+            self.normalityTestsFingerprint = requestNormalityDiagnostics(
+                self.dataDf[self.dv]
             )
-            testHeader = [
-                html.Th("Test Statistic"),
-                html.Th("P-Value"),
+        return results
+
+    def layoutNormalityTests(self, results):
+        if results is None:
+            return [
+                html.H5(["Normality Tests"]),
+                dbc.Spinner(html.Span("Running normality tests...")),
+            ]
+        if "error" in results:
+            return [
+                html.H5(["Normality Tests"]),
+                html.P(f"Could not run the normality tests: {results['error']}"),
             ]
 
-            tableHeader = html.Thead(
-                [
-                    html.Tr([shapiroHeader, dagostinoAndPearsonsHeader]),
-                    html.Tr(testHeader + testHeader),
-                ]
-            )
-            tableBody = html.Tbody(
-                [
-                    html.Tr(
-                        [
-                            html.Td("{:.5e}".format(shapiroStat)),
-                            html.Td(
-                                "{:.5e}{}".format(
-                                    shapiroPvalue, "*" if shapiroPvalue < 0.05 else ""
-                                )
-                            ),
-                            html.Td("{:.5e}".format(normaltestStat)),
-                            html.Td(
-                                "{:.5e}{}".format(
-                                    normaltestPvalue,
-                                    "*" if normaltestPvalue < 0.05 else "",
-                                )
-                            ),
-                        ]
+        normalityTestExplanation = self.getDefaultExplanation("normality-tests")
+        shapiroStat, shapiroPvalue = results["shapiro"]
+        normaltestStat, normaltestPvalue = results["normaltest"]
+        momentStat, momentPvalue = results["moment normaltest"]
+
+        shapiroHeader = html.Th(
+            html.A(
+                "Shapiro-Wilk Test",
+                href="https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.shapiro.html",
+            ),
+            colSpan=2,
+        )
+        dagostinoAndPearsonsHeader = html.Th(
+            html.A(
+                "D'Agostino and Pearson's Test",
+                href="https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.normaltest.html",
+            ),
+            colSpan=2,
+        )
+        momentHeader = html.Th(
+            "D'Agostino and Pearson's Test (all data)",
+            colSpan=2,
+        )
+        testHeader = [
+            html.Th("Test Statistic"),
+            html.Th("P-Value"),
+        ]
+
+        def testCells(stat, pvalue):
+            return [
+                html.Td("{:.5e}".format(stat)),
+                html.Td("{:.5e}{}".format(pvalue, "*" if pvalue < 0.05 else "")),
+            ]
+
+        tableHeader = html.Thead(
+            [
+                html.Tr([shapiroHeader, dagostinoAndPearsonsHeader, momentHeader]),
+                html.Tr(testHeader + testHeader + testHeader),
+            ]
+        )
+        tableBody = html.Tbody(
+            [
+                html.Tr(
+                    testCells(shapiroStat, shapiroPvalue)
+                    + testCells(normaltestStat, normaltestPvalue)
+                    + testCells(momentStat, momentPvalue)
+                )
+            ]
+        )
+        sampleNote = []
+        if results["subsample size"] < results["n"]:
+            sampleNote = [
+                html.P(
+                    html.I(
+                        f"Shapiro-Wilk and D'Agostino and Pearson's tests ran on a stratified sample of {results['subsample size']} of the {results['n']} values. The last test uses all values."
                     )
-                ]
-            )
-            normalityTestPortion = [
+                )
+            ]
+        return (
+            [
                 html.H5(["Normality Tests"]),
                 dbc.Row([dbc.Col(dbc.Table([tableHeader, tableBody]))]),
-                dcc.Markdown(normalityTestExplanation["note"]),
+            ]
+            + sampleNote
+            + [
+                getMarkdown(normalityTestExplanation["note"]),
                 html.H6(normalityTestExplanation["header"]),
-                dcc.Markdown(normalityTestExplanation["body"])
+                getMarkdown(normalityTestExplanation["body"])
                 # dbc.Popover(
                 #     [
                 #         dbc.PopoverHeader(normalityTestExplanation["header"]),
@@ -1429,8 +1670,7 @@ class GUIComponents:
                 #     trigger="hover",
                 # ),
             ]
-            pass
-        return normalityTestPortion
+        )
 
     def createGraph(self, family):
         fig = self.createFigure(family)
@@ -1456,41 +1696,15 @@ class GUIComponents:
                         "family-link-functions", "titles", "page-sub-title"
                     ).format(self.getDependentVariable())
                 ),
-                dcc.Markdown(familyExplanation["caution"]),
+                getMarkdown(familyExplanation["caution"]),
             ]
         )
 
-        fig = self.createFigure("GaussianFamily")
-
-        # Get form groups for family link div
-        family_link_chart = html.Div(
-            dcc.Graph(
-                id="family-link-chart",
-                figure=fig,
-                config={"responsive": True},
-                style={"height": "inherit"},
-            ),
-            id="family-link-chart-div",
-        )
-        family_link_controls = self.make_family_link_options()
-
-        normalityTestPortion = self.createNormalityTestSection()
         ##### Combine all elements
         # Create div
         family_and_link_div = dbc.Card(
             dbc.CardBody(
-                [
-                    family_link_title,
-                    dbc.Row(
-                        [
-                            dbc.Col(family_link_chart, sm=6, md=7, lg=8),
-                            dbc.Col(family_link_controls, sm=6, md=5, lg=4),
-                        ],
-                        align="center",
-                        no_gutters=True,
-                    ),
-                ]
-                + normalityTestPortion
+                [family_link_title, self.getLazyTabBody("tab-4")]
                 + [
                     html.Span(
                         dbc.Button(
@@ -1518,10 +1732,43 @@ class GUIComponents:
         ##### Return div
         return family_and_link_div
 
+    # Built when the family and link functions tab is first opened
+    def getFamilyLinkFunctionsSection(self):
+        fig = self.createFigure("GaussianFamily")
+
+        # Get form groups for family link div
+        family_link_chart = html.Div(
+            dcc.Graph(
+                id="family-link-chart",
+                figure=fig,
+                config={"responsive": True},
+                style={"height": "inherit"},
+            ),
+            id="family-link-chart-div",
+        )
+        family_link_controls = self.make_family_link_options()
+
+        normalityTestPortion = self.createNormalityTestSection()
+        return [
+            dbc.Row(
+                [
+                    dbc.Col(family_link_chart, sm=6, md=7, lg=8),
+                    dbc.Col(family_link_controls, sm=6, md=5, lg=4),
+                ],
+                align="center",
+                no_gutters=True,
+            )
+        ] + normalityTestPortion
+
     def createEffectPopovers(self):
+        return (
+            self.createMainEffectPopovers()
+            + self.createInteractionEffectPopovers()
+            + self.createRandomEffectPopovers()
+        )
+
+    def createMainEffectPopovers(self):
         mainEffects = self.getGeneratedMainEffects()
-        interactionEffects = self.getGeneratedInteractionEffects()
-        # randomEffects = self.getGeneratedRandomEffects()
         explanations = self.getExplanations()
         popovers = []
         for me in mainEffects:
@@ -1542,6 +1789,12 @@ class GUIComponents:
                 )
                 pass
             pass
+        return popovers
+
+    def createInteractionEffectPopovers(self):
+        interactionEffects = self.getGeneratedInteractionEffects()
+        explanations = self.getExplanations()
+        popovers = []
         for ie in interactionEffects:
             if (
                 ie in explanations
@@ -1560,6 +1813,11 @@ class GUIComponents:
                 )
                 pass
             pass
+        return popovers
+
+    def createRandomEffectPopovers(self):
+        explanations = self.getExplanations()
+        popovers = []
         for group, data in self.randomIntercepts.items():
             key = "{},RandomIntercept".format(group)
             if key in explanations and "info-id" in data:
@@ -1,61 +1,66 @@
+import json
 import numpy as np
 import plotly.graph_objects as go
-import tweedie
-from scipy.special import logit
-from scipy import stats
 import pandas as pd
+from tisane.family import simulate_family_data
 
 
+# Simulated data for the family named @param family, using the shared, seeded and cached simulator in tisane.family
+# The number of values is capped by max_simulated_samples, so large datasets do not send millions of points to the browser
 def simulate_data_dist(
     family: str, dataMean: float = None, dataStdDev: float = None, dataSize: int = None
 ):
-    size = dataSize or 1000
-
-    if "GaussianFamily" == family:
-        mean = dataMean or 0
-        std = dataStdDev or 1
-
-        return np.random.default_rng().normal(loc=mean, scale=std, size=size)
-    elif "InverseGaussianFamily" == family:
-        mean = dataMean or 1
-        std = dataStdDev or 1
-
-        return np.random.default_rng().wald(mean=mean, scale=std, size=size)
-    elif "PoissonFamily" in str(family):
-        lam = 1.0  # np default
-        return np.random.default_rng().poisson(lam=lam, size=size)
-    elif "GammaFamily" in str(family):
-        shape = 2.0  # k, >= 0
-        scale = 1.0  # theta, np default, >= 0
-
-        return np.random.default_rng().gamma(shape=shape, scale=scale, size=size)
-    elif "TweedieFamily" in str(family):
-        mean = dataMean or 1.0
-        p = 1.5  # Can be changed to update to other familiar distributions: https://en.wikipedia.org/wiki/Tweedie_distribution
-        phi = 20  # this can be reset
-        n = size
-        return tweedie.tweedie(mu=mean, p=p, phi=phi).rvs(n)
-    elif "BinomialFamily" in str(family) and "Negative" not in str(family):
-        n = size  # number of trials  >= 0
-        p = 0.5  # probability of success [0, 1]
-
-        return np.random.default_rng().binomial(n=n, p=p, size=size)
-    elif "NegativeBinomialFamily" in str(family):
-        n = size  # number of successes, > 0
-        p = 0.5  # probability of success [0, 1]
-
-        return np.random.default_rng().negative_binomial(n=n, p=p, size=size)
-    elif "MultinomialFamily" in str(family):
-        cardinality = 3  # should be > 2
-        n = size  # number of trials/experiments, > 0
-        pvals = 1.0 / cardinality  # probability of each case
-
-        return np.random.default_rng().multinomial(n=n, pvals=pvals, size=size)
-    else:
-        raise ValueError(f"Unknown distribution family: {family}")
+    return simulate_family_data(
+        family, mean=dataMean, std=dataStdDev, size=dataSize
+    )
+
+
+# Bin @param observed and @param simulated values on shared bin edges so only bin counts need to be sent to the browser
+# @param maxBins is the most bins to use; fewer are used if numpy's "auto" rule suggests fewer
+# @returns tuple: (bin edges, proportion of observed values per bin, proportion of simulated values per bin)
+# Proportions are None if there are no (finite) values; bin edges are None if neither has values
+def binHistograms(observed=None, simulated=None, maxBins: int = 50):
+    def finite(values):
+        if values is None:
+            return np.array([])
+        values = np.asarray(values, dtype=float)
+        return values[np.isfinite(values)]
+
+    observed = finite(observed)
+    simulated = finite(simulated)
+    reference = observed if observed.size > 0 else simulated
+    if reference.size == 0:
+        return (None, None, None)
+
+    lower = min(v.min() for v in [observed, simulated] if v.size > 0)
+    upper = max(v.max() for v in [observed, simulated] if v.size > 0)
+    if lower == upper:
+        lower, upper = lower - 0.5, upper + 0.5
+    numBins = min(maxBins, len(np.histogram_bin_edges(reference, bins="auto")) - 1)
+    edges = np.linspace(lower, upper, max(numBins, 1) + 1)
+
+    def proportions(values):
+        if values.size == 0:
+            return None
+        counts, _ = np.histogram(values, bins=edges)
+        return counts / values.size
+
+    return (edges, proportions(observed), proportions(simulated))
 
 
 def getTriggeredFromContext(ctx):
     if not ctx.triggered:
         return False
     return ctx.triggered[0]["prop_id"].split(".")[0]
+
+
+# @returns dict of the generated component id (the "index" of a pattern-matching id) to value for each property that triggered the current callback
+# None if the callback was not triggered by pattern-matching components (e.g., when the page loads)
+def getTriggeredPatternValues(ctx):
+    triggered = {}
+    for t in ctx.triggered:
+        componentId = t["prop_id"].rsplit(".", 1)[0]
+        if not componentId.startswith("{"):
+            return None
+        triggered[json.loads(componentId)["index"]] = t["value"]
+    return triggered or None
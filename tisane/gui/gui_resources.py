@@ -0,0 +1,46 @@
+"""
+Static resources the GUI reads from its package directory: strings.json, default_explanations.json and family_link_functions.json.
+
+Each file is read and parsed once per process. The parsed structures are read-only and shared by every GUIComponents instance, so starting a session only allocates that session's own state.
+"""
+from functools import lru_cache
+from types import MappingProxyType
+import dash_core_components as dcc
+import json
+import os
+
+resourcesDirectory = os.path.dirname(os.path.abspath(__file__))
+
+
+# @returns read-only view of the parsed json @param value: dicts become MappingProxyType and lists become tuples
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(v) for key, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+# @returns read-only contents of @param fileName in the GUI's directory, or None if there is no such file
+@lru_cache(maxsize=None)
+def loadResource(fileName: str):
+    path = os.path.join(resourcesDirectory, fileName)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return freeze(json.loads(f.read()))
+
+
+def getDefaultExplanations():
+    return loadResource("default_explanations.json") or MappingProxyType({})
+
+
+def getFamilyLinkFunctionsResource():
+    return loadResource("family_link_functions.json") or MappingProxyType({})
+
+
+# @returns dcc.Markdown for the static @param text, built once per process and shared between layouts
+# Only use for text that does not depend on an analyst's input, such as default explanations
+@lru_cache(maxsize=None)
+def getMarkdown(text: str):
+    return dcc.Markdown(text)
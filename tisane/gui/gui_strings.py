@@ -1,5 +1,5 @@
-import json
-import os
+from functools import lru_cache
+from tisane.gui.gui_resources import loadResource, resourcesDirectory
 import logging
 
 log = logging.getLogger(__name__)
@@ -8,16 +8,12 @@ log.setLevel(logging.ERROR)
 
 class GUIStrings:
     def __init__(self):
-        self.data = {}
-        dir = os.path.dirname(os.path.abspath(__file__))
-        stringsPath = os.path.join(dir, "strings.json")
-        if os.path.exists(stringsPath):
-            with open(stringsPath, "r") as f:
-                self.data = json.loads(f.read())
-                pass
-            pass
-        else:
-            log.error("Could not find strings.json file in dir {}".format(dir))
+        # Read-only and shared by every instance
+        self.data = loadResource("strings.json")
+        if self.data is None:
+            log.error(
+                "Could not find strings.json file in dir {}".format(resourcesDirectory)
+            )
             exit(1)
             pass
         pass
@@ -103,3 +99,9 @@ class GUIStrings:
 
     def getFamilyLinksTabTitle(self):
         return self.getTabTitle("family-link-functions")
+
+
+# @returns the GUIStrings shared by every GUIComponents instance in this process
+@lru_cache(maxsize=None)
+def getGUIStrings() -> GUIStrings:
+    return GUIStrings()
@@ -0,0 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+import math
+import threading
+import numpy as np
+import pandas as pd
+from scipy import stats
+from tisane.data import MomentStatistics, compute_moment_statistics
+from tisane.hashing import hash_dataframe
+
+# Shapiro-Wilk p-values are unreliable above 5000 samples
+maxSubsampleSize = 5000
+# Number of strata (by rank) the subsample is drawn from
+numStrata = 50
+subsampleSeed = 0
+
+# Most diagnostics kept; the least recently used are dropped first
+maxCachedDiagnostics = 64
+
+# Normality diagnostics, keyed by the fingerprint of the data they were computed on
+_results = {}
+_pending = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="normality-tests")
+
+
+# @returns hex digest identifying the values in @param values
+def dataFingerprint(values: pd.Series) -> str:
+    return hash_dataframe(pd.Series(values).to_frame())
+
+
+# Draw a reproducible subsample of @param values that has the same shape of distribution
+# Values are split into @param strata groups of (nearly) equal size by rank, and each group contributes in proportion to its size
+# @returns array of at most @param size values
+def stratifiedSubsample(
+    values, size: int = maxSubsampleSize, strata: int = numStrata, seed: int = subsampleSeed
+) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    if values.size <= size:
+        return values
+    rng = np.random.default_rng(seed)
+    groups = np.array_split(np.sort(values), min(strata, size))
+    # Spread the remainder across the first groups so exactly size values are drawn
+    counts = np.array([len(g) for g in groups]) * size // values.size
+    counts[: size - counts.sum()] += 1
+    return np.concatenate(
+        [rng.choice(g, size=c, replace=False) for g, c in zip(groups, counts)]
+    )
+
+
+# D'Agostino and Pearson's test computed from streamed moments, without holding the data in memory
+# Matches scipy.stats.normaltest, which combines scipy.stats.skewtest and scipy.stats.kurtosistest
+# @returns tuple: (test statistic, p-value); (nan, nan) if there are fewer than 8 values
+def momentNormalityTest(statistics: MomentStatistics):
+    n = float(statistics.count)
+    skewness = statistics.get_skewness()
+    kurtosis = statistics.get_kurtosis()
+    if n < 8 or math.isnan(skewness) or math.isnan(kurtosis):
+        return (math.nan, math.nan)
+
+    # Skewness test
+    y = skewness * math.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+    beta2 = (
+        3.0
+        * (n ** 2 + 27 * n - 70)
+        * (n + 1)
+        * (n + 3)
+        / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    )
+    w2 = -1 + math.sqrt(2 * (beta2 - 1))
+    delta = 1 / math.sqrt(0.5 * math.log(w2))
+    alpha = math.sqrt(2.0 / (w2 - 1))
+    y = 1 if y == 0 else y
+    zSkew = delta * math.log(y / alpha + math.sqrt((y / alpha) ** 2 + 1))
+
+    # Kurtosis test
+    e = 3.0 * (n - 1) / (n + 1)
+    varb2 = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (kurtosis - e) / math.sqrt(varb2)
+    sqrtbeta1 = (
+        6.0
+        * (n * n - 5 * n + 2)
+        / ((n + 7) * (n + 9))
+        * math.sqrt((6.0 * (n + 3) * (n + 5)) / (n * (n - 2) * (n - 3)))
+    )
+    a = 6.0 + 8.0 / sqrtbeta1 * (2.0 / sqrtbeta1 + math.sqrt(1 + 4.0 / (sqrtbeta1 ** 2)))
+    term1 = 1 - 2 / (9.0 * a)
+    denom = 1 + x * math.sqrt(2 / (a - 4.0))
+    if denom == 0:
+        return (math.nan, math.nan)
+    term2 = math.copysign(((1 - 2.0 / a) / abs(denom)) ** (1 / 3.0), denom)
+    zKurtosis = (term1 - term2) / math.sqrt(2 / (9.0 * a))
+
+    statistic = zSkew ** 2 + zKurtosis ** 2
+    # Survival function of a chi-squared distribution with 2 degrees of freedom
+    return (statistic, math.exp(-statistic / 2))
+
+
+# Run normality tests on @param values
+# Shapiro-Wilk and D'Agostino and Pearson's tests run on a stratified subsample; the moment-based test uses every value
+# @returns dict of test name to (test statistic, p-value), plus the number of values and the subsample size
+def computeNormalityDiagnostics(values, subsampleSize: int = maxSubsampleSize) -> dict:
+    values = pd.Series(values).dropna()
+    statistics = compute_moment_statistics(values.values)
+    subsample = stratifiedSubsample(values.values, size=subsampleSize)
+
+    results = {
+        "n": int(statistics.count),
+        "subsample size": int(subsample.size),
+        "skewness": statistics.get_skewness(),
+        "kurtosis": statistics.get_kurtosis(),
+        "shapiro": (math.nan, math.nan),
+        "normaltest": (math.nan, math.nan),
+        "moment normaltest": momentNormalityTest(statistics),
+    }
+    if subsample.size >= 3:
+        results["shapiro"] = tuple(float(r) for r in stats.shapiro(subsample))
+    if subsample.size >= 8:
+        results["normaltest"] = tuple(float(r) for r in stats.normaltest(subsample))
+
+    return results
+
+
+def _computeAndStore(fingerprint: str, values):
+    try:
+        results = computeNormalityDiagnostics(values)
+    except Exception as e:
+        results = {"error": str(e)}
+    with _lock:
+        _results[fingerprint] = results
+        _pending.pop(fingerprint, None)
+        while len(_results) > maxCachedDiagnostics:
+            _results.pop(next(iter(_results)))
+
+
+# Start computing normality diagnostics for @param values in a background thread, unless they are cached or already being computed
+# @returns fingerprint to look the results up with getNormalityDiagnostics
+def requestNormalityDiagnostics(values) -> str:
+    fingerprint = dataFingerprint(values)
+    with _lock:
+        if fingerprint not in _results and fingerprint not in _pending:
+            _pending[fingerprint] = _executor.submit(
+                _computeAndStore, fingerprint, pd.Series(values).copy()
+            )
+    return fingerprint
+
+
+# @returns True if the diagnostics for the data with @param fingerprint are being computed
+# Diagnostics that are neither cached nor being computed were never requested, or were dropped from the cache and
+# must be requested again
+def isNormalityDiagnosticsPending(fingerprint: str) -> bool:
+    with _lock:
+        return fingerprint in _pending
+
+
+# @returns normality diagnostics for the data with @param fingerprint, or None if they are not cached (e.g., still
+# being computed; see isNormalityDiagnosticsPending)
+def getNormalityDiagnostics(fingerprint: str, wait: bool = False):
+    with _lock:
+        future = _pending.get(fingerprint)
+    if wait and future is not None:
+        future.result()
+    with _lock:
+        results = _results.pop(fingerprint, None)
+        if results is not None:
+            _results[fingerprint] = results  # Most recently used
+        return results
@@ -1,84 +1,38 @@
 from dash.dependencies import Output, Input, State, ALL, MATCH
 import dash
 from dash.exceptions import PreventUpdate
-import dash_html_components as html
-from tisane.gui.gui_components import GUIComponents, separateByUpperCamelCase
+from tisane.gui.gui_components import (
+    GUIComponents,
+    separateByUpperCamelCase,
+    getPatternId,
+)
 import json
 import logging
 
 
 def createRandomEffectsCallbacks(app, comp: GUIComponents = None):
-    # createRandomEffectsAddedCallbacks(app, comp)
     createRandomEffectsCorrelationCallbacks(app, comp)
     createRandomEffectsVisibleCallbacks(app, comp)
     pass
 
 
-def createRandomEffectsAddedCallbacks(app, comp: GUIComponents = None):
-    logger = logging.getLogger("werkzeug")
-    inputs = [Input(id, "checked") for id in comp.getRandomEffectCheckboxIds()]
-    states = [State(id, "id") for id in comp.getRandomEffectCheckboxIds()]
-
-    @app.callback(Output("added-random-effects", "children"), inputs, states)
-    def addRandomEffects(*args):
-        assert len(args) % 2 == 0, "Length of args is weird: {}".format(args)
-        if not comp:
-            logger.warning("Cannot update added random effects")
-            raise PreventUpdate
-        if args:
-            logger.debug("Adding random effects")
-            half = int(len(args) / 2)
-            inputs = args[:half]
-            states = args[half:]
-            logger.debug(inputs)
-            checked = []
-            for i in range(len(inputs)):
-                id = states[i]
-                input = inputs[i]
-                if input and comp.hasRandomEffectForComponentId(id):
-                    randomEffect = comp.getRandomEffectFromComponentId(id)
-                    checked.append(randomEffect)
-                    pass
-                pass
-            return [html.Li(str(c)) for c in checked]
-        logger.warning("Could not add random effects")
-        raise PreventUpdate
-
-
 def createRandomEffectsCorrelationCallbacks(app, comp: GUIComponents = None):
     logger = logging.getLogger("werkzeug")
-    if comp:
-        checkboxIds = comp.getRandomSlopeCheckboxIds()
-        if checkboxIds:
-            inputs = [Input(id, "checked") for id in checkboxIds]
-            states = [State(id, "id") for id in checkboxIds]
-            outputs = [Output(id + "-span", "children") for id in checkboxIds]
-
-            @app.callback(outputs, inputs, states)
-            def changeCorrelation(*args):
-                assert len(args) % 2 == 0, "Weird number of arguments: {}".format(
-                    len(args)
-                )
-
-                if not comp:
-                    logger.warning("Cannot update correlations")
-                    raise PreventUpdate
-
-                if args:
-                    half = int(len(args) / 2)
-                    inputs = args[:half]
-                    states = args[half:]
-                    # dict of id to checked
-                    idToChecked = {states[i]: inputs[i] for i in range(half)}
-                    idToCorrelated = {}
-                    for id, checked in idToChecked.items():
-                        idToCorrelated[id] = (
-                            " (correlated)" if checked else " (not correlated)"
-                        )
-                        comp.markCheckedForCorrelatedId(id, checked)
-                    return tuple([idToCorrelated[id] for id in checkboxIds])
+    if comp and comp.getRandomSlopeCheckboxIds():
+        # Each checkbox only updates its own span, so a click sends one value to the server
+        @app.callback(
+            Output(getPatternId("correlated span", MATCH), "children"),
+            Input(getPatternId("correlated", MATCH), "checked"),
+            State(getPatternId("correlated", MATCH), "id"),
+        )
+        def changeCorrelation(checked, id):
+            if not comp:
+                logger.warning("Cannot update correlations")
                 raise PreventUpdate
 
+            comp.markCheckedForCorrelatedId(id["index"], checked)
+            return " (correlated)" if checked else " (not correlated)"
+
 
 def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
     logger = logging.getLogger("werkzeug")
@@ -95,17 +49,29 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
         if allIds:
             logger.debug("allIds: {}".format(allIds))
             # rowOutputs = [Output(id, "hidden") for id in allIds]
-            rowOutputs = [Output(id, "style") for id in interceptCellIds]
+            # The table cells are only in the layout once the random effects tab has been opened, so they are matched with ALL
+            rowOutputs = (
+                [Output(getPatternId("random intercept cell", ALL), "style")]
+                if interceptCellIds
+                else []
+            )
             rowOutputs += [Output(id, "hidden") for id in groupingIds]
             rowOutputs = rowOutputs + [Output("random-effects-check-store", "data")]
+            # Pattern-matching outputs are in layout order, which the ids in this state follow
+            interceptCellStates = (
+                [State(getPatternId("random intercept cell", ALL), "id")]
+                if interceptCellIds
+                else []
+            )
 
             @app.callback(
                 rowOutputs,
                 Input("added-main-effects-store", "data"),
                 Input("added-interaction-effects-store", "data"),
+                interceptCellStates,
             )
             def changeVisibility(
-                outputFromMainEffectsString, outputFromInteractionEffectsString
+                outputFromMainEffectsString, outputFromInteractionEffectsString, *states
             ):
                 outputFromMainEffects = (
                     json.loads(outputFromMainEffectsString)
@@ -143,15 +109,18 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
                     # rowResult = [u not in allVisibleUnits and u not in comp.unitsWithoutVariables for u in units]
 
                     cellStyleResult = []
-                    cellsSeeThru = False
-                    for cellId in interceptCellIds:
-                        group = comp.getGroupFromRandomInterceptId(cellId)
+                    for id in states[0] if states else []:
+                        group = comp.getGroupFromRandomInterceptId(id["index"])
                         cellStyleResult.append(
                             opaqueStyle
                             if group in allVisibleUnits
                             or group in comp.unitsWithoutVariables
                             else seeThruStyle
                         )
+                        pass
+                    cellsSeeThru = False
+                    for cellId in interceptCellIds:
+                        group = comp.getGroupFromRandomInterceptId(cellId)
                         comp.markUnavailableRandomEffect(
                             group=group,
                             unavailable=group not in allVisibleUnits
@@ -176,7 +145,11 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
                         "seeThru": cellsSeeThru,
                     }
                     dataResult = [json.dumps(allVisibleObject)]
-                    return tuple(cellStyleResult + groupingResult + dataResult)
+                    return tuple(
+                        ([cellStyleResult] if interceptCellIds else [])
+                        + groupingResult
+                        + dataResult
+                    )
                 raise PreventUpdate
 
             randomSlopeAddedIds = sorted(list(comp.randomSlopeAddedIdToUnit.keys()))
@@ -186,8 +159,23 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
             randomSlopeAddedOutputs = [
                 Output(id, "hidden") for id in (randomSlopeAddedIds + individualIds)
             ]
-            cellOutputs = [Output(id, "style") for id in cellIds]
-            correlatedOutputs = [Output(id, "disabled") for id in correlatedIds]
+            cellOutputs = (
+                [Output(getPatternId("random slope cell", ALL), "style")]
+                if cellIds
+                else []
+            )
+            cellStates = (
+                [State(getPatternId("random slope cell", ALL), "id")] if cellIds else []
+            )
+            correlatedOutputs = (
+                [Output(getPatternId("correlated", ALL), "disabled")]
+                if correlatedIds
+                else []
+            )
+            # Pattern-matching outputs are in layout order, which the ids in this state follow
+            correlatedStates = (
+                [State(getPatternId("correlated", ALL), "id")] if correlatedIds else []
+            )
             notAvailable = [
                 Output("random-effects-not-available-explanation", "children")
             ]
@@ -201,8 +189,12 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
                 + correlatedOutputs
                 + notAvailable,
                 Input("random-effects-check-store", "data"),
+                cellStates + correlatedStates,
             )
-            def changeRandomSlopeSpanVisibility(allVisibleJsonString):
+            def changeRandomSlopeSpanVisibility(allVisibleJsonString, *states):
+                states = list(states)
+                cellStateIds = states.pop(0) if cellIds else []
+                correlatedStateIds = states.pop(0) if correlatedIds else []
                 if allVisibleJsonString:
                     allVisibleObject = json.loads(allVisibleJsonString)
                     allVisible = allVisibleObject["allVisible"]
@@ -227,20 +219,29 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
                         comp.markUnavailableRandomEffect(
                             group=unit, iv=iv, unavailable=iv not in allVisible
                         )
+                        pass
+                    cellResult = []
+                    for id in cellStateIds:
+                        unit, iv = comp.randomSlopeIdToGroupIv[id["index"]]
                         if iv not in allVisible:
-                            result.append({"opacity": 0.5})
+                            cellResult.append({"opacity": 0.5})
                             pass
                         else:
-                            result.append({"opacity": 1.0})
+                            cellResult.append({"opacity": 1.0})
                         # result.append(iv not in allVisible)
 
                         # result.append("bg-light" if iv not in allVisible else "")
                         pass
-                    for id in correlatedIds:
-                        unit, iv = comp.getGroupAndIvFromCorrelatedId(id)
-                        result.append(iv not in allVisible)
+                    correlatedResult = []
+                    for id in correlatedStateIds:
+                        unit, iv = comp.getGroupAndIvFromCorrelatedId(id["index"])
+                        correlatedResult.append(iv not in allVisible)
                         pass
-                    if True in result or allVisibleObject["seeThru"]:
+                    if (
+                        True in result
+                        or True in correlatedResult
+                        or allVisibleObject["seeThru"]
+                    ):
                         explanation = comp.getRandomEffectsUnavailableExplanation()
                         if explanation:
                             result.append(explanation)
@@ -251,5 +252,11 @@ def createRandomEffectsVisibleCallbacks(app, comp: GUIComponents = None):
                         pass
                     else:
                         result.append("")
+                    if cellIds:
+                        result.insert(-1, cellResult)
+                        pass
+                    if correlatedIds:
+                        result.insert(-1, correlatedResult)
+                        pass
                     return tuple(result)
                 raise PreventUpdate
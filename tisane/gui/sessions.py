@@ -0,0 +1,225 @@
+"""
+Per-session GUI state for serving one Tisane GUI to many analysts.
+
+Each browser gets a session id cookie. The selections an analyst makes (the parts of GUIComponents that callbacks change) are kept in a file per session, so every worker process of a multi-worker WSGI server sees the same state. Requests from one session are serialized with a file lock; requests from different sessions do not block each other.
+"""
+from flask import g, request
+import copy
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: sessions can only be shared by the threads of one process
+    fcntl = None
+
+from tisane.gui.gui_components import GUIComponents
+
+sessionCookieName = "tisane-session"
+# Attributes of GUIComponents that callbacks change, and so are kept per session
+sessionAttributes = ["output"]
+# Attributes of GUIComponents that callbacks change but that describe the shared layout and data, not an analyst's selections
+# Setting any other attribute through SessionComponents is an error, so session state never leaks into every session
+sharedAttributes = ["numGeneratedComponentIds", "normalityTestsFingerprint"]
+# Sessions that have not been used for this many seconds are removed when the GUI page is loaded
+maxSessionAge = 24 * 60 * 60
+
+_sessionIdPattern = re.compile(r"^[0-9a-f]{32}$")
+# Session id -> [lock, number of requests holding or waiting for it]; removed when no request uses the session
+_threadLocks = {}
+_threadLocksLock = threading.Lock()
+
+
+def isValidSessionId(sessionId) -> bool:
+    return isinstance(sessionId, str) and bool(_sessionIdPattern.match(sessionId))
+
+
+class SessionStore:
+    # @param directory is where each session's state and generated files are written, one sub-directory per session
+    # @param initialState is the state a new (or reloaded) session starts with
+    def __init__(self, directory: str, initialState: dict):
+        self.directory = os.path.abspath(directory)
+        self.initialState = copy.deepcopy(initialState)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def getSessionDirectory(self, sessionId: str) -> str:
+        assert isValidSessionId(sessionId), "Invalid session id: {}".format(sessionId)
+        return os.path.join(self.directory, sessionId)
+
+    def getStatePath(self, sessionId: str) -> str:
+        return os.path.join(self.getSessionDirectory(sessionId), "state.json")
+
+    # @returns id for a new session; its state is written the first time it is saved
+    def newSessionId(self) -> str:
+        return uuid.uuid4().hex
+
+    def load(self, sessionId: str) -> dict:
+        try:
+            with open(self.getStatePath(sessionId), "r") as f:
+                return json.loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return copy.deepcopy(self.initialState)
+
+    # Write to a temporary file first so a crash never leaves a partially written state
+    def save(self, sessionId: str, state: dict):
+        sessionDirectory = self.getSessionDirectory(sessionId)
+        os.makedirs(sessionDirectory, exist_ok=True)
+        fd, tempPath = tempfile.mkstemp(dir=sessionDirectory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(state))
+                pass
+            os.replace(tempPath, self.getStatePath(sessionId))
+        except BaseException:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+            raise
+
+    def reset(self, sessionId: str):
+        self.save(sessionId, self.initialState)
+
+    # Block until no other request (in any process) is using the session with @param sessionId
+    # @returns handle to pass to release
+    def acquire(self, sessionId: str):
+        with _threadLocksLock:
+            entry = _threadLocks.setdefault(sessionId, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        lockFile = None
+        try:
+            if fcntl is not None:
+                os.makedirs(self.getSessionDirectory(sessionId), exist_ok=True)
+                lockFile = open(
+                    os.path.join(self.getSessionDirectory(sessionId), ".lock"), "w"
+                )
+                fcntl.flock(lockFile, fcntl.LOCK_EX)
+        except BaseException:
+            if lockFile is not None:
+                lockFile.close()
+            self._releaseThreadLock(sessionId)
+            raise
+        return (sessionId, lockFile)
+
+    def release(self, handle):
+        sessionId, lockFile = handle
+        if lockFile is not None:
+            fcntl.flock(lockFile, fcntl.LOCK_UN)
+            lockFile.close()
+        self._releaseThreadLock(sessionId)
+
+    # Release the thread lock of @param sessionId, and drop it once no request is using the session
+    def _releaseThreadLock(self, sessionId: str):
+        with _threadLocksLock:
+            entry = _threadLocks[sessionId]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _threadLocks[sessionId]
+
+    def removeExpiredSessions(self, maxAge: float = None):
+        maxAge = maxSessionAge if maxAge is None else maxAge
+        now = time.time()
+        for sessionId in os.listdir(self.directory):
+            if not isValidSessionId(sessionId):
+                continue
+            statePath = self.getStatePath(sessionId)
+            if os.path.exists(statePath) and now - os.path.getmtime(statePath) > maxAge:
+                shutil.rmtree(self.getSessionDirectory(sessionId), ignore_errors=True)
+            pass
+
+
+# Stands in for a GUIComponents instance in callbacks
+# Session attributes are read from and written to the current request's session; everything else (the candidate effects, layout ids, caches) is shared
+# Only the session attributes and sharedAttributes can be set
+# Methods run with the proxy as self, so they also see the session's state
+class SessionComponents:
+    def __init__(self, comp: GUIComponents, store: SessionStore):
+        object.__setattr__(self, "_comp", comp)
+        object.__setattr__(self, "_store", store)
+
+    def _getSessionState(self) -> dict:
+        if "tisaneSessionState" not in g:
+            g.tisaneSessionLock = self._store.acquire(g.tisaneSessionId)
+            g.tisaneSessionState = self._store.load(g.tisaneSessionId)
+        return g.tisaneSessionState
+
+    @property
+    def outputDirectory(self):
+        return self._store.getSessionDirectory(g.tisaneSessionId)
+
+    def __getattr__(self, name):
+        if name in sessionAttributes:
+            return self._getSessionState()[name]
+        value = getattr(self._comp, name)
+        if getattr(value, "__self__", None) is self._comp:
+            return value.__func__.__get__(self)
+        return value
+
+    def __setattr__(self, name, value):
+        if name in sessionAttributes:
+            self._getSessionState()[name] = value
+            pass
+        elif name in sharedAttributes:
+            setattr(self._comp, name, value)
+        else:
+            raise AttributeError(
+                "Cannot set {} for a session: add it to sessionAttributes or sharedAttributes".format(
+                    name
+                )
+            )
+
+
+# Give every request to @param app a session from @param store, and save the session's state after each request that used it
+# @returns SessionComponents to create the app's callbacks with instead of @param comp
+def installSessions(app, comp: GUIComponents, store: SessionStore) -> SessionComponents:
+    server = app.server
+    indexPath = app.config.requests_pathname_prefix
+
+    @server.before_request
+    def loadSession():
+        sessionId = request.cookies.get(sessionCookieName)
+        g.tisaneNewSession = not isValidSessionId(sessionId)
+        if g.tisaneNewSession:
+            sessionId = store.newSessionId()
+            pass
+        g.tisaneSessionId = sessionId
+        if request.method == "GET" and request.path == indexPath:
+            # A (re)loaded page shows the initial selections
+            store.removeExpiredSessions()
+            handle = store.acquire(sessionId)
+            try:
+                store.reset(sessionId)
+            finally:
+                store.release(handle)
+            pass
+
+    @server.after_request
+    def saveSession(response):
+        if "tisaneSessionState" in g:
+            store.save(g.tisaneSessionId, g.tisaneSessionState)
+            pass
+        if g.get("tisaneNewSession"):
+            response.set_cookie(
+                sessionCookieName, g.tisaneSessionId, httponly=True, samesite="Lax"
+            )
+            pass
+        return response
+
+    @server.teardown_request
+    def releaseSession(exception=None):
+        if "tisaneSessionLock" in g:
+            store.release(g.pop("tisaneSessionLock"))
+            pass
+
+    return SessionComponents(comp, store)
+
+
+# @returns the state a session starts with: the session attributes of @param comp before any callback has run
+def getInitialSessionState(comp: GUIComponents) -> dict:
+    return {name: copy.deepcopy(getattr(comp, name)) for name in sessionAttributes}
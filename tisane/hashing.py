@@ -0,0 +1,16 @@
+import hashlib
+import pandas as pd
+
+"""
+Fingerprints of data shared by code generation (data snapshots, design matrices) and the GUI (cached diagnostics).
+"""
+
+
+# @returns hex digest identifying the contents (values, column names, and dtypes) of @param df
+# The index is not hashed, as snapshots are written without it
+def hash_dataframe(df: pd.DataFrame) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    for col, dtype in df.dtypes.items():
+        hasher.update(f"{col}:{dtype};".encode("utf-8"))
+    return hasher.hexdigest()
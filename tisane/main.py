@@ -172,6 +172,7 @@ def write_to_script(code: str, output_dir: str, output_filename: str):
 
 
 # @param file is the path to the JSON file from which to construct the statistical model
+# @param model_dict is the model spec the GUI output; when given, @param filename is not read
 def construct_statistical_model(
     filename: typing.Union[Path],
     query: Design,
@@ -179,19 +180,21 @@ def construct_statistical_model(
     interaction_effects_candidates: Set[AbstractVariable],
     random_effects_candidates: Set[RandomEffect],
     family_link_paired_candidates: Dict[AbstractFamily, Set[AbstractLink]],
+    model_dict: Dict = None,
 ):
-    print(f"read through {filename}")
-    assert filename.endswith(".json")
-    dir = os.getcwd()
-    path = Path(dir, filename)
-
     gr = query.graph
 
-    # Read in JSON file as a dict
-    file_data = None
-    with open(path, "r") as f:
-        file_data = f.read()
-    model_dict = json.loads(file_data)  # file_data is a string
+    if model_dict is None:
+        print(f"read through {filename}")
+        assert filename.endswith(".json")
+        dir = os.getcwd()
+        path = Path(dir, filename)
+
+        # Read in JSON file as a dict
+        file_data = None
+        with open(path, "r") as f:
+            file_data = f.read()
+        model_dict = json.loads(file_data)  # file_data is a string
 
     # Specify dependent variable
     dependent_variable = query.dv
@@ -329,12 +332,16 @@ def construct_statistical_model(
 
     return sm
 
-def infer_model(design: Design, jupyter: bool = False):
-    return infer_statistical_model_from_design(design=design, jupyter=jupyter)
+def infer_model(design: Design, jupyter: bool = False, input_json: str = None):
+    return infer_statistical_model_from_design(
+        design=design, jupyter=jupyter, input_json=input_json
+    )
 
 
 # @returns statistical model that reflects the study design
-def infer_statistical_model_from_design(design: Design, jupyter: bool = False):
+def infer_statistical_model_from_design(
+    design: Design, jupyter: bool = False, input_json: str = None
+):
     """Infer a stats model from design and launch the Tisane GUI.
 
     The Tisane GUI will walk you through making additional
@@ -350,6 +357,11 @@ def infer_statistical_model_from_design(design: Design, jupyter: bool = False):
     jupyter : bool, default=False
         Whether to run the GUI in a plain server or as the output
         of a jupyter notebook cell.
+    input_json : str, optional
+        Path of a JSON file to also write the GUI's input (the
+        candidate effects, explanations and data) to. The GUI
+        itself is given the input directly, so by default no
+        file is written.
 
     Examples
     --------
@@ -438,28 +450,35 @@ def infer_statistical_model_from_design(design: Design, jupyter: bool = False):
     family_link_questions = generate_family_selection_questions_options(dv=design.dv)
     combined_dict["input"]["types of data"] = family_link_questions
     
-    # Add data
+    # Add data: the GUI is given the DataFrame itself
     data = design.get_data()
     if data is not None:
-        combined_dict["input"]["data"] = data.to_dict("list")
+        combined_dict["input"]["data"] = data
     else:  # There is no data
         combined_dict["input"]["data"] = dict()
 
-    # Write out to JSON in order to pass data to Tisane GUI for disambiguation
-    input_file = "input.json"
-
-    # Note: Because the input to the GUI is a JSON file, everything is
-    # stringified. This means that we need to match up the variable names with
-    # the actual variable objects in the next step.
-    # write_to_json returns the Path of the input.json file
-    path = write_to_json(combined_dict, "./", input_file)
+    # The GUI is given combined_dict directly; writing it out is only for inspecting or reusing it
+    # Note: The GUI works with variable names, so we need to match up the
+    # variable names with the actual variable objects in the next step.
+    if input_json is not None:
+        json_dict = dict(combined_dict)
+        json_dict["input"] = dict(combined_dict["input"])
+        if data is not None:
+            json_dict["input"]["data"] = data.to_dict("list")
+        write_to_json(
+            json_dict,
+            os.path.dirname(input_json) or "./",
+            os.path.basename(input_json),
+        )
 
     ### Step 3: Disambiguation loop (GUI)
     gui = TisaneGUI()
 
     ### Step 4: GUI generates code
     def generateCode(
-        destinationDir: str = None, modelSpecJson: str = "model_spec.json"
+        destinationDir: str = None,
+        modelSpecJson: str = "model_spec.json",
+        modelSpec: Dict = None,
     ):
         destinationDir = destinationDir or os.getcwd()
         output_filename = os.path.join(
@@ -476,16 +495,17 @@ def infer_statistical_model_from_design(design: Design, jupyter: bool = False):
             interaction_effects_candidates=interaction_effects_candidates,
             random_effects_candidates=random_effects_candidates,
             family_link_paired_candidates=family_link_paired,
+            model_dict=modelSpec,
         )
 
         if design.has_data():
             # Assign statistical model data from @parm design
             sm.assign_data(design.dataset)
         # Generate code from SM
-        code = generate_code(sm)
+        code = generate_code(sm, output_dir=destinationDir)
         # Write generated code out
 
         path = write_to_script(code, destinationDir, "model.py")
         return path
 
-    gui.start_app(input=path, jupyter=jupyter, generateCode=generateCode)
+    gui.start_app(input=combined_dict, jupyter=jupyter, generateCode=generateCode)
@@ -0,0 +1,156 @@
+import networkx as nx
+from typing import Iterable, List, Set, Tuple
+
+"""
+Reachability index over a view of a Graph (e.g., only its causal edges).
+
+Each node gets an integer id, and the nodes a node reaches (its descendants) and the nodes that reach it (its ancestors)
+are ints whose bit i is set if the node with id i is among them. Queries such as "does X cause Y transitively?" are
+then bitwise operations, and the index is updated in place when an edge is added instead of being rebuilt.
+"""
+
+# Edge types in each view of a Graph
+reachability_views = {
+    "causal": ("causes",),
+    "conceptual": ("causes", "associates"),
+}
+
+
+class ReachabilityIndex(object):
+    """Transitive closure of a directed graph, stored as a descendants and an ancestors bitset for each node
+
+    A node reaches another if there is a path of at least one edge between them, so a node only reaches itself if it is
+    on a cycle (e.g., two variables associated with each other). Cycles are allowed.
+
+    Parameters
+    ----------
+    edges : Iterable[Tuple[str, str]], optional
+        (start, end) edges to index. If the edges form a DAG, the index is built in one pass in topological order;
+        otherwise, the edges are added one at a time.
+    nodes : Iterable[str], optional
+        Nodes to index even if they have no edges.
+
+    """
+
+    ids: dict  # node -> id
+    nodes: list  # id -> node
+    descendants: list  # id -> bitset of the ids the node reaches
+    ancestors: list  # id -> bitset of the ids that reach the node
+
+    def __init__(
+        self, edges: Iterable[Tuple[str, str]] = (), nodes: Iterable[str] = ()
+    ):
+        self.ids = dict()
+        self.nodes = list()
+        self.descendants = list()
+        self.ancestors = list()
+
+        for n in nodes:
+            self.add_node(n)
+        edges = list(edges)
+        gr = nx.DiGraph(edges)
+        if nx.is_directed_acyclic_graph(gr):
+            self._add_dag(gr)
+        else:
+            for (start, end) in edges:
+                self.add_edge(start, end)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # Build the bitsets of the nodes in the DAG @param gr in one pass in topological order (and one in reverse)
+    def _add_dag(self, gr: nx.DiGraph):
+        order = list(nx.topological_sort(gr))
+        for n in order:
+            self.add_node(n)
+        for n in reversed(order):
+            i = self.ids[n]
+            for s in gr.successors(n):
+                j = self.ids[s]
+                self.descendants[i] |= self.descendants[j] | (1 << j)
+        for n in order:
+            i = self.ids[n]
+            for p in gr.predecessors(n):
+                j = self.ids[p]
+                self.ancestors[i] |= self.ancestors[j] | (1 << j)
+
+    # @returns id of @param node, adding it to the index if it is new
+    def add_node(self, node: str) -> int:
+        if node not in self.ids:
+            self.ids[node] = len(self.nodes)
+            self.nodes.append(node)
+            self.descendants.append(0)
+            self.ancestors.append(0)
+        return self.ids[node]
+
+    # Add the edge @param start -> @param end, updating the nodes whose reachability changes
+    # Only the ancestors of @param start and the descendants of @param end are visited
+    def add_edge(self, start: str, end: str):
+        i = self.add_node(start)
+        j = self.add_node(end)
+        end_bit = 1 << j
+        if self.descendants[i] & end_bit:
+            return  # @param end was already reachable, so nothing changes
+        new_descendants = self.descendants[j] | end_bit
+        new_ancestors = self.ancestors[i] | (1 << i)
+        for a in iter_bits(new_ancestors):
+            self.descendants[a] |= new_descendants
+        for d in iter_bits(new_descendants):
+            self.ancestors[d] |= new_ancestors
+
+    # @returns bitset of the nodes @param node reaches, 0 if @param node is not in the index
+    def get_descendants_bits(self, node: str) -> int:
+        i = self.ids.get(node)
+        return 0 if i is None else self.descendants[i]
+
+    # @returns bitset of the nodes that reach @param node, 0 if @param node is not in the index
+    def get_ancestors_bits(self, node: str) -> int:
+        i = self.ids.get(node)
+        return 0 if i is None else self.ancestors[i]
+
+    # @returns bitset of @param nodes, ignoring those not in the index
+    def to_bits(self, nodes: Iterable[str]) -> int:
+        bits = 0
+        for n in nodes:
+            if n in self.ids:
+                bits |= 1 << self.ids[n]
+        return bits
+
+    # @returns set of the nodes in @param bits
+    def to_nodes(self, bits: int) -> Set[str]:
+        return {self.nodes[i] for i in iter_bits(bits)}
+
+    # @returns True if there is a path from @param start to @param end
+    def reaches(self, start: str, end: str) -> bool:
+        j = self.ids.get(end)
+        return j is not None and bool(self.get_descendants_bits(start) >> j & 1)
+
+    # @returns set of the nodes @param node reaches
+    def get_descendants(self, node: str) -> Set[str]:
+        return self.to_nodes(self.get_descendants_bits(node))
+
+    # @returns set of the nodes that reach @param node
+    def get_ancestors(self, node: str) -> Set[str]:
+        return self.to_nodes(self.get_ancestors_bits(node))
+
+    # @returns set of the @param targets that @param node reaches
+    def get_reached(self, node: str, targets: Iterable[str]) -> Set[str]:
+        return self.to_nodes(self.get_descendants_bits(node) & self.to_bits(targets))
+
+    # @returns set of the nodes that reach at least two of @param nodes
+    def get_common_ancestors(self, nodes: List[str]) -> Set[str]:
+        seen = 0
+        common = 0
+        for n in nodes:
+            ancestors = self.get_ancestors_bits(n)
+            common |= seen & ancestors
+            seen |= ancestors
+        return self.to_nodes(common)
+
+
+# @returns iterator over the positions of the bits set in @param bits, in increasing order
+def iter_bits(bits: int):
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
@@ -35,6 +35,11 @@ def splitTable(mystr: str):
     return firstPart, secondPart
 
 
+# Variables with more relationships than this index them by type as they are added, so that adding
+# relationships to a variable that has many stays O(1); other variables build the index when it is first used
+max_unindexed_relationships = 16
+
+
 class AbstractVariable:
     """Super class for all variables, containing basic common attributes.
 
@@ -57,18 +62,65 @@ class AbstractVariable:
 
     """
 
+    # Variables (and the relationships between them) use slots instead of a __dict__,
+    # so that designs with very many variables stay small in memory
+    __slots__ = ("name", "data", "relationships", "_relationship_index")
+
     name: str
     data: DataVector
     relationships: List[typing.Union["Has", "Repeats", "Nests"]]
+    # Relationship class -> dict whose keys are the relationships of that class, in the order they were added
+    # None until it is first needed (see add_relationship), so variables that are never queried stay small
+    _relationship_index: dict
 
     def __init__(self, name: str, data: None):
         self.name = name
         self.data = data  # or replace with DataVector()?
         self.relationships = list()
+        self._relationship_index = None
 
     def add_data(self, data):
         self.data = data
 
+    # Add @param relationship to this variable's relationships, unless it has already been added
+    # Relationships are compared by identity
+    # Relationships should only be added through this method, so the index by type stays up to date
+    def add_relationship(
+        self,
+        relationship: typing.Union[
+            "Has", "Repeats", "Nests", "Causes", "Associates", "Moderates"
+        ],
+    ):
+        index = self._relationship_index
+        if index is None and len(self.relationships) >= max_unindexed_relationships:
+            index = self._get_relationship_index()
+        if index is None:
+            # Few relationships, so scanning them is cheap
+            if relationship in self.relationships:
+                return
+        else:
+            of_type = index.setdefault(type(relationship), dict())
+            if relationship in of_type:
+                return
+            of_type[relationship] = None
+        self.relationships.append(relationship)
+
+    # @returns dict from relationship class to this variable's relationships of that class, built the first time it is
+    # needed and then kept up to date by add_relationship
+    def _get_relationship_index(self) -> dict:
+        if self._relationship_index is None:
+            index = dict()
+            for r in self.relationships:
+                index.setdefault(type(r), dict())[r] = None
+                pass
+            self._relationship_index = index
+        return self._relationship_index
+
+    # @returns list of this variable's relationships of @param relationship_type (e.g., Has or Nests), in the order they
+    # were added
+    def get_relationships(self, relationship_type: type) -> list:
+        return list(self._get_relationship_index().get(relationship_type, ()))
+
     # @param effect the variable causes
     def causes(self, effect: "AbstractVariable"):
         """Adds a `causes` relationship to a data variable.
@@ -95,8 +147,8 @@ class AbstractVariable:
         """
         # Update both variables
         cause_relat = Causes(cause=self, effect=effect)
-        self.relationships.append(cause_relat)
-        effect.relationships.append(cause_relat)
+        self.add_relationship(cause_relat)
+        effect.add_relationship(cause_relat)
 
     # @param variable associated with self
     def associates_with(self, variable: "AbstractVariable"):
@@ -123,8 +175,8 @@ class AbstractVariable:
         """
         # Update both variables
         assoc_relat = Associates(lhs=self, rhs=variable)
-        self.relationships.append(assoc_relat)
-        variable.relationships.append(assoc_relat)
+        self.add_relationship(assoc_relat)
+        variable.add_relationship(assoc_relat)
 
     # @param moderator contains variables that moderates the effect of self on @param on variable
     def moderates(
@@ -166,15 +218,15 @@ class AbstractVariable:
             m_vars += moderator  # Add moderator to vars list
 
         moderate_relat = Moderates(moderator=m_vars, on=on)
-        self.relationships.append(moderate_relat)
+        self.add_relationship(moderate_relat)
 
         # Add relationship to moderators
         for v in m_vars:
             if self != v:  # Already added to self
-                v.relationships.append(moderate_relat)
+                v.add_relationship(moderate_relat)
 
         # Add relationship to @param on
-        on.relationships.append(moderate_relat)
+        on.add_relationship(moderate_relat)
 
     def _repr_html_(self):
         rowFormat = """<tr><th scope="row" style="text-align:left">{}</th><td style="text-align:left">{}</td></tr>"""
@@ -237,6 +289,8 @@ class SetUp(AbstractVariable):
 
     """
 
+    __slots__ = ("variable", "cardinality")
+
     variable: "Measure"
 
     def __init__(
@@ -339,6 +393,8 @@ class Unit(AbstractVariable):
 
     """
 
+    __slots__ = ("cardinality",)
+
     def __init__(self, name: str, data=None, cardinality: int = None, **kwargs):
         super(Unit, self).__init__(name, data)
         self.cardinality = cardinality
@@ -555,8 +611,8 @@ class Unit(AbstractVariable):
         has_relat = Has(
             variable=self, measure=measure, repetitions=repet, according_to=according_to
         )
-        self.relationships.append(has_relat)
-        measure.relationships.append(has_relat)
+        self.add_relationship(has_relat)
+        measure.add_relationship(has_relat)
 
         # Add relationships between @number_of_instances (if AbstractVariable) variables and DV?
 
@@ -569,8 +625,8 @@ class Unit(AbstractVariable):
     def nests_within(self, group: "Unit"):
         nest_relat = Nests(base=self, group=group)
 
-        self.relationships.append(nest_relat)
-        group.relationships.append(nest_relat)
+        self.add_relationship(nest_relat)
+        group.add_relationship(nest_relat)
 
     def get_cardinality(self):
         return self.cardinality
@@ -594,6 +650,8 @@ class Measure(AbstractVariable):
     Super class for Measures
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str, data: None, **kwargs):
         super(Measure, self).__init__(name, data)
 
@@ -622,19 +680,17 @@ class Measure(AbstractVariable):
 
     # @returns the unit this measure is an attribute of
     def get_unit(self) -> Unit:
-        for r in self.relationships:
-            if isinstance(r, Has):
-                if r.measure is self and isinstance(r.variable, Unit):
-                    return r.variable
+        unit_relat = self.get_unit_relationship()
 
+        if unit_relat is not None:
+            return unit_relat.variable
         return None
 
     # @returns the unit relationship, None otherwise
     def get_unit_relationship(self) -> "Has":
-        for r in self.relationships:
-            if isinstance(r, Has):
-                if r.measure is self and isinstance(r.variable, Unit):
-                    return r
+        for r in self.get_relationships(Has):
+            if r.measure is self and isinstance(r.variable, Unit):
+                return r
 
         return None
 
@@ -683,8 +739,10 @@ class Nominal(Measure):
 
     """
 
+    __slots__ = ("cardinality", "categories", "isInteraction", "moderators")
+
     cardinality: int
-    categories = list
+    categories: list
     isInteraction: bool
     moderators: List[AbstractVariable]
 
@@ -878,6 +936,8 @@ class Ordinal(Measure):
 
     """
 
+    __slots__ = ("cardinality", "ordered_cat", "properties")
+
     cardinality: int
     ordered_cat: list
 
@@ -980,6 +1040,8 @@ class Numeric(Measure):
 
     """
 
+    __slots__ = ("properties",)
+
     def __init__(self, name: str, data=None):
         super(Numeric, self).__init__(name=name, data=data)
         self.data = data
@@ -1010,6 +1072,8 @@ Class for Cause relationships
 
 
 class Causes(object):
+    __slots__ = ("cause", "effect")
+
     cause: AbstractVariable
     effect: AbstractVariable
 
@@ -1024,6 +1088,8 @@ Class for Associate relationships
 
 
 class Associates(object):
+    __slots__ = ("lhs", "rhs")
+
     lhs: AbstractVariable
     rhs: AbstractVariable
 
@@ -1038,6 +1104,8 @@ Class for Moderate relationships (for Interactions)
 
 
 class Moderates(object):
+    __slots__ = ("moderator", "on")
+
     moderator: List[AbstractVariable]
     on: AbstractVariable
 
@@ -1077,6 +1145,8 @@ class Has:
     according_to
 
     """
+    __slots__ = ("variable", "measure", "repetitions", "according_to")
+
     variable: AbstractVariable
     measure: AbstractVariable
     repetitions: "NumberValue"
@@ -1116,6 +1186,8 @@ class Repeats:
     according_to
 
     """
+    __slots__ = ("unit", "measure", "according_to")
+
     unit: Unit
     measure: Measure
     according_to: Measure
@@ -1143,6 +1215,8 @@ class Nests:
     group
 
     """
+    __slots__ = ("base", "group")
+
     base: Unit
     group: Unit
 
@@ -1165,6 +1239,8 @@ class NumberValue:
     value
 
     """
+    __slots__ = ("value",)
+
     value: int
 
     def __init__(self, value: int):
@@ -1217,6 +1293,25 @@ class NumberValue:
         )
 
 
+# Exactly and AtMost instances for small int values are shared: nearly every measure
+# has one (usually Exactly(1)), and they are not changed after they are created
+max_interned_number_value = 256
+_interned_number_values = dict()
+
+
+# @returns the shared instance of @param cls for @param value, or a new instance if @param value is not interned
+def _new_number_value(cls, value=None):
+    if type(value) is not int or not 0 <= value <= max_interned_number_value:
+        return object.__new__(cls)
+    key = (cls, value)
+    instance = _interned_number_values.get(key)
+    if instance is None:
+        instance = object.__new__(cls)
+        instance.value = value
+        instance = _interned_number_values.setdefault(key, instance)
+    return instance
+
+
 class Exactly(NumberValue):
     """Class for expressing exact values
 
@@ -1230,9 +1325,18 @@ class Exactly(NumberValue):
         the exact value to be used.
     """
 
+    __slots__ = ()
+
+    def __new__(cls, value: int = None):
+        return _new_number_value(cls, value)
+
     def __init__(self, value: int):
         super(Exactly, self).__init__(value)
 
+    # Copies and unpickled instances are interned too
+    def __reduce__(self):
+        return (type(self), (self.value,))
+
     @extend_docstring(NumberValue.per, "`NumberValue`", "`Exactly`")
     def per(
         self,
@@ -1291,12 +1395,20 @@ class AtMost(NumberValue):
 
     """
 
+    __slots__ = ()
+
+    def __new__(cls, value: typing.Union[int, AbstractVariable] = None):
+        return _new_number_value(cls, value)
+
     def __init__(self, value: typing.Union[int, AbstractVariable]):
         if isinstance(value, int):
             super(AtMost, self).__init__(value)
         elif isinstance(value, AbstractVariable):
             super(AtMost, self).__init__(value.get_cardinality())
 
+    def __reduce__(self):
+        return (type(self), (self.value,))
+
     @extend_docstring(NumberValue.per, "`NumberValue`", "`AtMost`")
     def per(
         self,
@@ -1387,6 +1499,8 @@ class Per(NumberValue):
 
     """
 
+    __slots__ = ("number", "variable", "cardinality", "number_of_instances")
+
     number: NumberValue
     variable: AbstractVariable
     cardinality: bool